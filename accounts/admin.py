@@ -1,7 +1,27 @@
 from django.contrib import admin
-from .models import CustomUser, HomeworkQuestion, StudentAnswer # Add new models
+from . import leaderboard
+from .models import CustomUser, HomeworkQuestion, StudentAnswer, StudentPerformance, DailyPerformanceRollup, RollupCheckpoint # Add new models
+
+
+class StudentAnswerAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        # Keep the leaderboard totals in step with marks edited here
+        old = None
+        if change:
+            old = StudentAnswer.objects.filter(pk=obj.pk).values_list('student_id', 'question__subject', 'marks').first()
+        if old is None or old[2] != obj.marks:
+            obj.auto_graded = False  # marked by hand
+        super().save_model(request, obj, form, change)
+        changes = [(obj.student_id, obj.question.subject, None, obj.marks)]
+        if old:
+            changes.append((*old, None))
+        leaderboard.record_mark_changes(changes)
+
 
 # Register your models here.
 admin.site.register(CustomUser)
 admin.site.register(HomeworkQuestion) # <-- Add this line
-admin.site.register(StudentAnswer)  # <-- Add this line
+admin.site.register(StudentAnswer, StudentAnswerAdmin)  # <-- Add this line
+admin.site.register(StudentPerformance)
+admin.site.register(DailyPerformanceRollup)
+admin.site.register(RollupCheckpoint)
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # instrumentation hooks every database connection, so it must load before the first one
+        from . import checks, instrumentation, signals  # noqa: F401
+
+        if getattr(settings, 'GRADING_WARM_UP', False):
+            from .grading import warm_up
+            warm_up()
+
+        if getattr(settings, 'GRADING_POOL_SIZE', 0) > 0:
+            # Spawned by a web process's first request, so the first answers don't wait
+            # for them; processes that serve no requests never start a pool.
+            from django.core.signals import request_started
+            from .grading_pool import start_on_request
+            request_started.connect(start_on_request, dispatch_uid='grading_pool.start_on_request')
@@ -0,0 +1,156 @@
+"""
+Async versions of the dashboard and answer views, for the ASGI deployment.
+
+homework_project/asgi.py serves homework_project/urls_asgi.py, which routes
+``dashboard`` and ``answer`` here; every other URL keeps its sync view.
+
+Django's async ORM runs each query through ``sync_to_async`` on the one
+thread-sensitive thread, so gathering several of them still runs them one
+after another. The dashboard therefore runs the independent panels of
+accounts/views.py (``*_dashboard_panels``) on a small thread pool, each
+thread with its own database connection, and awaits them together: a cold
+dashboard costs about as long as its slowest panel instead of the sum of
+all of them. Grading is awaited through accounts/grading_pool.py, so
+scoring a long answer never blocks the event loop. Simple single-row reads
+and writes use the async ORM directly.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import close_old_connections
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from . import dashboard_cache, grading_pool, leaderboard, views
+from .grading import grading_result
+from .grading_queue import submit_for_grading
+from .instrumentation import render
+from .models import HomeworkQuestion, StudentAnswer
+
+# Threads are created on demand; every panel thread keeps one database connection open
+_panel_executor = ThreadPoolExecutor(max_workers=settings.DASHBOARD_PANEL_THREADS, thread_name_prefix='dashboard-panel')
+
+
+def _run_panel(panel):
+    try:
+        return panel()
+    finally:
+        # Request-finished handling only reaches the request's own thread; retire this
+        # thread's connection here once it is broken or older than CONN_MAX_AGE.
+        close_old_connections()
+
+
+async def build_context(panels, context=None):
+    """Async ``views.build_context``: runs all ``panels`` concurrently."""
+    context = {} if context is None else context
+    results = await asyncio.gather(*(
+        sync_to_async(_run_panel, thread_sensitive=False, executor=_panel_executor)(panel) for panel in panels
+    ))
+    for result in results:
+        context.update(result)
+    return context
+
+
+async def student_dashboard_context(user):
+    return await build_context(views.student_dashboard_panels(user))
+
+
+async def teacher_dashboard_context(user):
+    return await build_context(views.teacher_dashboard_panels(user), {'is_detail_view': False})
+
+
+async def principal_dashboard_context(start=None, end=None):
+    return await build_context(views.principal_dashboard_panels(start, end), {'range_start': start, 'range_end': end})
+
+
+@login_required(login_url='/login/')
+async def dashboard_view(request):
+    user = await request.auser()
+    role = user.role.lower()
+    template_name = f'accounts/{role}_dashboard.html'
+    context = {'user_name': user.user_name}
+
+    if role == 'admin':
+        context.update(await sync_to_async(views.admin_dashboard_context)(request))
+
+    elif role == 'student':
+        context.update(await dashboard_cache.astudent_context(user, student_dashboard_context))
+
+    elif role == 'teacher':
+        view_class = request.GET.get('view_class')
+        view_subject = request.GET.get('view_subject')
+        if view_class and view_subject:
+            # Lazy queryset; it is evaluated while rendering, off the event loop
+            context.update(views.teacher_detail_context(user, view_class, view_subject))
+        else:
+            context.update(await dashboard_cache.ateacher_context(user, teacher_dashboard_context))
+
+    elif role == 'principal':
+        start, end = views._date_param(request, 'from'), views._date_param(request, 'to')
+        context.update(await dashboard_cache.aprincipal_context(principal_dashboard_context, start, end))
+
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@login_required(login_url='/login/')
+async def answer_view(request, question_id):
+    user = await request.auser()
+    try:
+        question = await HomeworkQuestion.objects.aget(id=question_id)
+    except HomeworkQuestion.DoesNotExist:
+        messages.error(request, "This question does not exist.")
+        return redirect('dashboard')
+
+    previous_answer_obj = await StudentAnswer.objects.filter(
+        student=user, question=question, marks__isnull=True
+    ).afirst()
+    previous_answer_text = previous_answer_obj.answer if previous_answer_obj else ""
+
+    if request.method == 'POST':
+        answer_text = request.POST.get('student_answer')
+        if not answer_text:
+            messages.error(request, "Answer cannot be empty.")
+            return redirect('dashboard')
+
+        if settings.GRADING_MODE == 'queue':
+            await sync_to_async(submit_for_grading)(user, question, answer_text, previous_answer_obj)
+            messages.success(request, "Your answer has been submitted and will be graded shortly.")
+            return redirect('dashboard')
+
+        similarity, grade_score = await grading_pool.agrade(question, answer_text)
+
+        if previous_answer_obj:
+            await previous_answer_obj.adelete()
+
+        marks, remark = grading_result(similarity, grade_score)
+        await StudentAnswer.objects.acreate(
+            student=user, question=question, date=timezone.now().date(),
+            answer=answer_text, marks=marks, remarks=remark, auto_graded=True,
+        )
+        await sync_to_async(leaderboard.record_mark_changes)([(user.id, question.subject, None, marks)])
+        if marks is not None:
+            messages.success(request, f"Good work! Your answer was {similarity:.2f}% correct and has been saved.")
+        else:
+            messages.warning(
+                request,
+                f"Your answer was {similarity:.2f}% correct. Please review the auto-remark and resubmit.",
+                extra_tags=f"question_{question.id}"
+            )
+        return redirect('dashboard')
+
+    context = {
+        'question': question,
+        'timer_duration': max(10, len(question.model_answer.split())),  # 1 second per word, min 10 seconds
+        'previous_answer': previous_answer_text,
+        'page_data_json': json.dumps({
+            'questionText': question.question,
+            'modelAnswerText': question.model_answer,
+            'subject': question.subject
+        }),
+    }
+    return await sync_to_async(render)(request, 'accounts/answer_page.html', context)
@@ -0,0 +1,71 @@
+"""
+Authentication backend that serves request.user from a cached snapshot.
+
+AuthenticationMiddleware asks the session's backend for the user on every
+request. ModelBackend answers with a query for the whole CustomUser row,
+including the instruction text columns. This backend keeps the few columns
+views and templates actually read in the cache, keyed by user id, and
+builds a model instance from them with every other column deferred. A
+deferred column is still loaded on first access, so nothing breaks if a
+view needs one. Snapshots are dropped whenever the user is saved (see
+accounts/signals.py); bulk ``.update()`` calls on users must call
+``forget()`` themselves.
+
+The snapshot includes the password hash and the confirmation flags, so a
+password reset or a deactivation made by another process must reach it.
+Snapshots are therefore only used with a cache every process shares; with
+a process-local cache (or SESSION_USER_CACHE_TIMEOUT = 0) the user is read
+from the database on every request, like ModelBackend does.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+from .checks import cache_is_process_local
+from .models import CustomUser
+
+# ``password`` is needed to verify the session auth hash.
+SNAPSHOT_FIELDS = (
+    'id', 'password', 'email', 'user_name', 'role', 'user_class', 'is_confirmed', 'payment_confirmed',
+    'subscribed_till', 'salary_points', 'is_active', 'is_staff', 'is_superuser',
+)
+
+
+def _key(user_id):
+    return f'session-user:{user_id}'
+
+
+def forget(*user_ids):
+    """Drop the cached snapshots of ``user_ids``."""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+class CachedUserBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # ModelBackend is only listed after this backend so that sessions it
+            # created stay valid; stop authenticate() from hashing the password again there.
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        use_snapshots = settings.SESSION_USER_CACHE_TIMEOUT and not cache_is_process_local()
+        snapshot = cache.get(_key(user_id)) if use_snapshots else None
+        if snapshot is None:
+            user = CustomUser._default_manager.only(*SNAPSHOT_FIELDS).filter(pk=user_id).first()
+            if user is None:
+                return None
+            if use_snapshots:
+                cache.set(_key(user_id), {field: getattr(user, field) for field in SNAPSHOT_FIELDS},
+                          settings.SESSION_USER_CACHE_TIMEOUT)
+        else:
+            user = _from_snapshot(snapshot)
+        return user if self.user_can_authenticate(user) else None
+
+
+def _from_snapshot(snapshot):
+    # from_db() wants the loaded values in concrete field order
+    fields = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in snapshot]
+    return CustomUser.from_db(CustomUser.objects.db, fields, [snapshot[field] for field in fields])
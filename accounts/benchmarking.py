@@ -0,0 +1,33 @@
+"""Helpers shared by the ``bench_*`` management commands."""
+import math
+import statistics
+import subprocess
+
+from django.conf import settings
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(math.ceil(len(ordered) * percent / 100) - 1, 0))]
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean/max in milliseconds of a list of durations in seconds."""
+    return {
+        'p50_ms': percentile(seconds, 50) * 1000,
+        'p95_ms': percentile(seconds, 95) * 1000,
+        'p99_ms': percentile(seconds, 99) * 1000,
+        'mean_ms': statistics.fmean(seconds) * 1000,
+        'max_ms': max(seconds) * 1000,
+    }
+
+
+def git_revision():
+    """The checked-out commit, so saved results can be compared across commits; None outside git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
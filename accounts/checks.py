@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+from .throttling import CACHE_ALIAS
+
+
+def cache_is_process_local():
+    return issubclass(import_string(settings.CACHES['default']['BACKEND']), LocMemCache)
+
+
+@checks.register(checks.Tags.caches)
+def process_local_cache(app_configs, **kwargs):
+    """
+    Cached dashboards and session users are invalidated by whichever process
+    makes the write (see accounts/dashboard_cache.py), so every process must
+    see the same cache.
+    """
+    if not cache_is_process_local():
+        return []
+    return [checks.Warning(
+        'The default cache is local to each process, so writes made by other processes (grading_worker, '
+        'management commands, other web workers) leave stale dashboards behind. Session users are not cached.',
+        hint='Use a cache every process shares, such as FileBasedCache or Redis, or run a single process.',
+        id='accounts.W001',
+    )]
+
+
+@checks.register(checks.Tags.caches)
+def throttle_cache(app_configs, **kwargs):
+    """The login throttle (accounts/throttling.py) must answer without touching the database."""
+    if CACHE_ALIAS not in settings.CACHES:
+        return [checks.Error(
+            f'CACHES has no {CACHE_ALIAS!r} alias for the login throttle buckets.', id='accounts.E001',
+        )]
+    if issubclass(import_string(settings.CACHES[CACHE_ALIAS]['BACKEND']), DatabaseCache):
+        return [checks.Warning(
+            f'The {CACHE_ALIAS!r} cache is stored in the database, so the login throttle runs queries '
+            'before it can reject anything.',
+            hint='Use FileBasedCache or Redis for it.',
+            id='accounts.W002',
+        )]
+    return []
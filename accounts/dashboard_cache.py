@@ -0,0 +1,144 @@
+"""
+Per-user cache of the student, teacher and principal dashboard contexts.
+
+A cached context is keyed by role, user, class and date, plus the current
+version of every *scope* its data depends on:
+
+    class:<class>     homework and leaderboard of one class
+    student:<id>      one student's answers
+    teacher:<id>      homework uploaded by one teacher
+    school-homework   school-wide homework counts
+    school-answers    school-wide answer statistics
+    users             user counts and the teacher salary ranking
+
+Writers bump the scopes they touch (see accounts/signals.py, and the bulk
+paths that bypass signals), which makes every key built from the old
+version unreachable. A new question for 9th therefore only invalidates 9th
+class student dashboards, its teacher's dashboard and the principal's.
+Bumps made by the grading worker and management commands only reach the
+web processes through a cache they all share (settings.CACHES; a
+local-memory cache triggers the accounts.W001 system check).
+"""
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _version_key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def bump(*scopes):
+    """Invalidate every cached dashboard that depends on one of ``scopes``."""
+    for scope in set(scopes):
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            # Unknown (never read or evicted) - nothing cached against it can be current.
+            cache.set(_version_key(scope), _new_version(), None)
+
+
+def answers_changed(student_ids, classes):
+    """Bump the scopes affected by answers of ``student_ids`` in ``classes`` changing."""
+    bump('school-answers', *(f'student:{student_id}' for student_id in student_ids),
+         *(f'class:{user_class}' for user_class in classes))
+
+
+def homework_changed(teacher_ids, classes):
+    bump('school-homework', *(f'teacher:{teacher_id}' for teacher_id in teacher_ids),
+         *(f'class:{question_class}' for question_class in classes))
+
+
+def stats():
+    """In-process hit/miss counters."""
+    lookups = _stats['hits'] + _stats['misses']
+    return dict(_stats, hit_ratio=_stats['hits'] / lookups if lookups else 0.0)
+
+
+def student_context(user, builder):
+    return _cached(user, [f'class:{user.user_class}', f'student:{user.id}'], lambda: builder(user))
+
+
+def teacher_context(user, builder):
+    return _cached(user, [f'teacher:{user.id}', 'school-answers', 'users'], lambda: builder(user))
+
+
+def principal_context(builder, start=None, end=None):
+    # The principal dashboard is the same for every principal; only the date range varies.
+    return _cached(None, ['school-homework', 'school-answers', 'users'], lambda: builder(start, end),
+                   variant=f'{start}:{end}')
+
+
+async def astudent_context(user, abuilder):
+    return await _acached(user, [f'class:{user.user_class}', f'student:{user.id}'], lambda: abuilder(user))
+
+
+async def ateacher_context(user, abuilder):
+    return await _acached(user, [f'teacher:{user.id}', 'school-answers', 'users'], lambda: abuilder(user))
+
+
+async def aprincipal_context(abuilder, start=None, end=None):
+    return await _acached(None, ['school-homework', 'school-answers', 'users'], lambda: abuilder(start, end),
+                          variant=f'{start}:{end}')
+
+
+def _new_version():
+    # Time based, so a version key that was evicted never restarts at a value
+    # an older cached context could still be stored under.
+    return int(time.time() * 1000)
+
+
+def _versions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+async def _aversions(scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _new_version(), None)
+            versions[key] = await cache.aget(key)
+    return [str(versions[key]) for key in keys]
+
+
+def _context_key(user, variant, versions):
+    if user is None:
+        owner = 'principal'
+    else:
+        owner = f'{user.role}:{user.id}:{user.user_class}'
+    return f"dashboard:{owner}:{variant}:{date.today().isoformat()}:{'.'.join(versions)}"
+
+
+def _cached(user, scopes, builder, variant=''):
+    key = _context_key(user, variant, _versions(scopes))
+    context = cache.get(key)
+    if context is not None:
+        _stats['hits'] += 1
+        return context
+    _stats['misses'] += 1
+    context = builder()
+    cache.set(key, context, settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
+
+
+async def _acached(user, scopes, abuilder, variant=''):
+    key = _context_key(user, variant, await _aversions(scopes))
+    context = await cache.aget(key)
+    if context is not None:
+        _stats['hits'] += 1
+        return context
+    _stats['misses'] += 1
+    context = await abuilder()
+    await cache.aset(key, context, settings.DASHBOARD_CACHE_TIMEOUT)
+    return context
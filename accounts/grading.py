@@ -0,0 +1,138 @@
+"""
+Auto-grading helpers.
+
+Each HomeworkQuestion stores a vector of its model answer (see
+``vectorize_text``), computed once when the question is saved by the
+question's grading backend (accounts/grading_backends.py; TF-IDF cosine by
+default). Grading a submission is then a single tokenise + comparison
+against that stored vector, instead of fitting a new TfidfVectorizer on
+every POST. Text is split by accounts/tokenizer.py, which handles Hindi and
+mixed-script answers. A stale stored vector (older VECTOR_VERSION, edited
+text, or a changed analyzer or backend) is rebuilt once per process and
+kept in a small LRU cache keyed by question id and content hash.
+
+NumPy/SciPy are only needed for batch scoring, so they are imported lazily
+to keep web workers small; call ``warm_up()`` to load them ahead of time.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import tokenizer
+from .grading_backends import backend_name_for, get_backend
+from .instrumentation import timed
+
+# 2: Unicode-normalising, Devanagari-aware tokenizer with per-subject analyzers
+VECTOR_VERSION = 2
+
+_vector_cache = OrderedDict()
+_vector_cache_lock = threading.Lock()
+
+
+def tokenize(text, analyzer=None):
+    return tokenizer.tokenize(text, **(analyzer or {}))
+
+
+def text_digest(text):
+    return hashlib.md5((text or '').encode('utf-8')).hexdigest()
+
+
+def vectorize_text(text, subject=None, backend=None):
+    """Model answer vector stored on HomeworkQuestion, built by ``backend`` (else the subject's)."""
+    analyzer = tokenizer.analyzer_for(subject)
+    backend = get_backend(backend or backend_name_for(subject))
+    return {
+        'version': VECTOR_VERSION,
+        'digest': text_digest(text),
+        'analyzer': analyzer,
+        'backend': backend.name,
+        **backend.vectorize(text, analyzer),
+    }
+
+
+def question_vector(question):
+    """Return the stored vector of a question, or a rebuilt one if it is stale."""
+    vector = question.model_answer_vector
+    digest = text_digest(question.model_answer)
+    analyzer = tokenizer.analyzer_for(question.subject)
+    backend = backend_name_for(question.subject, question.grading_backend)
+    if (vector and vector.get('version') == VECTOR_VERSION and vector.get('digest') == digest
+            and vector.get('analyzer', {}) == analyzer and vector.get('backend', 'tfidf') == backend):
+        return vector
+    return _cached_vector(
+        (question.pk, digest, repr(analyzer), backend), question.model_answer, question.subject, backend
+    )
+
+
+def _cached_vector(key, text, subject, backend=None):
+    # Vectors are shared between callers: never mutate one
+    with _vector_cache_lock:
+        vector = _vector_cache.get(key)
+        if vector is not None:
+            _vector_cache.move_to_end(key)
+            return vector
+    vector = vectorize_text(text, subject, backend)
+    with _vector_cache_lock:
+        _vector_cache[key] = vector
+        while len(_vector_cache) > settings.GRADING_VECTOR_CACHE_SIZE:
+            _vector_cache.popitem(last=False)
+    return vector
+
+
+def vector_key(vector):
+    """Vectors with equal keys score every answer identically."""
+    return vector['digest'], repr(vector.get('analyzer', {})), vector.get('backend', 'tfidf')
+
+
+def score_against_vector(vector, answer_text):
+    """Similarity (0-100) between an answer and a stored model vector, by the vector's backend."""
+    return get_backend(vector.get('backend', 'tfidf')).score(vector, answer_text)
+
+
+@timed('grading')
+def score_batch(vector, answer_texts):
+    """
+    Score many answers to the same question at once; returns the
+    similarities in the order of ``answer_texts``. The TF-IDF backend
+    scores the whole batch with a few vectorised NumPy operations.
+    """
+    return get_backend(vector.get('backend', 'tfidf')).score_batch(vector, answer_texts)
+
+
+@timed('grading')
+def get_text_similarity(text1, text2, subject=None):
+    if not text1 or not text2:
+        return 0.0
+    model_vector = _cached_vector((None, text_digest(text2), subject, None), text2, subject)
+    return score_against_vector(model_vector, text1)
+
+
+def get_grade_from_similarity(percentage):
+    if percentage >= 95: return 5  # Outstanding
+    elif percentage >= 80: return 4  # Very Good
+    elif percentage >= 60: return 3  # Good
+    elif percentage >= 40: return 2  # Average
+    else: return 1  # Needs Improvement
+
+
+@timed('grading')
+def grade_answer(question, answer_text):
+    """Return ``(similarity, grade)`` for a submission to ``question``."""
+    similarity = score_against_vector(question_vector(question), answer_text)
+    return similarity, get_grade_from_similarity(similarity)
+
+
+def grading_result(similarity, grade_score):
+    """Return the ``(marks, remarks)`` stored on a StudentAnswer for a grade."""
+    if grade_score >= 3: # Good, Very Good, or Outstanding
+        remark = "Good! Try for better performance next time." if grade_score == 3 else f"Auto-Graded: Excellent! ({similarity:.2f}%)"
+        return grade_score, remark
+    # Needs Improvement or Average (auto-return)
+    return None, f"Auto-Remark: Your answer was {similarity:.2f}% correct. Please review and improve it."
+
+
+def warm_up():
+    """Import the batch-scoring stack and run one tiny batch through it."""
+    score_batch(vectorize_text('warm up'), ['warm up'])
@@ -0,0 +1,229 @@
+"""
+Grading backends: how a model answer is stored and an answer scored against it.
+
+A backend turns a model answer into a JSON-serialisable representation
+(stored in HomeworkQuestion.model_answer_vector by ``grading.vectorize_text``)
+and scores an answer against it as a similarity from 0 to 100, which
+``grading.get_grade_from_similarity`` turns into marks. The backend is chosen
+per question (HomeworkQuestion.grading_backend), else per subject
+(settings.GRADING_BACKENDS), else settings.GRADING_DEFAULT_BACKEND. Its name
+is stored in the vector, so scoring an answer never reads settings.
+Building a vector does (``grading.vectorize_text``, also called by the
+warm-up of grading pool processes, which load the same settings module).
+
+tfidf          Term counts; the cosine TfidfVectorizer gives for the pair.
+hashed_ngram   Word 1- and 2-grams hashed into a fixed number of buckets: no
+               vocabulary, and bigrams reward the right word order.
+minhash        MinHash signature of 5-character shingles: a fixed-size
+               vector and a constant-time comparison, for near-duplicates.
+
+``manage.py bench_grading_backends`` compares their speed, memory and
+agreement with teachers' marks (StudentAnswer.auto_graded is False) on
+existing answers.
+"""
+import hashlib
+import math
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import tokenizer
+
+
+def _tokens(text, analyzer):
+    return tokenizer.tokenize(text, **(analyzer or {}))
+
+
+class GradingBackend:
+    """Subclasses set ``name`` and ``label`` and implement ``vectorize`` and ``score``."""
+    name = None
+    label = None
+
+    def vectorize(self, text, analyzer):
+        """JSON-serialisable representation of a model answer."""
+        raise NotImplementedError
+
+    def score(self, vector, answer_text):
+        """Similarity (0-100) between an answer and a vector from ``vectorize``."""
+        raise NotImplementedError
+
+    def score_batch(self, vector, answer_texts):
+        return [self.score(vector, text) for text in answer_texts]
+
+
+class TfidfBackend(GradingBackend):
+    """
+    Reproduces ``TfidfVectorizer().fit_transform([answer, model])`` followed
+    by ``cosine_similarity``. With two documents and ``smooth_idf=True``, a
+    shared term has idf 1. A term found in only one of the two documents has
+    idf ``ln(3/2) + 1``.
+    """
+    name = 'tfidf'
+    label = 'TF-IDF cosine'
+
+    UNSHARED_IDF_SQUARED = (math.log(1.5) + 1.0) ** 2
+
+    def vectorize(self, text, analyzer):
+        terms = dict(Counter(_tokens(text, analyzer)))
+        return {'terms': terms, 'sq_norm': sum(count * count for count in terms.values())}
+
+    def score(self, vector, answer_text):
+        model_terms = vector['terms']
+        answer_terms = Counter(_tokens(answer_text, vector.get('analyzer')))
+        if not model_terms or not answer_terms:
+            return 0.0
+
+        dot = shared_model_sq = shared_answer_sq = 0
+        for term, count in answer_terms.items():
+            model_count = model_terms.get(term)
+            if model_count:
+                dot += count * model_count
+                shared_model_sq += model_count * model_count
+                shared_answer_sq += count * count
+        if not dot:
+            return 0.0
+
+        answer_sq = sum(count * count for count in answer_terms.values())
+        unshared = self.UNSHARED_IDF_SQUARED
+        model_norm = math.sqrt(shared_model_sq + unshared * (vector['sq_norm'] - shared_model_sq))
+        answer_norm = math.sqrt(shared_answer_sq + unshared * (answer_sq - shared_answer_sq))
+        return dot / (model_norm * answer_norm) * 100
+
+    def score_batch(self, vector, answer_texts):
+        """
+        Builds one sparse (answers x model vocabulary) count matrix and computes
+        every cosine in a handful of vectorised operations.
+        """
+        import numpy as np
+        from scipy import sparse
+
+        model_terms = vector['terms']
+        answer_count = len(answer_texts)
+        if not model_terms or not answer_count:
+            return np.zeros(answer_count)
+
+        vocabulary = {term: index for index, term in enumerate(model_terms)}
+        model_counts = np.fromiter(model_terms.values(), dtype=float, count=len(model_terms))
+
+        rows, cols, data = [], [], []
+        answer_sq = np.zeros(answer_count)
+        analyzer = vector.get('analyzer')
+        for row, text in enumerate(answer_texts):
+            counts = Counter(_tokens(text, analyzer))
+            answer_sq[row] = sum(count * count for count in counts.values())
+            for term, count in counts.items():
+                col = vocabulary.get(term)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    data.append(count)
+        shared = sparse.csr_matrix((data, (rows, cols)), shape=(answer_count, len(vocabulary)), dtype=float)
+
+        dot = shared @ model_counts
+        shared_answer_sq = np.asarray(shared.multiply(shared).sum(axis=1)).ravel()
+        shared_model_sq = (shared > 0).astype(float) @ (model_counts * model_counts)
+
+        unshared = self.UNSHARED_IDF_SQUARED
+        model_norm = np.sqrt(shared_model_sq + unshared * (vector['sq_norm'] - shared_model_sq))
+        answer_norm = np.sqrt(shared_answer_sq + unshared * (answer_sq - shared_answer_sq))
+        scores = np.zeros(answer_count)
+        matched = dot > 0
+        scores[matched] = dot[matched] / (model_norm[matched] * answer_norm[matched]) * 100
+        return scores
+
+
+class HashedNgramBackend(GradingBackend):
+    """Cosine of word 1- and 2-gram counts, hashed (CRC-32) into ``BUCKETS`` buckets."""
+    name = 'hashed_ngram'
+    label = 'Hashed word n-grams'
+
+    BUCKETS = 2 ** 20
+
+    def features(self, text, analyzer):
+        tokens = _tokens(text, analyzer)
+        grams = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+        # JSON object keys are strings, so buckets are kept as strings throughout
+        return Counter(str(zlib.crc32(gram.encode('utf-8')) % self.BUCKETS) for gram in grams)
+
+    def vectorize(self, text, analyzer):
+        buckets = dict(self.features(text, analyzer))
+        return {'buckets': buckets, 'sq_norm': sum(count * count for count in buckets.values())}
+
+    def score(self, vector, answer_text):
+        model_buckets = vector['buckets']
+        answer_buckets = self.features(answer_text, vector.get('analyzer'))
+        if not model_buckets or not answer_buckets:
+            return 0.0
+        dot = sum(count * model_buckets.get(bucket, 0) for bucket, count in answer_buckets.items())
+        answer_sq = sum(count * count for count in answer_buckets.values())
+        return dot / math.sqrt(vector['sq_norm'] * answer_sq) * 100
+
+
+def _hash_parameters(count):
+    # Derived from fixed strings, so stored signatures stay valid across processes and releases.
+    # Below 2**31, so a * hash + b (hash < 2**32) never overflows 64 bits.
+    return [
+        [(int.from_bytes(hashlib.blake2b(f'{kind}{i}'.encode(), digest_size=4).digest(), 'big') >> 1) | 1
+         for i in range(count)]
+        for kind in 'ab'
+    ]
+
+
+class MinHashBackend(GradingBackend):
+    """
+    Estimates the Jaccard similarity J of the two texts' 5-character shingle
+    sets from ``PERMUTATIONS`` min-hashes, and reports the Dice coefficient
+    2J / (1 + J), which is on the same scale as a cosine of sets.
+    """
+    name = 'minhash'
+    label = 'Character shingles (MinHash)'
+
+    SHINGLE = 5
+    PERMUTATIONS = 64
+    PRIME = 4294967311  # first prime above 2**32
+    _PARAMETERS = _hash_parameters(PERMUTATIONS)
+    _arrays = None  # the parameters as NumPy columns, built on first use
+
+    def signature(self, text, analyzer):
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = tuple(np.array(values, dtype=np.uint64)[:, None] for values in self._PARAMETERS)
+
+        joined = ' '.join(_tokens(text, analyzer))
+        if not joined:
+            return []
+        shingles = {joined[i:i + self.SHINGLE] for i in range(max(1, len(joined) - self.SHINGLE + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        a, b = self._arrays
+        return ((a * hashes + b) % np.uint64(self.PRIME)).min(axis=1).tolist()
+
+    def vectorize(self, text, analyzer):
+        return {'signature': self.signature(text, analyzer)}
+
+    def score(self, vector, answer_text):
+        model_signature = vector['signature']
+        answer_signature = self.signature(answer_text, vector.get('analyzer'))
+        if not model_signature or not answer_signature:
+            return 0.0
+        jaccard = sum(m == a for m, a in zip(model_signature, answer_signature)) / self.PERMUTATIONS
+        return 2 * jaccard / (1 + jaccard) * 100
+
+
+BACKENDS = {backend.name: backend for backend in (TfidfBackend(), HashedNgramBackend(), MinHashBackend())}
+CHOICES = [(name, backend.label) for name, backend in BACKENDS.items()]
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown grading backend {name!r}; choose from {", ".join(BACKENDS)}.')
+
+
+def backend_name_for(subject, question_backend=''):
+    """The backend a question uses: its own choice, else its subject's, else the default."""
+    return question_backend or settings.GRADING_BACKENDS.get(subject, settings.GRADING_DEFAULT_BACKEND)
@@ -0,0 +1,240 @@
+"""
+Process pool that grades answers outside the web process.
+
+Scoring is pure Python CPU work: run on a web worker's threads it holds the
+GIL and slows every other request the worker is serving. With
+GRADING_POOL_SIZE > 0 each web process starts that many grading processes
+when it receives its first request (any request, see AccountsConfig.ready),
+so management commands, the test runner and a ``gunicorn --preload`` master
+never start a pool they would not use. Each grading process imports
+NumPy/SciPy and scores a warm-up batch once, in the background, so answers
+submitted after a page or two never wait for process start-up or imports.
+
+A dispatcher thread collects submissions for up to GRADING_BATCH_WINDOW_MS
+(or GRADING_BATCH_MAX pairs) and sends them to the pool as one task of
+``(answer text, model answer vector)`` pairs, amortising the pickling
+round trip. Answers to the same question within a batch are scored
+together with ``score_batch``. The stored vector is sent rather than the
+model answer text, so workers never re-tokenise it. ``stats()`` reports
+queue depth and per-batch latency for the metrics view.
+
+With GRADING_POOL_SIZE = 0 (the default) answers are graded in-process as
+before. Workers are spawned, not forked, so they share no database
+connections or threads with the web process.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import grading
+from .benchmarking import percentile
+from .instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# Owned by one process: a pool inherited through fork (e.g. gunicorn --preload) is replaced
+_state = {'pid': None, 'executor': None, 'queue': None}
+_stats = {'waiting': 0, 'in_flight': 0, 'batches': 0, 'pairs': 0, 'failures': 0}
+_batch_seconds = deque(maxlen=1000)
+
+
+# --- Worker processes ---
+def _init_worker():
+    grading.warm_up()
+
+
+def _ping():
+    return os.getpid()
+
+
+def score_pairs(pairs):
+    """Similarity (0-100) of every ``(answer_text, model_vector)`` pair, in order."""
+    scores = [0.0] * len(pairs)
+    by_question = {}
+    for index, (_, vector) in enumerate(pairs):
+        by_question.setdefault(grading.vector_key(vector), (vector, []))[1].append(index)
+    for vector, indexes in by_question.values():
+        if len(indexes) == 1:
+            scores[indexes[0]] = grading.score_against_vector(vector, pairs[indexes[0]][0])
+        else:
+            batch = grading.score_batch(vector, [pairs[index][0] for index in indexes])
+            for index, score in zip(indexes, batch):
+                scores[index] = float(score)
+    return scores
+
+
+# --- Web process ---
+def enabled():
+    return settings.GRADING_POOL_SIZE > 0
+
+
+def _new_executor():
+    return ProcessPoolExecutor(
+        max_workers=settings.GRADING_POOL_SIZE,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
+
+
+def start():
+    """Start this process's pool and dispatcher, and warm every worker up. Idempotent."""
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        executor = _new_executor()
+        pending = queue.SimpleQueue()
+        _state.update(pid=os.getpid(), executor=executor, queue=pending)
+    threading.Thread(target=_dispatch, args=(pending,), name='grading-dispatcher', daemon=True).start()
+    # One task per worker, so they all start (and run the warm-up initializer) now
+    for _ in range(settings.GRADING_POOL_SIZE):
+        executor.submit(_ping)
+
+
+def start_on_request(sender, **kwargs):
+    """``request_started`` receiver: start this process's pool on its first request."""
+    if _state['pid'] != os.getpid() and enabled():
+        start()
+
+
+def shutdown():
+    """Stop the pool; the next submission starts a new one."""
+    with _lock:
+        executor, pending = _state['executor'], _state['queue']
+        _state.update(pid=None, executor=None, queue=None)
+    if pending is not None:
+        pending.put(None)
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def submit(answer_text, vector):
+    """Queue one answer; returns a Future of its similarity (0-100)."""
+    start()
+    future = Future()
+    with _lock:
+        _stats['waiting'] += 1
+        _state['queue'].put((answer_text, vector, future))
+    return future
+
+
+def _dispatch(pending):
+    window = settings.GRADING_BATCH_WINDOW_MS / 1000
+    while True:
+        item = pending.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = time.monotonic() + window
+        while len(batch) < settings.GRADING_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                pending.put(None)  # stop after sending this batch
+                break
+            batch.append(item)
+        _send(batch)
+
+
+def _send(batch):
+    pairs = [(answer_text, vector) for answer_text, vector, _ in batch]
+    with _lock:
+        _stats['waiting'] -= len(batch)
+        _stats['in_flight'] += len(batch)
+        executor = _state['executor']
+    started = time.perf_counter()
+    try:
+        if executor is None:
+            raise RuntimeError('The grading pool is shut down')
+        task = executor.submit(score_pairs, pairs)
+    except (BrokenProcessPool, RuntimeError) as exc:
+        task = Future()
+        task.set_exception(exc)
+    task.add_done_callback(lambda task: _resolve(batch, pairs, task, started, executor))
+
+
+def _resolve(batch, pairs, task, started, executor):
+    try:
+        try:
+            scores = task.result()
+        except (BrokenProcessPool, RuntimeError):
+            # A worker died (or the pool was shut down under us): replace the pool and
+            # grade this batch here, so the students waiting on it still get marks.
+            broken = None
+            with _lock:
+                _stats['failures'] += 1
+                # Other batches sent to the same pool fail too; replace it (and log) only once
+                if _state['pid'] == os.getpid() and _state['executor'] is executor:
+                    broken, _state['executor'] = executor, _new_executor()
+            if broken is not None:
+                logger.exception('Grading pool failed; replaced it, grading its batches in-process')
+                broken.shutdown(wait=False, cancel_futures=True)
+            scores = score_pairs(pairs)
+    except Exception as exc:
+        scores = None
+        for _, _, future in batch:
+            future.set_exception(exc)
+
+    with _lock:
+        _stats['in_flight'] -= len(batch)
+        _stats['batches'] += 1
+        _stats['pairs'] += len(batch)
+        _batch_seconds.append(time.perf_counter() - started)
+    if scores is not None:
+        for (_, _, future), score in zip(batch, scores):
+            future.set_result(score)
+
+
+def stats():
+    """Pool size, queue depth (waiting for a batch + in the pool) and per-batch latency."""
+    with _lock:
+        report = dict(_stats, size=settings.GRADING_POOL_SIZE if _state['executor'] else 0)
+        latencies = list(_batch_seconds)
+    report['queue_depth'] = report['waiting'] + report['in_flight']
+    report['avg_batch_size'] = report['pairs'] / report['batches'] if report['batches'] else 0.0
+    if latencies:
+        report.update({
+            f'batch_p{q}_ms': percentile(latencies, q) * 1000 for q in (50, 95, 99)
+        }, batch_max_ms=max(latencies) * 1000)
+    return report
+
+
+@timed('grading')
+def _wait(future):
+    return future.result()
+
+
+@timed('grading')
+async def _await(future):
+    return await asyncio.wrap_future(future)
+
+
+def grade(question, answer_text):
+    """``grading.grade_answer`` through the pool when it is enabled."""
+    if not enabled():
+        return grading.grade_answer(question, answer_text)
+    similarity = _wait(submit(answer_text, grading.question_vector(question)))
+    return similarity, grading.get_grade_from_similarity(similarity)
+
+
+async def agrade(question, answer_text):
+    """Async ``grade``: never blocks the event loop, with or without the pool."""
+    if not enabled():
+        return await sync_to_async(grading.grade_answer, thread_sensitive=False)(question, answer_text)
+    similarity = await _await(submit(answer_text, grading.question_vector(question)))
+    return similarity, grading.get_grade_from_similarity(similarity)
@@ -0,0 +1,146 @@
+"""
+Database-backed grading queue.
+
+With ``GRADING_MODE = 'queue'`` answer_view stores a submission with
+``attempt_status = ATTEMPT_PENDING_GRADING`` and returns immediately. Worker
+processes started by ``manage.py grading_worker`` claim pending rows in
+batches (``ATTEMPT_GRADING``, tagged with a claim token and time), score
+each question's answers with ``grading.score_batch`` and write the marks
+back to the rows they still hold. No broker is needed; the queue is the
+StudentAnswer table itself.
+"""
+import logging
+import time
+import uuid
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import dashboard_cache, leaderboard
+from .grading import get_grade_from_similarity, grading_result, question_vector, score_batch
+from .models import HomeworkQuestion, StudentAnswer
+
+logger = logging.getLogger(__name__)
+
+# A claim older than this belongs to a worker that died
+STALE_CLAIM = timedelta(minutes=10)
+
+
+def submit_for_grading(student, question, answer_text, previous_answer=None):
+    """Store ``answer_text`` as pending grading, reusing the previous ungraded attempt."""
+    today = timezone.now().date()
+    if previous_answer is not None:
+        # A row already claimed by a worker is replaced instead of updated;
+        # the worker only writes (and credits) rows it still holds.
+        updated = (
+            StudentAnswer.objects.filter(id=previous_answer.id)
+            .exclude(attempt_status=StudentAnswer.ATTEMPT_GRADING)
+            .update(answer=answer_text, date=today, remarks=None, updated_at=timezone.now(),
+                    attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING)
+        )
+        if updated:
+            # .update() sends no post_save, so invalidate the dashboard here
+            dashboard_cache.answers_changed([student.id], [question.question_class])
+            return
+        previous_answer.delete()
+    StudentAnswer.objects.create(
+        student=student, question=question, date=today, answer=answer_text,
+        marks=None, remarks=None, attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING,
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Mark up to ``batch_size`` pending answers as being graded. Returns the
+    claim token and the ids claimed with it, which can be fewer than were
+    pending: without SKIP LOCKED (SQLite) another worker may take some first.
+    """
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        pending = StudentAnswer.objects.filter(attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        ids = list(pending.values_list('id', flat=True)[:batch_size])
+        if ids:
+            StudentAnswer.objects.filter(
+                id__in=ids, attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING
+            ).update(attempt_status=StudentAnswer.ATTEMPT_GRADING, claimed_by=token, claimed_at=timezone.now())
+            ids = list(StudentAnswer.objects.filter(id__in=ids, claimed_by=token).values_list('id', flat=True))
+    return token, ids
+
+
+def grade_batch(token, answer_ids):
+    """Grade the answers claimed with ``token``, one vectorised batch per question. Returns the count graded."""
+    held = StudentAnswer.objects.filter(claimed_by=token, attempt_status=StudentAnswer.ATTEMPT_GRADING)
+    rows = list(
+        held.filter(id__in=answer_ids)
+        .order_by('question_id', 'id')
+        .values_list('id', 'question_id', 'answer', 'student_id')
+    )
+    questions = HomeworkQuestion.objects.only(
+        'id', 'subject', 'question_class', 'model_answer', 'model_answer_vector', 'grading_backend'
+    ).in_bulk(
+        {row[1] for row in rows}
+    )
+
+    updates = []
+    mark_changes = {}
+    now = timezone.now()
+    for question_id, group in groupby(rows, key=lambda row: row[1]):
+        group = list(group)
+        question = questions[question_id]
+        scores = score_batch(question_vector(question), [row[2] for row in group])
+        for (answer_id, _, _, student_id), similarity in zip(group, scores):
+            marks, remarks = grading_result(similarity, get_grade_from_similarity(similarity))
+            updates.append(StudentAnswer(
+                id=answer_id, marks=marks, remarks=remarks, attempt_status=StudentAnswer.ATTEMPT_GRADED,
+                auto_graded=True, updated_at=now,
+            ))
+            mark_changes[answer_id] = (student_id, question.subject, None, marks)
+
+    with transaction.atomic():
+        # Only rows still held: a resubmission may have deleted one meanwhile, or a
+        # requeue handed it to another worker. After the write those rows stay
+        # locked until commit, so the ones written are exactly the ones credited.
+        held.bulk_update(updates, ['marks', 'remarks', 'attempt_status', 'auto_graded', 'updated_at'])
+        written = set(
+            StudentAnswer.objects.filter(claimed_by=token, attempt_status=StudentAnswer.ATTEMPT_GRADED,
+                                         id__in=mark_changes).values_list('id', flat=True)
+        )
+        leaderboard.record_mark_changes([change for answer_id, change in mark_changes.items() if answer_id in written])
+    dashboard_cache.answers_changed({row[3] for row in rows}, {q.question_class for q in questions.values()})
+    return len(written)
+
+
+def requeue_stuck(older_than=STALE_CLAIM):
+    """Put answers claimed more than ``older_than`` ago, by a worker that died, back into the queue."""
+    stale = Q(claimed_at__lt=timezone.now() - older_than) | Q(claimed_at__isnull=True)
+    return StudentAnswer.objects.filter(stale, attempt_status=StudentAnswer.ATTEMPT_GRADING).update(
+        attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING
+    )
+
+
+def run_worker(batch_size=100, poll_interval=1.0, once=False, log=logger.info):
+    """
+    Claim and grade batches until the queue is empty (``once``) or forever.
+    A long-running worker also requeues stale claims every STALE_CLAIM / 2.
+    """
+    next_requeue = time.monotonic() + STALE_CLAIM.total_seconds() / 2
+    while True:
+        if not once and time.monotonic() >= next_requeue:
+            requeued = requeue_stuck()
+            if requeued:
+                log(f"Re-queued {requeued} answers left by a stopped worker")
+            next_requeue = time.monotonic() + STALE_CLAIM.total_seconds() / 2
+        token, ids = claim_batch(batch_size)
+        if ids:
+            started = time.perf_counter()
+            graded = grade_batch(token, ids)
+            log(f"Graded {graded} answers in {time.perf_counter() - started:.3f}s")
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,65 @@
+"""
+Password hashers.
+
+Accounts created before the switch to Django's auth framework store an
+unsalted SHA-256 hex digest. Migration 0008 prefixes those with
+``legacy_sha256$$`` so ``LegacySHA256PasswordHasher`` can verify them; since
+it is not the first entry of PASSWORD_HASHERS, Django rehashes the password
+with the preferred hasher on the user's next successful login.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, PBKDF2PasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+LEGACY_HEX_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the work factor taken from settings.PASSWORD_PBKDF2_ITERATIONS."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+
+
+class LegacySHA256PasswordHasher(BasePasswordHasher):
+    """Verifies the old unsalted ``sha256(password).hexdigest()`` hashes. Never used to set passwords."""
+
+    algorithm = 'legacy_sha256'
+
+    def salt(self):
+        return ''
+
+    def encode(self, password, salt):
+        if salt != '':
+            raise ValueError('salt must be empty.')
+        return f'{self.algorithm}$${hashlib.sha256(password.encode()).hexdigest()}'
+
+    def decode(self, encoded):
+        algorithm, salt, hash = encoded.split('$', 2)
+        assert algorithm == self.algorithm
+        return {'algorithm': algorithm, 'hash': hash, 'salt': None}
+
+    def verify(self, password, encoded):
+        return constant_time_compare(encoded, self.encode(password, ''))
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {_('algorithm'): decoded['algorithm'], _('hash'): mask_hash(decoded['hash'])}
+
+    def must_update(self, encoded):
+        return True
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+def wrap_legacy_hash(password):
+    """Turn a bare legacy SHA-256 hex digest into a ``legacy_sha256`` encoded password."""
+    if isinstance(password, str) and LEGACY_HEX_DIGEST.match(password):
+        return f'{LegacySHA256PasswordHasher.algorithm}$${password}'
+    return password
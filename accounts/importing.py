@@ -0,0 +1,90 @@
+"""
+Shared helpers for the spreadsheet import commands.
+
+Rows come either from a Google Sheet (through gspread) or from a local
+CSV/XLSX export of the same sheet, so the imports can be run and tested
+offline. gspread and the Google auth libraries are only imported when a
+sheet is actually read.
+"""
+from datetime import date
+
+import pandas as pd
+
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+SHEET_DATE_FORMAT = '%d-%m-%Y'
+
+
+def open_sheet(sheet_id, service_account_file):
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_file(service_account_file, scopes=SHEETS_SCOPES)
+    client = gspread.authorize(creds)
+    return client.open_by_key(sheet_id).sheet1
+
+
+def read_table(path=None, sheet_id=None, service_account_file=None):
+    """
+    Load a sheet as a DataFrame of strings (empty cells are ``''``) from a
+    CSV/XLSX file when ``path`` is given, otherwise from the Google Sheet.
+    """
+    if path:
+        if path.lower().endswith(('.xlsx', '.xls')):
+            frame = excel_cells_to_strings(pd.read_excel(path, dtype=object))
+        else:
+            frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        frame = pd.DataFrame(open_sheet(sheet_id, service_account_file).get_all_records())
+    return frame.fillna('').astype(str)
+
+
+def iter_table_chunks(path=None, sheet_id=None, service_account_file=None, chunk_size=1000):
+    """
+    Like ``read_table`` but yields DataFrames of at most ``chunk_size`` rows,
+    so memory stays flat however long the sheet is. CSV files and Google
+    Sheets are paged; XLSX files cannot be streamed and are sliced after loading.
+    """
+    if path and not path.lower().endswith(('.xlsx', '.xls')):
+        for frame in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+            yield frame.fillna('').astype(str)
+    elif path:
+        frame = read_table(path)
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size]
+    else:
+        sheet = open_sheet(sheet_id, service_account_file)
+        header = sheet.row_values(1)
+        start = 2
+        while True:
+            rows = sheet.get_values(f'{start}:{start + chunk_size - 1}')
+            if not rows:
+                return
+            # The Sheets API trims trailing empty cells
+            rows = [row + [''] * (len(header) - len(row)) for row in rows]
+            yield pd.DataFrame(rows, columns=header).fillna('').astype(str)
+            start += chunk_size
+
+
+def excel_cells_to_strings(frame):
+    """
+    Cells of a sheet read with ``dtype=object`` as the strings a CSV export
+    has. Date cells come back as datetimes, which ``dtype=str`` would turn into
+    ``yyyy-mm-dd 00:00:00``; they are written in SHEET_DATE_FORMAT instead.
+    """
+    def to_string(value):
+        if isinstance(value, date):  # also datetime and pandas Timestamp
+            return value.strftime(SHEET_DATE_FORMAT)
+        return '' if pd.isna(value) else str(value)
+    return frame.map(to_string)
+
+
+def parse_dates(column):
+    """Vectorised ``dd-mm-yyyy`` parsing; unparseable cells become ``None``."""
+    parsed = pd.to_datetime(column.str.strip(), format=SHEET_DATE_FORMAT, errors='coerce')
+    return parsed.dt.date.astype(object).where(parsed.notna(), None).tolist()
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
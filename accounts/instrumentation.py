@@ -0,0 +1,217 @@
+"""
+Per-view request metrics.
+
+``RequestMetricsMiddleware`` times every request and records, per URL name:
+the number of SQL queries and the time spent in them (through an execute
+wrapper installed on every database connection, so queries the async views
+run on worker threads count too), the time spent grading and rendering
+templates (the ``timed`` phases below), and the total wall time. Totals and
+a latency histogram are kept in process memory; ``snapshot()`` returns them
+for the staff-only metrics view. Responses to staff also carry a
+``Server-Timing`` header with their own numbers; other clients never see
+query counts or timings, which could help timing and enumeration attacks on
+the login and password-reset forms. The header is only added when the view
+already loaded ``request.user``: loading it afterwards would cost session and
+user queries that the metrics never count.
+
+The cost per request is a few ``perf_counter`` calls and one dict update
+under a lock, so it is meant to stay on in production. Metrics are per
+worker process and reset when it restarts.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.functional import LazyObject
+from django.shortcuts import render as _render
+
+# Upper bounds (ms) of the wall-time histogram buckets; the last one is open
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+PHASES = ('sql', 'grading', 'template')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_views = {}
+
+
+def timed(phase):
+    """Decorator adding the wall time of the wrapped call (or coroutine) to ``phase`` of the current request."""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                metrics = _current.get()
+                if metrics is None:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _add(metrics, phase, time.perf_counter() - started)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _current.get()
+            if metrics is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _add(metrics, phase, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# Drop-in for django.shortcuts.render that counts as template time
+render = timed('template')(_render)
+
+
+def _add(metrics, phase, seconds, queries=0):
+    # The async views update one request's metrics from several threads at once
+    with _lock:
+        metrics[phase] += seconds
+        metrics['queries'] += queries
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        _add(metrics, 'sql', time.perf_counter() - started, queries=1)
+
+
+@receiver(connection_created)
+def _install_sql_wrapper(sender, connection, **kwargs):
+    # Fires on every (re)connect of a connection object; install the wrapper once
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token, started = _start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so threads the view hands work to see these metrics
+        metrics, token, started = _start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, metrics, started)
+
+
+def _start():
+    metrics = dict.fromkeys(PHASES, 0.0)
+    metrics['queries'] = 0
+    return metrics, _current.set(metrics), time.perf_counter()
+
+
+def _loaded_user(request):
+    # What request.user / request.auser() resolved to during the request, without resolving it now
+    for attr in ('_cached_user', '_acached_user'):
+        if attr in request.__dict__:
+            return request.__dict__[attr]
+    user = request.__dict__.get('user')  # set by login() or logout()
+    return None if isinstance(user, LazyObject) else user
+
+
+def _finish(request, response, metrics, started):
+    total = time.perf_counter() - started
+    match = request.resolver_match
+    _record(match.view_name if match else 'unresolved', metrics, total)
+    user = _loaded_user(request) if settings.REQUEST_METRICS_SERVER_TIMING else None
+    # Same audience as the metrics view
+    if user is not None and (user.is_staff or getattr(user, 'role', None) == 'Admin'):
+        response['Server-Timing'] = ', '.join(
+            [f'{phase};dur={metrics[phase] * 1000:.1f}' for phase in PHASES]
+            + [f'total;dur={total * 1000:.1f};desc="{metrics["queries"]} queries"']
+        )
+    return response
+
+
+def _record(view_name, metrics, total):
+    total_ms = total * 1000
+    with _lock:
+        view = _views.get(view_name)
+        if view is None:
+            view = _views[view_name] = {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                **{f'{phase}_ms': 0.0 for phase in PHASES},
+                'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        view['requests'] += 1
+        view['queries'] += metrics['queries']
+        view['max_queries'] = max(view['max_queries'], metrics['queries'])
+        view['total_ms'] += total_ms
+        view['max_ms'] = max(view['max_ms'], total_ms)
+        for phase in PHASES:
+            view[f'{phase}_ms'] += metrics[phase] * 1000
+        view['buckets'][bisect_left(LATENCY_BUCKETS_MS, total_ms)] += 1
+
+
+def snapshot():
+    """Per-view averages, maxima and latency histogram (with p50/p95/p99 bucket bounds)."""
+    with _lock:
+        views = {name: dict(view, buckets=list(view['buckets'])) for name, view in _views.items()}
+
+    report = {}
+    for name, view in sorted(views.items()):
+        requests = view['requests']
+        report[name] = {
+            'requests': requests,
+            'avg_queries': view['queries'] / requests,
+            'max_queries': view['max_queries'],
+            'avg_ms': view['total_ms'] / requests,
+            'max_ms': view['max_ms'],
+            **{f'avg_{phase}_ms': view[f'{phase}_ms'] / requests for phase in PHASES},
+            'latency_histogram_ms': {
+                f'<={bound}' if bound is not None else f'>{LATENCY_BUCKETS_MS[-1]}': count
+                for bound, count in zip(LATENCY_BUCKETS_MS + (None,), view['buckets'])
+            },
+            **{f'p{q}_ms_upper_bound': _quantile_bound(view['buckets'], requests, q) for q in (50, 95, 99)},
+        }
+    return report
+
+
+def _quantile_bound(buckets, requests, quantile):
+    # Upper bound of the bucket holding the quantile; None when it is the open bucket
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS + (None,), buckets):
+        seen += count
+        if seen >= requests * quantile / 100:
+            return bound
+    return None
+
+
+def reset():
+    with _lock:
+        _views.clear()
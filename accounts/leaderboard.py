@@ -0,0 +1,240 @@
+"""
+Materialised leaderboard.
+
+StudentPerformance keeps a running marks sum/count/average per student, per
+subject and overall. Code that writes StudentAnswer.marks reports the change
+through ``record_mark_changes`` so rankings are read from those rows instead
+of averaging the whole answers table on every dashboard hit. Deleted
+answers, admin edits and questions moved to another subject are applied by
+accounts/signals.py and accounts/admin.py; `manage.py rebuild_leaderboard`
+repairs anything else that writes marks directly.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, Rank, RowNumber
+
+from .models import CustomUser, StudentAnswer, StudentPerformance
+
+OVERALL = StudentPerformance.OVERALL
+
+
+def record_mark_changes(changes):
+    """
+    Apply ``(student_id, subject, old_marks, new_marks)`` changes to the
+    running totals. ``None`` marks mean "not graded" and are not counted.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for student_id, subject, old_marks, new_marks in changes:
+        for key in ((student_id, subject), (student_id, OVERALL)):
+            if old_marks is not None:
+                deltas[key][0] -= old_marks
+                deltas[key][1] -= 1
+            if new_marks is not None:
+                deltas[key][0] += new_marks
+                deltas[key][1] += 1
+    _apply_deltas(deltas)
+
+
+def subject_changed(question_id, old_subject, new_subject):
+    """Move the graded answers of a question from ``old_subject``'s totals to ``new_subject``'s."""
+    deltas = defaultdict(lambda: [0, 0])
+    totals = (
+        StudentAnswer.objects.filter(question_id=question_id, marks__isnull=False)
+        .values('student_id').annotate(marks_sum=Sum('marks'), marks_count=Count('id')).order_by()
+    )
+    for total in totals:
+        for subject, sign in ((old_subject, -1), (new_subject, 1)):
+            deltas[total['student_id'], subject][0] += sign * total['marks_sum']
+            deltas[total['student_id'], subject][1] += sign * total['marks_count']
+    _apply_deltas(deltas)
+
+
+def _apply_deltas(deltas):
+    """Add ``{(student_id, subject): [marks_delta, count_delta]}`` to the totals."""
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        # Only a new graded answer can need a new row. Not creating rows for
+        # removals also keeps a cascade delete of the student itself consistent.
+        StudentPerformance.objects.bulk_create(
+            [StudentPerformance(student_id=student_id, subject=subject)
+             for (student_id, subject), (_, count_delta) in deltas.items() if count_delta > 0],
+            ignore_conflicts=True,
+        )
+        for (student_id, subject), (marks_delta, count_delta) in deltas.items():
+            new_count = F('marks_count') + count_delta
+            StudentPerformance.objects.filter(student_id=student_id, subject=subject).update(
+                marks_sum=F('marks_sum') + marks_delta,
+                marks_count=new_count,
+                average_marks=Case(
+                    When(marks_count__gt=-count_delta,
+                         then=Cast(F('marks_sum') + marks_delta, FloatField()) / new_count),
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                ),
+            )
+
+
+def rebuild():
+    """Recompute every StudentPerformance row from the graded answers. Returns the row count."""
+    totals = (
+        StudentAnswer.objects.filter(marks__isnull=False)
+        .values('student_id', 'question__subject')
+        .annotate(marks_sum=Sum('marks'), marks_count=Count('id'))
+        .order_by()
+    )
+    rows = []
+    overall = defaultdict(lambda: [0, 0])
+    for total in totals.iterator():
+        rows.append(_performance_row(total['student_id'], total['question__subject'],
+                                     total['marks_sum'], total['marks_count']))
+        overall[total['student_id']][0] += total['marks_sum']
+        overall[total['student_id']][1] += total['marks_count']
+    rows.extend(_performance_row(student_id, OVERALL, marks_sum, marks_count)
+                for student_id, (marks_sum, marks_count) in overall.items())
+
+    with transaction.atomic():
+        StudentPerformance.objects.all().delete()
+        StudentPerformance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _performance_row(student_id, subject, marks_sum, marks_count):
+    return StudentPerformance(
+        student_id=student_id, subject=subject, marks_sum=marks_sum, marks_count=marks_count,
+        average_marks=marks_sum / marks_count,
+    )
+
+
+# --- Rank lookups ---
+
+def _ranked_students():
+    return StudentPerformance.objects.filter(subject=OVERALL, marks_count__gt=0, student__role='Student')
+
+
+def class_top_students(user_class, limit=3):
+    top = (
+        _ranked_students().filter(student__user_class=user_class)
+        .order_by('-average_marks', 'student_id')
+        .values('student__user_name', 'average_marks')[:limit]
+    )
+    return [{'rank': i + 1, **entry} for i, entry in enumerate(top)]
+
+
+def student_rank(student):
+    """Rank of ``student`` inside their class, or None if nothing is graded yet."""
+    ahead = (
+        _ranked_students()
+        .filter(student__user_class=OuterRef('student__user_class'), average_marks__gt=OuterRef('average_marks'))
+        .order_by().values('subject').annotate(count=Count('id')).values('count')
+    )
+    mine = (
+        _ranked_students().filter(student=student)
+        .annotate(ahead=Coalesce(Subquery(ahead), 0))
+        .values('average_marks', 'ahead').first()
+    )
+    if mine is None:
+        return None
+    return {'rank': mine['ahead'] + 1, 'student__user_name': student.user_name, 'average_marks': mine['average_marks']}
+
+
+def overall_top_students(limit=3):
+    return list(
+        _ranked_students().order_by('-average_marks', 'student_id')
+        .values('student__user_name', 'student__user_class', 'average_marks')[:limit]
+    )
+
+
+def classwise_top_students(limit=3):
+    """``{class: [top students]}`` for every class."""
+    columns = ('student__user_name', 'student__user_class', 'average_marks')
+    if connection.features.supports_over_clause:
+        rows = (
+            _ranked_students()
+            .annotate(class_position=Window(
+                RowNumber(), partition_by=F('student__user_class'),
+                order_by=[F('average_marks').desc(), F('student_id').asc()],
+            ))
+            .filter(class_position__lte=limit)
+            .order_by('student__user_class', 'class_position')
+            .values(*columns)
+        )
+    else:
+        rows = _ranked_students().order_by('student__user_class', '-average_marks', 'student_id').values(*columns)
+
+    top_by_class = {}
+    for record in rows:
+        students = top_by_class.setdefault(record['student__user_class'], [])
+        if len(students) < limit:
+            students.append(record)
+    return top_by_class
+
+
+# --- Teacher salary ranking ---
+
+TEACHER_COLUMNS = ('id', 'user_name', 'salary_points')
+
+
+def _teachers():
+    return CustomUser.objects.filter(role='Teacher')
+
+
+def teacher_ranking(teacher, top=10, around=2):
+    """
+    Salary-points ranking of ``teacher``. Returns ``{'rank', 'top', 'neighbours'}``:
+    the teacher's rank (ties share a rank, None if not a teacher), the ``top``
+    best teachers and the ``around`` teachers either side of ``teacher``.
+    Entries carry their ``rank`` and 1-based ``position`` in the ranking.
+    """
+    points = teacher.salary_points
+    place = _teachers().aggregate(
+        found=Count('id', filter=Q(id=teacher.id)),
+        ahead=Count('id', filter=Q(salary_points__gt=points) | Q(salary_points=points, id__lt=teacher.id)),
+    )
+    position = place['ahead'] + 1 if place['found'] else None
+    window = (position - around, position + around) if position else None
+
+    if connection.features.supports_over_clause:
+        wanted = Q(position__lte=top)
+        if window:
+            wanted |= Q(position__range=window)
+        rows = list(
+            _teachers().annotate(
+                rank=Window(Rank(), order_by=F('salary_points').desc()),
+                position=Window(RowNumber(), order_by=[F('salary_points').desc(), F('id').asc()]),
+            )
+            .filter(wanted).order_by('position').values(*TEACHER_COLUMNS, 'rank', 'position')
+        )
+    else:
+        # No window functions (SQLite < 3.25): the same rows from ordered slices
+        rows = _ranked_slice(1, top)
+        if window:
+            rows += _ranked_slice(max(window[0], 1), window[1])
+
+    top_rows, neighbours = {}, {}
+    for row in rows:
+        if row['position'] <= top:
+            top_rows[row['position']] = row
+        if window and window[0] <= row['position'] <= window[1]:
+            neighbours[row['position']] = row
+    return {
+        'rank': neighbours[position]['rank'] if position else None,
+        'top': list(top_rows.values()),
+        'neighbours': list(neighbours.values()),
+    }
+
+
+def _ranked_slice(first, last):
+    rows = list(_teachers().order_by('-salary_points', 'id').values(*TEACHER_COLUMNS)[first - 1:last])
+    if not rows:
+        return []
+    rank = _teachers().filter(salary_points__gt=rows[0]['salary_points']).count() + 1
+    for offset, row in enumerate(rows):
+        if offset and row['salary_points'] != rows[offset - 1]['salary_points']:
+            rank = first + offset
+        row.update(rank=rank, position=first + offset)
+    return rows
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts import subscriptions
+from accounts.importing import read_table
+
+
+class Command(BaseCommand):
+    help = ('Activates students by id and/or by the payment transaction ids in a CSV/XLSX file '
+            '(e.g. a bank statement export), in one transactional UPDATE')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', default=[], help='Student ids to activate')
+        parser.add_argument('--transactions-file', help='CSV/XLSX file with a column of transaction ids')
+        parser.add_argument('--column', default='Transaction ID',
+                            help='Column holding the transaction ids (default: "Transaction ID", else the first column)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many students match')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        transaction_ids = []
+        if options['transactions_file']:
+            table = read_table(options['transactions_file'])
+            if table.empty:
+                raise CommandError('The transactions file has no rows.')
+            column = options['column'] if options['column'] in table else table.columns[0]
+            transaction_ids = table[column].tolist()
+        if not options['ids'] and not transaction_ids:
+            raise CommandError('Give --ids and/or --transactions-file.')
+
+        students = subscriptions.students_matching(options['ids'], transaction_ids)
+        if options['dry_run']:
+            matched = students.count()
+            pending = subscriptions.pending_students(students).count()
+            self.stdout.write(f'{matched} students matched, {pending} would be activated (dry run).')
+            return
+
+        matched, activated = subscriptions.activate_students(students)
+        self.stdout.write(self.style.SUCCESS(
+            f'{matched} students matched, {activated} activated, '
+            f'{matched - activated} already active or expired, in {time.perf_counter() - started:.3f}s.'
+        ))
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from accounts.benchmarking import git_revision, latency_summary
+from accounts.models import CustomUser, HomeworkQuestion
+
+ASGI_URLCONF = 'homework_project.urls_asgi'
+
+
+class Command(BaseCommand):
+    help = ('Compares the sync (WSGI) and async (ASGI, accounts/async_views.py) dashboard and answer page views '
+            'side by side on data from generate_school_data. The cache is cleared before every request, so each '
+            'dashboard is built from the database. Only reads; nothing is written except the login sessions.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help='Measured requests per scenario and view flavour')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario first')
+        parser.add_argument('--prefix', default='bench', help='Email prefix given to generate_school_data')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios(options['prefix'])
+        results = {}
+        for name, (email, path) in scenarios.items():
+            user = CustomUser.objects.get(email=email)
+            sync_client, async_client = Client(), AsyncClient()
+            sync_client.force_login(user)
+            async_client.force_login(user)
+            try:
+                sync_result = self.measure_sync(sync_client, path, options)
+                with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+                    async_result = asyncio.run(self.measure_async(async_client, path, options))
+            finally:
+                sync_client.logout()
+                async_client.logout()
+            results[name] = {'sync': sync_result, 'async': async_result}
+            self.stdout.write(
+                f"{name:>20}: sync p50 {sync_result['p50_ms']:7.1f} ms  p95 {sync_result['p95_ms']:7.1f} ms  |  "
+                f"async p50 {async_result['p50_ms']:7.1f} ms  p95 {async_result['p95_ms']:7.1f} ms  "
+                f"({sync_result['p50_ms'] / async_result['p50_ms']:.2f}x)"
+                + (f"  {sync_result['errors'] + async_result['errors']} errors"
+                   if sync_result['errors'] or async_result['errors'] else '')
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump({
+                    'revision': git_revision(),
+                    'run_at': datetime.now(timezone.utc).isoformat(),
+                    'database': connection.vendor,
+                    'scenarios': results,
+                }, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def scenarios(self, prefix):
+        """``{name: (logged-in email, path)}``"""
+        student_email = f'{prefix}-student-0@example.com'
+        student = CustomUser.objects.filter(email=student_email).first()
+        if student is None:
+            raise CommandError(f'No generated data with the "{prefix}" prefix; run generate_school_data first.')
+        question = HomeworkQuestion.objects.filter(question_class=student.user_class).order_by('-date', 'id').first()
+        dashboard = reverse('dashboard')
+        return {
+            'dashboard:student': (student_email, dashboard),
+            'dashboard:teacher': (f'{prefix}-teacher-0@example.com', dashboard),
+            'dashboard:principal': (f'{prefix}-principal@example.com', dashboard),
+            'dashboard:admin': (f'{prefix}-admin@example.com', dashboard),
+            'answer:page': (student_email, reverse('answer', args=[question.id])),
+        }
+
+    def measure_sync(self, client, path, options):
+        for _ in range(options['warmup']):
+            client.get(path)
+        durations, errors = [], 0
+        for _ in range(options['requests']):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(path)
+            durations.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+        return {'requests': len(durations), 'errors': errors, **latency_summary(durations)}
+
+    async def measure_async(self, client, path, options):
+        for _ in range(options['warmup']):
+            await client.get(path)
+        durations, errors = [], 0
+        for _ in range(options['requests']):
+            await cache.aclear()
+            started = time.perf_counter()
+            response = await client.get(path)
+            durations.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+        return {'requests': len(durations), 'errors': errors, **latency_summary(durations)}
@@ -0,0 +1,122 @@
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts import grading
+from accounts.benchmarking import git_revision, latency_summary
+from accounts.grading_backends import BACKENDS
+from accounts.models import StudentAnswer
+
+
+class Command(BaseCommand):
+    help = ('Scores a random sample of teacher-marked StudentAnswer rows with every grading backend and '
+            'reports latency per answer, vector size, peak memory and agreement of the resulting grades with '
+            'the teachers\' marks. Read-only.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=500, help='Marked answers to score')
+        parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), help='Only these backends')
+        parser.add_argument('--include-auto-graded', action='store_true',
+                            help='Also sample marks written by the auto-grader (flatters the backend that wrote them)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        rows = self.sample(options)
+        if not rows:
+            raise CommandError('No marked answers to score; --include-auto-graded also samples auto-graded ones.')
+        questions = {row[2]: (row[3], row[4]) for row in rows}
+        kind = 'marked' if options['include_auto_graded'] else 'teacher-marked'
+        self.stdout.write(f'{len(rows)} {kind} answers to {len(questions)} questions')
+        grading.warm_up()  # NumPy/SciPy imports would otherwise land in the first timings
+
+        results = {}
+        for name in options['backends'] or BACKENDS:
+            results[name] = result = self.evaluate(name, rows, questions)
+            self.stdout.write(
+                f"{name:>13}: {result['p50_us']:7.1f} us/answer (p95 {result['p95_us']:7.1f}, "
+                f"batched {result['batched_us_per_answer']:7.1f})  {result['vector_bytes']:7.0f} B/vector  "
+                f"peak {result['peak_kb']:8.1f} KB  exact {result['exact_agreement']:.0%}  "
+                f"within one {result['within_one_agreement']:.0%}  MAE {result['mean_abs_error']:.2f}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump({
+                    'revision': git_revision(),
+                    'run_at': datetime.now(timezone.utc).isoformat(),
+                    'answers': len(rows),
+                    'questions': len(questions),
+                    'include_auto_graded': options['include_auto_graded'],
+                    'backends': results,
+                }, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def sample(self, options):
+        """``[(answer, marks, question id, model answer, subject)]`` of a random sample of marked answers."""
+        marked = StudentAnswer.objects.filter(marks__isnull=False)
+        if not options['include_auto_graded']:
+            marked = marked.filter(auto_graded=False)
+        ids = list(marked.values_list('id', flat=True))
+        chosen = random.Random(options['seed']).sample(ids, min(options['sample'], len(ids)))
+        return list(
+            marked.filter(id__in=chosen).order_by('id')
+            .values_list('answer', 'marks', 'question_id', 'question__model_answer', 'question__subject')
+        )
+
+    def evaluate(self, name, rows, questions):
+        started = time.perf_counter()
+        vectors = {
+            question_id: grading.vectorize_text(model_answer, subject, name)
+            for question_id, (model_answer, subject) in questions.items()
+        }
+        vectorize_seconds = time.perf_counter() - started
+
+        durations, grades = [], []
+        for answer, _, question_id, _, _ in rows:
+            started = time.perf_counter()
+            similarity = grading.score_against_vector(vectors[question_id], answer)
+            durations.append(time.perf_counter() - started)
+            grades.append(grading.get_grade_from_similarity(similarity))
+
+        by_question = {}
+        for answer, _, question_id, _, _ in rows:
+            by_question.setdefault(question_id, []).append(answer)
+        started = time.perf_counter()
+        for question_id, answers in by_question.items():
+            grading.score_batch(vectors[question_id], answers)
+        batched_seconds = time.perf_counter() - started
+
+        errors = [abs(grade - row[1]) for grade, row in zip(grades, rows)]
+        timings = latency_summary(durations)
+        return {
+            'p50_us': timings['p50_ms'] * 1000,
+            'p95_us': timings['p95_ms'] * 1000,
+            'mean_us': timings['mean_ms'] * 1000,
+            'batched_us_per_answer': batched_seconds / len(rows) * 1e6,
+            'vectorize_us_per_question': vectorize_seconds / len(vectors) * 1e6,
+            'vector_bytes': sum(len(json.dumps(vector)) for vector in vectors.values()) / len(vectors),
+            'peak_kb': _peak_kb(name, rows, questions),
+            'exact_agreement': sum(error == 0 for error in errors) / len(errors),
+            'within_one_agreement': sum(error <= 1 for error in errors) / len(errors),
+            'mean_abs_error': sum(errors) / len(errors),
+        }
+
+
+def _peak_kb(name, rows, questions):
+    # Separate pass: tracing allocations slows the timed one down
+    tracemalloc.start()
+    try:
+        vectors = {
+            question_id: grading.vectorize_text(model_answer, subject, name)
+            for question_id, (model_answer, subject) in questions.items()
+        }
+        for answer, _, question_id, _, _ in rows:
+            grading.score_against_vector(vectors[question_id], answer)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
@@ -0,0 +1,105 @@
+import json
+import tracemalloc
+from datetime import date
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.grading import vectorize_text
+from accounts.models import CustomUser, HomeworkQuestion, StudentAnswer
+
+
+def panels(teacher, student):
+    """Dashboard lists as ``{name: (full rows queryset, list projection)}``."""
+    return {
+        'student: pending homework': (
+            HomeworkQuestion.objects.filter(question_class=student.user_class),
+            HomeworkQuestion.objects.listing().filter(question_class=student.user_class),
+        ),
+        'student: revision zone': (
+            StudentAnswer.objects.filter(student=student, marks__gte=3).select_related('question'),
+            StudentAnswer.objects.filter(student=student, marks__gte=3).previews(),
+        ),
+        'teacher: today\'s homework': (
+            HomeworkQuestion.objects.filter(uploaded_by=teacher, date=date.today()),
+            HomeworkQuestion.objects.summaries().filter(uploaded_by=teacher, date=date.today()),
+        ),
+        'admin: unconfirmed students': (
+            CustomUser.objects.filter(role='Student', payment_confirmed=False),
+            CustomUser.objects.listing().filter(role='Student', payment_confirmed=False),
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Measures the Python memory each dashboard list needs with full rows vs the list projections, '
+            'on a synthetic class (created inside a transaction that is rolled back)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100, help='Homework questions of the class')
+        parser.add_argument('--students', type=int, default=40, help='Students, each answering every question')
+        parser.add_argument('--text-chars', type=int, default=1500, help='Length of questions, answers and instructions')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        results = {}
+        with transaction.atomic():
+            teacher, student = self.create_class(options)
+            self.stdout.write(
+                f"Class of {options['students']} students, {options['questions']} questions, "
+                f"{options['students'] * options['questions']} answers, {options['text_chars']}-char texts"
+            )
+            for name, (full, slim) in panels(teacher, student).items():
+                full_kb, slim_kb = _peak_kb(full), _peak_kb(slim)
+                results[name] = {'full_kb': full_kb, 'slim_kb': slim_kb}
+                self.stdout.write(
+                    f'{name:>28}: {full_kb:9.1f} KB -> {slim_kb:9.1f} KB ({1 - slim_kb / full_kb:.0%} less)'
+                )
+            transaction.set_rollback(True)
+
+        full_total = sum(result['full_kb'] for result in results.values())
+        slim_total = sum(result['slim_kb'] for result in results.values())
+        self.stdout.write(self.style.SUCCESS(f'All lists: {full_total:.1f} KB -> {slim_total:.1f} KB'))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def create_class(self, options):
+        text = ('photosynthesis converts sunlight water and carbon dioxide into glucose ' * 100)[:options['text_chars']]
+        vector = vectorize_text(text, 'Science')
+        today = date.today()
+        # Unique per run, so the class never clashes with generate_school_data's accounts or the real school
+        run = uuid4().hex[:8]
+        teacher = CustomUser.objects.create(
+            email=f'page-memory-{run}-teacher@example.com', user_name='Bench Teacher', role='Teacher',
+        )
+        students = CustomUser.objects.bulk_create([
+            CustomUser(email=f'page-memory-{run}-student-{i}@example.com', user_name=f'Student {i}', role='Student',
+                       user_class=run, instructions=text, instruction_reply=text)
+            for i in range(options['students'])
+        ])
+        questions = HomeworkQuestion.objects.bulk_create([
+            HomeworkQuestion(question_class=run, date=today, due_date=today, uploaded_by=teacher, subject='Science',
+                             question=f'{i} {text}', model_answer=text, model_answer_vector=vector)
+            for i in range(options['questions'])
+        ])
+        StudentAnswer.objects.bulk_create(
+            (StudentAnswer(student=student, question=question, date=today, answer=text, marks=4,
+                           remarks='Auto-Graded: Excellent!', auto_graded=True, help_request=text)
+             for student in students for question in questions),
+            batch_size=1000,
+        )
+        return teacher, students[0]
+
+
+def _peak_kb(queryset):
+    queryset = queryset.all()  # fresh, unevaluated copy
+    tracemalloc.start()
+    try:
+        rows = list(queryset)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del rows
+    return peak / 1024
@@ -0,0 +1,67 @@
+import json
+import math
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from accounts.benchmarking import percentile
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = ('Measures password verification latency and per-worker login throughput at different PBKDF2 '
+            'work factors, to pick PASSWORD_PBKDF2_ITERATIONS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, nargs='+',
+                            default=[100_000, 260_000, 600_000, 1_000_000], help='Work factors to compare')
+        parser.add_argument('--logins', type=int, default=20, help='Verifications timed per work factor')
+        parser.add_argument('--peak-logins', type=float, default=50.0,
+                            help='Logins per second at the morning peak, to size the worker pool')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        pbkdf2 = get_hasher('pbkdf2_sha256')
+        legacy = get_hasher('legacy_sha256')
+        candidates = [('legacy_sha256', legacy.encode(PASSWORD, legacy.salt()))]
+        candidates += [
+            (f'pbkdf2 {iterations}', pbkdf2.encode(PASSWORD, pbkdf2.salt(), iterations))
+            for iterations in options['iterations']
+        ]
+
+        self.stdout.write(
+            f"Current PASSWORD_PBKDF2_ITERATIONS: {settings.PASSWORD_PBKDF2_ITERATIONS}; "
+            f"peak {options['peak_logins']:g} logins/sec"
+        )
+        results = {}
+        for name, encoded in candidates:
+            samples = []
+            for _ in range(options['logins']):
+                started = time.perf_counter()
+                verified = check_password(PASSWORD, encoded)
+                samples.append(time.perf_counter() - started)
+                if not verified:
+                    raise CommandError(f'{name} failed to verify its own hash.')
+
+            mean = statistics.fmean(samples)
+            results[name] = {
+                'p50_ms': statistics.median(samples) * 1000,
+                'p95_ms': percentile(samples, 95) * 1000,
+                # A sync worker verifies one login at a time, all of it on the CPU
+                'logins_per_sec_per_worker': 1 / mean,
+                'workers_for_peak': math.ceil(options['peak_logins'] * mean),
+            }
+            result = results[name]
+            self.stdout.write(
+                f"{name:>16}: p50 {result['p50_ms']:7.1f} ms, p95 {result['p95_ms']:7.1f} ms, "
+                f"{result['logins_per_sec_per_worker']:8.1f} logins/sec/worker, "
+                f"{result['workers_for_peak']} workers (CPU cores) for the peak"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
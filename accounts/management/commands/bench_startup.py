@@ -0,0 +1,81 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: boots the WSGI app the way a gunicorn worker does,
+# serves the login page once (get_wsgi_application() alone imports neither the
+# URLconf nor the views) and reports how long it took and the peak resident memory.
+BOOT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from homework_project.wsgi import application
+if sys.argv[1] == 'eager':
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+booted = time.perf_counter()
+from django.test import Client
+status = Client().get('/accounts/login/').status_code
+if status != 200:
+    sys.exit(f'First request returned {status}')
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+except ImportError:
+    rss_kb = None
+print(json.dumps({
+    'boot_seconds': booted - started, 'first_response_seconds': time.perf_counter() - started, 'rss_kb': rss_kb,
+}))
+"""
+
+MODES = {
+    'lazy': 'grading stack loaded on first batch grade (current)',
+    'eager': 'sklearn imported at boot (previous views.py behaviour)',
+}
+
+
+class Command(BaseCommand):
+    help = 'Measures cold WSGI worker boot, first response time and memory with lazy vs eager grading imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Cold boots per mode')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, GRADING_WARM_UP='0')
+        results = {}
+        for mode, description in MODES.items():
+            samples = []
+            for _ in range(options['runs']):
+                output = subprocess.run(
+                    [sys.executable, '-c', BOOT_SCRIPT, mode],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+                ).stdout
+                samples.append(json.loads(output.strip().splitlines()[-1]))
+
+            boot_times = [sample['boot_seconds'] for sample in samples]
+            first_response_times = [sample['first_response_seconds'] for sample in samples]
+            rss_values = [sample['rss_kb'] for sample in samples if sample['rss_kb'] is not None]
+            results[mode] = {
+                'description': description,
+                'boot_seconds_median': statistics.median(boot_times),
+                'first_response_seconds_median': statistics.median(first_response_times),
+                'rss_mb_median': statistics.median(rss_values) / 1024 if rss_values else None,
+            }
+            rss = f"{results[mode]['rss_mb_median']:.1f} MB" if rss_values else 'n/a'
+            self.stdout.write(
+                f"{mode:>5}: boot {results[mode]['boot_seconds_median'] * 1000:.0f} ms, "
+                f"first response {results[mode]['first_response_seconds_median'] * 1000:.0f} ms, "
+                f"RSS {rss} - {description}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
@@ -0,0 +1,139 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from accounts.benchmarking import git_revision, latency_summary
+from accounts.models import CustomUser, HomeworkQuestion, StudentAnswer
+
+# Generated accounts reuse one email per role, which the login throttle would stop
+UNTHROTTLED = {'email': (10 ** 9, 10 ** 9)}
+
+
+class Command(BaseCommand):
+    help = ('Drives login, every role\'s dashboard, answer submission and homework creation through the Django '
+            'test client against data from generate_school_data, and reports latency percentiles, queries per '
+            'request and throughput. Writes are rolled back, so runs are repeatable.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario first')
+        parser.add_argument('--scenarios', nargs='+', help='Only run these scenarios')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--password', default='bench-password', help='Password given to generate_school_data')
+        parser.add_argument('--prefix', default='bench', help='Email prefix given to generate_school_data')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios(options)
+        selected = options['scenarios'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}. Choose from {", ".join(scenarios)}.')
+
+        results = {}
+        with override_settings(LOGIN_THROTTLE_BUCKETS=UNTHROTTLED), transaction.atomic():
+            for name in selected:
+                results[name] = self.run_scenario(scenarios[name], options)
+                result = results[name]
+                self.stdout.write(
+                    f"{name:>20}: p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                    f"p99 {result['p99_ms']:7.1f} ms  {result['queries_per_request']:5.1f} queries  "
+                    f"{result['requests_per_sec']:6.1f} req/s" + (f"  {result['errors']} errors" if result['errors'] else '')
+                )
+            transaction.set_rollback(True)
+
+        report = {
+            'revision': git_revision(),
+            'run_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'cold_cache': options['cold'],
+            'data': {
+                'students': CustomUser.objects.filter(role='Student').count(),
+                'questions': HomeworkQuestion.objects.count(),
+                'answers': StudentAnswer.objects.count(),
+            },
+            'scenarios': results,
+        }
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def scenarios(self, options):
+        """``{name: (logged-in email or None, request function taking the client, expected status)}``"""
+        prefix = options['prefix']
+        emails = {role: f'{prefix}-{role}@example.com' for role in ('principal', 'admin')}
+        emails['student'] = f'{prefix}-student-0@example.com'
+        emails['teacher'] = f'{prefix}-teacher-0@example.com'
+        student = CustomUser.objects.filter(email=emails['student']).first()
+        if student is None:
+            raise CommandError(f'No generated data with the "{prefix}" prefix; run generate_school_data first.')
+        question = (
+            HomeworkQuestion.objects.filter(question_class=student.user_class).order_by('-date', 'id').first()
+        )
+        dashboard = reverse('dashboard')
+
+        def login(client):
+            client.cookies.clear()
+            return client.post(reverse('login'), {'gmail': emails['student'], 'password': options['password']})
+
+        def answer(client):
+            return client.post(reverse('answer', args=[question.id]), {'student_answer': question.model_answer[:200]})
+
+        def create_homework(client):
+            return client.post(reverse('create_homework'), {
+                'subject': 'Science', 'question_class': student.user_class,
+                'question': 'Benchmark question?', 'model_answer': 'Plants make food from sunlight',
+            })
+
+        return {
+            'login': (None, login, 302),
+            'dashboard:student': (emails['student'], lambda client: client.get(dashboard), 200),
+            'dashboard:teacher': (emails['teacher'], lambda client: client.get(dashboard), 200),
+            'dashboard:principal': (emails['principal'], lambda client: client.get(dashboard), 200),
+            'dashboard:admin': (emails['admin'], lambda client: client.get(dashboard), 200),
+            'answer:submit': (emails['student'], answer, 302),
+            'homework:create': (emails['teacher'], create_homework, 302),
+        }
+
+    def run_scenario(self, scenario, options):
+        email, send, expected_status = scenario
+        client = Client()
+        if email:
+            client.force_login(CustomUser.objects.get(email=email))
+
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(options['warmup']):
+            send(client)
+
+        durations, errors = [], 0
+        with connection.execute_wrapper(count_queries):
+            for _ in range(options['requests']):
+                if options['cold']:
+                    # Sessions are cached_db, so they survive this; everything else is rebuilt
+                    cache.clear()
+                started = time.perf_counter()
+                response = send(client)
+                durations.append(time.perf_counter() - started)
+                if response.status_code != expected_status:
+                    errors += 1
+
+        total = sum(durations)
+        return {
+            'requests': len(durations),
+            'errors': errors,
+            **latency_summary(durations),
+            'queries_per_request': queries[0] / len(durations),
+            # Requests are sent one at a time, so this is the throughput of a single worker
+            'requests_per_sec': len(durations) / total if total else 0.0,
+        }
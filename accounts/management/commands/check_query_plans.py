@@ -0,0 +1,74 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from accounts.models import CustomUser, HomeworkQuestion, StudentAnswer, StudentPerformance
+
+# Plan fragments that mean "this table was reached through an index".
+INDEX_MARKERS = {
+    'postgresql': ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan'),
+    'sqlite': ('USING INDEX', 'USING COVERING INDEX', 'USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY'),
+}
+
+
+def dashboard_queries():
+    """The hot filters of dashboard_view, answer_view and the admin queue, with sample values."""
+    today = date.today()
+    return {
+        'student: homework of a class': HomeworkQuestion.objects.filter(question_class='9th'),
+        'student: ungraded answers': StudentAnswer.objects.filter(student_id=1, marks__isnull=True),
+        'student: graded answers by date': StudentAnswer.objects.filter(student_id=1, marks__isnull=False).order_by('date'),
+        'student: class leaderboard': StudentPerformance.objects.filter(subject='').order_by('-average_marks'),
+        'answer: previous attempt': StudentAnswer.objects.filter(student_id=1, question_id=1, marks__isnull=True),
+        'answer: question answers': StudentAnswer.objects.filter(question_id=1, student_id=1),
+        'teacher: today\'s homework': HomeworkQuestion.objects.filter(uploaded_by_id=1, date=today),
+        'teacher: detail view': HomeworkQuestion.objects.filter(
+            uploaded_by_id=1, date=today, question_class='9th', subject='Science'
+        ),
+        'sweeper: expired subscriptions': CustomUser.objects.filter(
+            payment_confirmed=True, subscribed_till__lt=today, role='Student'
+        ),
+        'teacher: salary ranking': CustomUser.objects.filter(role='Teacher').order_by('-salary_points'),
+        'principal: homework created today': HomeworkQuestion.objects.filter(date=today),
+        'admin: unconfirmed students': CustomUser.objects.filter(role='Student', payment_confirmed=False),
+        'admin: unconfirmed teachers': CustomUser.objects.filter(role='Teacher', is_confirmed=False),
+        'class roster': CustomUser.objects.filter(role='Student', user_class='9th'),
+        'grading queue': StudentAnswer.objects.filter(attempt_status=StudentAnswer.ATTEMPT_PENDING_GRADING).order_by('id'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the dashboard queries and fails if any of them does not use an index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        markers = INDEX_MARKERS.get(connection.vendor)
+        if markers is None:
+            raise CommandError(f'No plan check for the {connection.vendor} backend.')
+
+        if connection.vendor == 'postgresql':
+            # Small (e.g. freshly migrated) tables make the planner prefer
+            # sequential scans; we only want to know an index is usable.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        failures = []
+        for name, queryset in dashboard_queries().items():
+            plan = queryset.explain()
+            uses_index = any(marker in plan for marker in markers)
+            status = self.style.SUCCESS('index') if uses_index else self.style.ERROR('NO INDEX')
+            self.stdout.write(f'{status:>10}  {name}')
+            if options['verbose_plans'] or not uses_index:
+                self.stdout.write('            ' + plan.replace('\n', '\n            '))
+            if not uses_index:
+                failures.append(name)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+        if failures:
+            raise CommandError(f'{len(failures)} dashboard queries do not use an index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All dashboard queries use an index.'))
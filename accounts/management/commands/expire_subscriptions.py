@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts import subscriptions
+
+
+class Command(BaseCommand):
+    help = ('Deactivates students whose subscription has ended (subscribed_till in the past). '
+            'Indexed and batched, so it is cheap to run every few minutes from a scheduler.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Students deactivated per UPDATE')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired subscriptions')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['dry_run']:
+            expired = subscriptions.expired_students().count()
+            self.stdout.write(f'{expired} subscriptions have expired (dry run, {time.perf_counter() - started:.3f}s).')
+            return
+
+        expired, batches = subscriptions.expire_subscriptions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deactivated {expired} expired subscriptions in {batches} batches, '
+            f'{time.perf_counter() - started:.3f}s.'
+        ))
@@ -0,0 +1,134 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts import dashboard_cache, leaderboard, rollups
+from accounts.grading import vectorize_text
+from accounts.models import CustomUser, HomeworkQuestion, StudentAnswer
+
+SUBJECTS = ['Hindi', 'English', 'Math', 'Science', 'SST', 'Computer', 'GK']
+WORDS = (
+    'plants make food from sunlight water carbon dioxide energy cell nucleus force motion newton law gravity '
+    'india independence river mountain climate rainfall soil fraction equation triangle angle area volume '
+    'grammar noun verb poem story author computer memory program history empire trade democracy'
+).split()
+
+
+class Command(BaseCommand):
+    help = ('Fills the database with a synthetic school (classes, teachers, students, homework and answers) '
+            'for benchmarks. Every generated account uses the --prefix email prefix and the same --password.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=4, help='Classes, named 5th, 6th, ... (at most 8)')
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--students-per-class', type=int, default=40)
+        parser.add_argument('--questions-per-teacher', type=int, default=30)
+        parser.add_argument('--days', type=int, default=30, help='Homework dates are spread over this many past days')
+        parser.add_argument('--answer-rate', type=float, default=0.8, help='Share of class homework each student answered')
+        parser.add_argument('--password', default='bench-password', help='Password of every generated account')
+        parser.add_argument('--prefix', default='bench', help='Email prefix of the generated accounts')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['classes'] <= 8:
+            raise CommandError('--classes must be between 1 and 8.')
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+
+        with transaction.atomic():
+            if options['clear']:
+                deleted, _ = CustomUser.objects.filter(email__startswith=f'{prefix}-').delete()
+                self.stdout.write(f'Deleted {deleted} previously generated rows.')
+            elif CustomUser.objects.filter(email__startswith=f'{prefix}-').exists():
+                raise CommandError(f'Data with the "{prefix}" prefix exists; pass --clear to regenerate it.')
+
+            classes = [f'{5 + i}th' for i in range(options['classes'])]
+            teachers, students = self.create_users(options, classes, rng)
+            questions = self.create_questions(options, classes, teachers, rng)
+            answers = self.create_answers(options, students, questions, rng)
+
+        leaderboard.rebuild()
+        rollups.refresh(full=True)
+        dashboard_cache.bump('school-homework', 'school-answers', 'users', *(f'class:{c}' for c in classes),
+                             *(f'teacher:{teacher.id}' for teacher in teachers))
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(classes)} classes, {len(teachers)} teachers, {len(students)} students, '
+            f'{len(questions)} questions and {answers} answers in {time.perf_counter() - started:.1f}s. '
+            f'Accounts: {prefix}-student-0@example.com, {prefix}-teacher-0@example.com, '
+            f'{prefix}-principal@example.com, {prefix}-admin@example.com'
+        ))
+
+    def create_users(self, options, classes, rng):
+        prefix = options['prefix']
+        # Hashed once: every account shares the password, so login cost stays realistic
+        password = make_password(options['password'])
+        common = {'password': password, 'security_question': 'Pet name?', 'security_answer': 'bench'}
+        staff = [
+            CustomUser(email=f'{prefix}-principal@example.com', user_name='Bench Principal', role='Principal',
+                       is_confirmed=True, **common),
+            CustomUser(email=f'{prefix}-admin@example.com', user_name='Bench Admin', role='Admin',
+                       is_confirmed=True, **common),
+        ]
+        teachers = [
+            CustomUser(email=f'{prefix}-teacher-{i}@example.com', user_name=f'Teacher {i}', role='Teacher',
+                       is_confirmed=True, salary_points=rng.randint(0, 500), **common)
+            for i in range(options['teachers'])
+        ]
+        till = date.today() + timedelta(days=365)
+        students = [
+            CustomUser(email=f'{prefix}-student-{i}@example.com', user_name=f'Student {i}', role='Student',
+                       user_class=classes[i % len(classes)], payment_confirmed=True, subscription_plan='1 year',
+                       subscription_date=date.today(), subscribed_till=till, **common)
+            for i in range(options['students_per_class'] * len(classes))
+        ]
+        CustomUser.objects.bulk_create(staff + teachers + students, batch_size=1000)
+        return teachers, students
+
+    def create_questions(self, options, classes, teachers, rng):
+        today = date.today()
+        questions = []
+        for t, teacher in enumerate(teachers):
+            for i in range(options['questions_per_teacher']):
+                model_answer = _sentence(rng, 20, 60)
+                subject = rng.choice(SUBJECTS)
+                # Every class has homework dated today, so dashboards have pending work
+                question_date = today - timedelta(days=0 if i < len(classes) else rng.randrange(options['days']))
+                questions.append(HomeworkQuestion(
+                    question_class=classes[(t + i) % len(classes)], date=question_date,
+                    due_date=question_date + timedelta(days=1), uploaded_by=teacher, subject=subject,
+                    question=f'Explain: {_sentence(rng, 8, 20)}?', model_answer=model_answer,
+                    # bulk_create skips save(), so vectorise here
+                    model_answer_vector=vectorize_text(model_answer, subject),
+                ))
+        return HomeworkQuestion.objects.bulk_create(questions, batch_size=1000)
+
+    def create_answers(self, options, students, questions, rng):
+        by_class = {}
+        for question in questions:
+            by_class.setdefault(question.question_class, []).append(question)
+        answers = []
+        created = 0
+        for student in students:
+            for question in by_class.get(student.user_class, []):
+                if rng.random() >= options['answer_rate']:
+                    continue
+                words = question.model_answer.split()
+                answers.append(StudentAnswer(
+                    student=student, question=question, date=question.date,
+                    answer=' '.join(rng.sample(words, k=max(1, len(words) * 2 // 3))),
+                    marks=rng.choice([None, 1, 2, 3, 3, 4, 4, 5]), remarks='Generated',
+                ))
+            if len(answers) >= 5000:
+                created += len(StudentAnswer.objects.bulk_create(answers, batch_size=1000))
+                answers = []
+        created += len(StudentAnswer.objects.bulk_create(answers, batch_size=1000))
+        return created
+
+
+def _sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+import sys
+
+from django.core.management.base import BaseCommand, OutputWrapper
+from django.db import connections
+from accounts.grading_queue import requeue_stuck, run_worker
+
+
+def worker_main(batch_size, poll_interval, once):
+    # Needed when processes are spawned (Windows/macOS); a no-op after fork.
+    import django
+    django.setup()
+    stdout = OutputWrapper(sys.stdout)
+    run_worker(batch_size=batch_size, poll_interval=poll_interval, once=once,
+               log=lambda line: stdout.write(f"[worker {os.getpid()}] {line}"))
+
+
+class Command(BaseCommand):
+    help = 'Runs worker processes that grade answers submitted in GRADING_MODE = "queue"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--batch-size', type=int, default=100, help='Answers claimed per batch')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--requeue', action='store_true',
+                            help='First return answers claimed more than 10 minutes ago, by a worker that '
+                                 'stopped, to the queue (running workers also do this every 5 minutes)')
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            self.stdout.write(f"Re-queued {requeue_stuck()} answers.")
+
+        worker_args = (options['batch_size'], options['poll_interval'], options['once'])
+        if options['processes'] <= 1:
+            run_worker(*worker_args, log=self.stdout.write)
+            return
+
+        # Children must open their own database connections.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=worker_main, args=worker_args, daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {len(processes)} grading workers."))
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -1,9 +1,13 @@
-import gspread
+import time
+from datetime import timedelta
+
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts import dashboard_cache, leaderboard
+from accounts.grading import vectorize_text
+from accounts.importing import chunked, parse_dates, read_table
 from accounts.models import CustomUser, HomeworkQuestion, StudentAnswer
-from google.oauth2.service_account import Credentials
-from datetime import datetime
 
 # --- IMPORTANT: UPDATE THESE VALUES ---
 HOMEWORK_SHEET_ID = '1fU_oJWR8GbOCX_0TRu2qiXIwQ19pYy__ezXPsRH61qI'
@@ -12,73 +16,168 @@ SERVICE_ACCOUNT_FILE = 'C:/Users/hp/Documents/HomeworkApp/epsbargawan-firebase-a
 # ------------------------------------
 
 class Command(BaseCommand):
-    help = 'Imports homework and answers from Google Sheets'
+    help = 'Imports homework and answers from Google Sheets (or CSV/XLSX exports of them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--homework-file', help='CSV/XLSX export of the homework sheet instead of Google Sheets')
+        parser.add_argument('--answers-file', help='CSV/XLSX export of the answers sheet instead of Google Sheets')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows inserted per bulk_create transaction')
 
     def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
         try:
-            # Authenticate and connect
-            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-            creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-            client = gspread.authorize(creds)
-
             # --- Import Homework Questions ---
             self.stdout.write("Importing homework questions...")
-            sheet_homework = client.open_by_key(HOMEWORK_SHEET_ID).sheet1
-            homework_data = sheet_homework.get_all_records()
-            df_homework = pd.DataFrame(homework_data)
-
-            for index, row in df_homework.iterrows():
-                try:
-                    teacher = CustomUser.objects.get(user_name=row['Uploaded By'], role__in=['Teacher', 'Admin', 'Principal'])
-                    question_date = datetime.strptime(row['Date'], '%d-%m-%Y').date()
-                    due_date = datetime.strptime(row['Due_Date'], '%d-%m-%Y').date() if row.get('Due_Date') else question_date + timedelta(days=1)
-
-                    HomeworkQuestion.objects.get_or_create(
-                        question=row['Question'],
-                        date=question_date,
-                        uploaded_by=teacher,
-                        defaults={
-                            'question_class': row['Class'],
-                            'subject': row['Subject'],
-                            'model_answer': row['Model_Answer'],
-                            'due_date': due_date
-                        }
-                    )
-                except CustomUser.DoesNotExist:
-                    self.stdout.write(self.style.WARNING(f"Skipping question, teacher not found: {row['Uploaded By']}"))
-                    continue
-            self.stdout.write(self.style.SUCCESS('Homework questions imported successfully.'))
+            df_homework = read_table(options['homework_file'], HOMEWORK_SHEET_ID, SERVICE_ACCOUNT_FILE)
+            self.import_homework(df_homework, chunk_size)
 
             # --- Import Student Answers ---
             self.stdout.write("Importing student answers...")
-            sheet_answers = client.open_by_key(ANSWERS_SHEET_ID).sheet1
-            answers_data = sheet_answers.get_all_records()
-            df_answers = pd.DataFrame(answers_data)
-
-            for index, row in df_answers.iterrows():
-                try:
-                    # --- FIX: Changed 'gmail_id' to 'email' ---
-                    student = CustomUser.objects.get(email=row['Student Gmail'], role='Student')
-                    question = HomeworkQuestion.objects.get(question=row['Question'], date=datetime.strptime(row['Date'], '%d-%m-%Y').date())
-
-                    StudentAnswer.objects.get_or_create(
-                        student=student,
-                        question=question,
-                        defaults={
-                            'date': datetime.strptime(row['Date'], '%d-%m-%Y').date(),
-                            'answer': row['Answer'],
-                            'marks': int(row['Marks']) if row.get('Marks') else None,
-                            'remarks': row['Remarks'],
-                            'attempt_status': int(row.get('Attempt_Status', 0) or 0)
-                        }
-                    )
-                except CustomUser.DoesNotExist:
-                    self.stdout.write(self.style.WARNING(f"Skipping answer, student not found: {row['Student Gmail']}"))
-                    continue
-                except HomeworkQuestion.DoesNotExist:
-                    self.stdout.write(self.style.WARNING(f"Skipping answer, question not found: {row['Question']}"))
-                    continue
-            self.stdout.write(self.style.SUCCESS('Student answers imported successfully.'))
+            df_answers = read_table(options['answers_file'], ANSWERS_SHEET_ID, SERVICE_ACCOUNT_FILE)
+            self.import_answers(df_answers, chunk_size)
 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'An error occurred: {e}'))
+
+    def import_homework(self, df, chunk_size):
+        started = time.perf_counter()
+        question_dates = parse_dates(df['Date'])
+        due_dates = parse_dates(df['Due_Date']) if 'Due_Date' in df else [None] * len(df)
+
+        # One query for every teacher named in the sheet
+        teacher_ids = dict(
+            CustomUser.objects.filter(
+                user_name__in=df['Uploaded By'].unique().tolist(), role__in=['Teacher', 'Admin', 'Principal']
+            ).values_list('user_name', 'id')
+        )
+        # ...and one for the questions that already exist, so re-running the import is a no-op
+        existing = set(
+            HomeworkQuestion.objects.filter(
+                uploaded_by_id__in=teacher_ids.values(), date__in={d for d in question_dates if d}
+            ).values_list('question', 'date', 'uploaded_by_id')
+        )
+
+        new_questions = []
+        missing_teachers = set()
+        skipped = 0
+        for row, question_date, due_date in zip(df.to_dict('records'), question_dates, due_dates):
+            teacher_id = teacher_ids.get(row['Uploaded By'])
+            if teacher_id is None:
+                missing_teachers.add(row['Uploaded By'])
+                continue
+            if question_date is None:
+                self.stdout.write(self.style.WARNING(f"Skipping question, invalid date: {row['Date']}"))
+                continue
+            key = (row['Question'], question_date, teacher_id)
+            if key in existing:
+                skipped += 1
+                continue
+            existing.add(key)
+            new_questions.append(HomeworkQuestion(
+                question=row['Question'],
+                date=question_date,
+                uploaded_by_id=teacher_id,
+                question_class=row['Class'],
+                subject=row['Subject'],
+                model_answer=row['Model_Answer'],
+                # bulk_create skips save(), so vectorise here
+                model_answer_vector=vectorize_text(row['Model_Answer'], row['Subject']),
+                due_date=due_date or question_date + timedelta(days=1),
+            ))
+
+        for chunk in chunked(new_questions, chunk_size):
+            with transaction.atomic():
+                HomeworkQuestion.objects.bulk_create(chunk)
+        # bulk_create sends no post_save signals
+        dashboard_cache.homework_changed(
+            {q.uploaded_by_id for q in new_questions}, {q.question_class for q in new_questions}
+        )
+
+        for name in sorted(missing_teachers):
+            self.stdout.write(self.style.WARNING(f"Skipping questions, teacher not found: {name}"))
+        self._report('homework questions', len(df), len(new_questions), skipped, started)
+
+    def import_answers(self, df, chunk_size):
+        started = time.perf_counter()
+        answer_dates = parse_dates(df['Date'])
+        marks = pd.to_numeric(df['Marks'], errors='coerce') if 'Marks' in df else pd.Series([None] * len(df))
+        attempt_status = (
+            pd.to_numeric(df['Attempt_Status'], errors='coerce').fillna(0).astype(int)
+            if 'Attempt_Status' in df else pd.Series([0] * len(df))
+        )
+
+        student_ids = dict(
+            CustomUser.objects.filter(email__in=df['Student Gmail'].unique().tolist(), role='Student')
+            .values_list('email', 'id')
+        )
+        question_ids, subjects, classes = {}, {}, {}
+        for question_id, text, question_date, subject, question_class in (
+            HomeworkQuestion.objects.filter(
+                question__in=df['Question'].unique().tolist(), date__in={d for d in answer_dates if d}
+            ).order_by('id').values_list('id', 'question', 'date', 'subject', 'question_class')
+        ):
+            question_ids.setdefault((text, question_date), question_id)
+            subjects[question_id] = subject
+            classes[question_id] = question_class
+        existing = set(
+            StudentAnswer.objects.filter(
+                student_id__in=student_ids.values(), question_id__in=question_ids.values()
+            ).values_list('student_id', 'question_id')
+        )
+
+        new_answers = []
+        missing_students, missing_questions, invalid_dates = set(), set(), []
+        skipped = 0
+        for row, answer_date, row_marks, row_status in zip(
+            df.to_dict('records'), answer_dates, marks.tolist(), attempt_status.tolist()
+        ):
+            student_id = student_ids.get(row['Student Gmail'])
+            if student_id is None:
+                missing_students.add(row['Student Gmail'])
+                continue
+            if answer_date is None:
+                invalid_dates.append(row['Date'])
+                continue
+            question_id = question_ids.get((row['Question'], answer_date))
+            if question_id is None:
+                missing_questions.add(row['Question'])
+                continue
+            if (student_id, question_id) in existing:
+                skipped += 1
+                continue
+            existing.add((student_id, question_id))
+            new_answers.append(StudentAnswer(
+                student_id=student_id,
+                question_id=question_id,
+                date=answer_date,
+                answer=row['Answer'],
+                marks=None if pd.isna(row_marks) else int(row_marks),
+                remarks=row.get('Remarks', ''),
+                attempt_status=row_status,
+            ))
+
+        for chunk in chunked(new_answers, chunk_size):
+            with transaction.atomic():
+                StudentAnswer.objects.bulk_create(chunk)
+                leaderboard.record_mark_changes(
+                    (answer.student_id, subjects[answer.question_id], None, answer.marks) for answer in chunk
+                )
+        dashboard_cache.answers_changed(
+            {a.student_id for a in new_answers}, {classes[a.question_id] for a in new_answers}
+        )
+
+        for email in sorted(missing_students):
+            self.stdout.write(self.style.WARNING(f"Skipping answers, student not found: {email}"))
+        for text in sorted(missing_questions):
+            self.stdout.write(self.style.WARNING(f"Skipping answers, question not found: {text}"))
+        for value in invalid_dates:
+            self.stdout.write(self.style.WARNING(f"Skipping answer, invalid date: {value}"))
+        self._report('student answers', len(df), len(new_answers), skipped, started)
+
+    def _report(self, label, total, created, skipped, started):
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {label}: {created} created, {skipped} already present, '
+            f'{total} rows in {elapsed:.2f}s ({rate:.0f} rows/sec).'
+        ))
@@ -1,59 +1,80 @@
-import gspread
+import time
+
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.hashers import wrap_legacy_hash
+from accounts.importing import iter_table_chunks
 from accounts.models import CustomUser
-from google.oauth2.service_account import Credentials
-import hashlib
 
 # --- IMPORTANT: UPDATE THIS VALUE ---
+USERS_SHEET_ID = "18r78yFIjWr-gol6rQLeKuDPld9Rc1uDN8IQRffw68YA"
 SERVICE_ACCOUNT_FILE = 'C:/Users/hp/Documents/HomeworkApp/epsbargawan-firebase-adminsdk-fbsvc-d6072fb00c.json'
 # ------------------------------------
 
 class Command(BaseCommand):
-    help = 'Imports users from the specified Google Sheet into the CustomUser model'
+    help = 'Imports users from the specified Google Sheet (or a CSV/XLSX export of it) into the CustomUser model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='CSV/XLSX export of the users sheet instead of Google Sheets')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows read and inserted per batch')
 
     def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = created = skipped = 0
         try:
-            # Authenticate with Google Sheets
-            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-            creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-            client = gspread.authorize(creds)
-            
-            # Open the sheet and read the data
-            sheet = client.open_by_key("18r78yFIjWr-gol6rQLeKuDPld9Rc1uDN8IQRffw68YA").sheet1
-            data = sheet.get_all_records()
-            df = pd.DataFrame(data)
-
-            self.stdout.write(self.style.SUCCESS(f'Successfully loaded {len(df)} rows from Google Sheet.'))
-
-            for index, row in df.iterrows():
-                email = row.get('Gmail ID', '').lower().strip()
-                if not email:
-                    continue
-
-                # --- FIX: Changed 'gmail_id' to 'email' ---
-                user, created = CustomUser.objects.get_or_create(
-                    email=email,
-                    defaults={
-                        'user_name': row.get('User Name'),
-                        'father_name': row.get('Father Name'),
-                        'mobile_number': row.get('Mobile Number'),
-                        'password': row.get('Password'), # Assumes this is a hash
-                        'role': row.get('Role'),
-                        'user_class': row.get('Class'),
-                        'is_confirmed': True if row.get('Confirmed') == 'Yes' else False,
-                        'payment_confirmed': True if row.get('Payment Confirmed') == 'Yes' else False,
-                        'subscription_plan': row.get('Subscription Plan'),
-                        'security_question': row.get('Security Question'),
-                        'security_answer': row.get('Security Answer'),
-                        'salary_points': int(row.get('Salary Points', 0) or 0)
-                    }
+            chunks = iter_table_chunks(options['file'], USERS_SHEET_ID, SERVICE_ACCOUNT_FILE, options['chunk_size'])
+            for chunk in chunks:
+                chunk_created, chunk_skipped = self.import_chunk(chunk)
+                total += len(chunk)
+                created += chunk_created
+                skipped += chunk_skipped
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Processed {total} rows: {created} created, {skipped} skipped ({total / elapsed:.0f} rows/sec)'
                 )
-
-                if created:
-                    self.stdout.write(self.style.SUCCESS(f'Successfully created user: {email}'))
-                else:
-                    self.stdout.write(self.style.WARNING(f'User already exists, skipping: {email}'))
-
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'An error occurred: {e}'))
+            return
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported users: {created} created, {skipped} skipped (existing, duplicate or no email), '
+            f'{total} rows in {elapsed:.2f}s.'
+        ))
+
+    def import_chunk(self, chunk):
+        """Insert the new users of one chunk. Returns ``(created, skipped)``."""
+        emails = chunk['Gmail ID'].str.lower().str.strip()
+        salary_points = (
+            pd.to_numeric(chunk['Salary Points'], errors='coerce').fillna(0).astype(int)
+            if 'Salary Points' in chunk else pd.Series(0, index=chunk.index)
+        )
+        rows = chunk.assign(email=emails, salary_points=salary_points)
+        rows = rows[rows['email'] != ''].drop_duplicates('email')
+
+        # One IN query per chunk instead of a get_or_create per row
+        existing = set(CustomUser.objects.filter(email__in=rows['email'].tolist()).values_list('email', flat=True))
+        new_users = [
+            CustomUser(
+                email=row['email'],
+                user_name=row.get('User Name'),
+                father_name=row.get('Father Name'),
+                mobile_number=row.get('Mobile Number'),
+                # The sheet holds legacy SHA-256 hashes; upgraded on first login, so nothing is hashed per row
+                password=wrap_legacy_hash(row.get('Password')),
+                role=row.get('Role'),
+                user_class=row.get('Class'),
+                is_confirmed=row.get('Confirmed') == 'Yes',
+                payment_confirmed=row.get('Payment Confirmed') == 'Yes',
+                subscription_plan=row.get('Subscription Plan'),
+                security_question=row.get('Security Question'),
+                security_answer=row.get('Security Answer'),
+                salary_points=row['salary_points'],
+            )
+            for row in rows.to_dict('records')
+            if row['email'] not in existing
+        ]
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(new_users)
+        return len(new_users), len(chunk) - len(new_users)
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the StudentPerformance leaderboard table from all graded answers'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} leaderboard rows in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,93 @@
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from accounts import dashboard_cache, leaderboard
+from accounts.grading import get_grade_from_similarity, grading_result, question_vector, score_batch
+from accounts.models import HomeworkQuestion, StudentAnswer
+
+
+class Command(BaseCommand):
+    help = ('Re-grades existing student answers against the current model answers, storing any model '
+            'answer vector that is stale (e.g. after a tokenizer, analyzer or backend change)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--question', type=int, action='append', dest='question_ids',
+                            help='Only re-grade answers to this question id (repeatable)')
+        parser.add_argument('--class', dest='question_class', help='Only re-grade answers for this class, e.g. 9th')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per read and per bulk_update batch')
+        parser.add_argument('--dry-run', action='store_true', help='Score answers but do not write anything')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+
+        # Answers still waiting in the grading queue are left to the workers.
+        answers = StudentAnswer.objects.exclude(
+            attempt_status__in=[StudentAnswer.ATTEMPT_PENDING_GRADING, StudentAnswer.ATTEMPT_GRADING]
+        )
+        if options['question_ids']:
+            answers = answers.filter(question_id__in=options['question_ids'])
+        if options['question_class']:
+            answers = answers.filter(question__question_class=options['question_class'])
+        rows = (
+            answers.order_by('question_id', 'id')
+            .values_list('id', 'question_id', 'answer', 'marks', 'remarks', 'student_id')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        started = time.perf_counter()
+        scored = changed = vectors_stored = 0
+        pending_updates = []
+        mark_changes = []
+        changed_classes = set()
+        for question_id, group in groupby(rows, key=lambda row: row[1]):
+            group = list(group)
+            question = HomeworkQuestion.objects.only(
+                'id', 'subject', 'question_class', 'model_answer', 'model_answer_vector', 'grading_backend'
+            ).get(id=question_id)
+            vector = question_vector(question)
+            if vector is not question.model_answer_vector and not dry_run:
+                # Stale (older tokenizer, analyzer or backend): store the rebuilt one
+                HomeworkQuestion.objects.filter(id=question_id).update(model_answer_vector=vector)
+                vectors_stored += 1
+            scores = score_batch(vector, [row[2] for row in group])
+
+            for (answer_id, _, _, old_marks, old_remarks, student_id), similarity in zip(group, scores):
+                marks, remarks = grading_result(similarity, get_grade_from_similarity(similarity))
+                if (marks, remarks) != (old_marks, old_remarks):
+                    changed += 1
+                    pending_updates.append(StudentAnswer(id=answer_id, marks=marks, remarks=remarks, auto_graded=True))
+                    mark_changes.append((student_id, question.subject, old_marks, marks))
+                    changed_classes.add(question.question_class)
+            scored += len(group)
+
+            if len(pending_updates) >= chunk_size:
+                self._flush(pending_updates, mark_changes, chunk_size, dry_run)
+                pending_updates = []
+                mark_changes = []
+        self._flush(pending_updates, mark_changes, chunk_size, dry_run)
+        if changed and not dry_run:
+            dashboard_cache.bump(*(f'class:{question_class}' for question_class in changed_classes))
+
+        elapsed = time.perf_counter() - started
+        rate = scored / elapsed if elapsed else 0.0
+        verb = 'would change' if dry_run else 'changed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-graded {scored} answers ({verb} {changed}) in {elapsed:.2f}s - {rate:.0f} answers/sec.'
+        ))
+        if vectors_stored:
+            self.stdout.write(f'Stored {vectors_stored} rebuilt model answer vectors.')
+
+    def _flush(self, updates, mark_changes, chunk_size, dry_run):
+        if dry_run or not updates:
+            return
+        now = timezone.now()
+        for answer in updates:
+            answer.updated_at = now
+        with transaction.atomic():
+            StudentAnswer.objects.bulk_update(updates, ['marks', 'remarks', 'auto_graded', 'updated_at'], batch_size=chunk_size)
+            leaderboard.record_mark_changes(mark_changes)
+        dashboard_cache.answers_changed({change[0] for change in mark_changes}, [])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts import dashboard_cache, rollups
+
+
+class Command(BaseCommand):
+    help = ('Refreshes the daily performance rollups used by the principal dashboard. '
+            'Only days with answers changed since the last run are recomputed, so it is cheap to run often.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every day from scratch (backfill / drift repair)')
+        parser.add_argument('--every', type=float, metavar='SECONDS',
+                            help='Keep running, refreshing every SECONDS (the Procfile rollups process)')
+
+    def handle(self, *args, **options):
+        self.refresh(options['full'])
+        while options['every']:
+            time.sleep(options['every'])
+            self.refresh(False)
+
+    def refresh(self, full):
+        started = time.perf_counter()
+        days = rollups.refresh(full=full)
+        if days:
+            dashboard_cache.bump('school-answers')
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed rollups for {len(days)} days in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -1,6 +1,28 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Substr
 
-class CustomUserManager(BaseUserManager):
+# Characters of a long text column sent to list pages; one more than is shown,
+# so the template's truncatechars can tell the text was cut.
+PREVIEW_LENGTH = 201
+
+
+def _preview(field, length=PREVIEW_LENGTH):
+    # Computed in SQL, so the full text never leaves the database
+    return Substr(field, 1, length)
+
+
+class CustomUserQuerySet(models.QuerySet):
+    def listing(self):
+        """Rows for user lists (admin confirmation queues): no password, instructions or replies."""
+        return self.only(
+            'id', 'email', 'user_name', 'role', 'user_class', 'subscription_plan', 'transaction_id',
+            'is_confirmed', 'payment_confirmed',
+        )
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     """
     Custom user model manager where email is the unique identifier
     for authentication instead of usernames.
@@ -25,3 +47,31 @@ class CustomUserManager(BaseUserManager):
         if extra_fields.get("is_superuser") is not True:
             raise ValueError("Superuser must have is_superuser=True.")
         return self.create_user(email, password, **extra_fields)
+
+
+class HomeworkQuestionQuerySet(models.QuerySet):
+    def listing(self):
+        """Questions without the model answer and its grading vector (students and lists never show them)."""
+        return self.defer('model_answer', 'model_answer_vector')
+
+    def summaries(self):
+        """Class/subject/date rows only, for tables that link to the questions instead of showing them."""
+        return self.only('id', 'question_class', 'subject', 'date', 'due_date')
+
+
+class StudentAnswerQuerySet(models.QuerySet):
+    def listing(self):
+        """Answers without the help request text."""
+        return self.defer('help_request')
+
+    def previews(self):
+        """
+        Dicts with the subject, date, marks and remarks of each answer plus
+        SQL-truncated ``question_preview`` / ``answer_preview`` texts.
+        """
+        return self.values(
+            'id', 'date', 'marks', 'remarks',
+            subject=F('question__subject'),
+            question_preview=_preview('question__question'),
+            answer_preview=_preview('answer'),
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:00
+
+import hashlib
+import re
+from collections import Counter
+
+from django.db import migrations, models
+
+# Frozen copy of the version 1 vectoriser, so this migration's output never
+# depends on the current grading code or settings. Later versions treat these
+# vectors as stale and rebuild them.
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def vectorize_text(text):
+    terms = dict(Counter(TOKEN_PATTERN.findall(text.lower()) if text else []))
+    return {
+        'version': 1,
+        'digest': hashlib.md5((text or '').encode('utf-8')).hexdigest(),
+        'terms': terms,
+        'sq_norm': sum(count * count for count in terms.values()),
+    }
+
+
+def backfill_model_answer_vectors(apps, schema_editor):
+    HomeworkQuestion = apps.get_model('accounts', 'HomeworkQuestion')
+    batch = []
+    for question in HomeworkQuestion.objects.only('id', 'model_answer').iterator(chunk_size=500):
+        question.model_answer_vector = vectorize_text(question.model_answer)
+        batch.append(question)
+        if len(batch) >= 500:
+            HomeworkQuestion.objects.bulk_update(batch, ['model_answer_vector'])
+            batch = []
+    if batch:
+        HomeworkQuestion.objects.bulk_update(batch, ['model_answer_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_transaction_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworkquestion',
+            name='model_answer_vector',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_model_answer_vectors, migrations.RunPython.noop),
+    ]
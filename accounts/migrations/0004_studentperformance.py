@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_student_performance(apps, schema_editor):
+    StudentAnswer = apps.get_model('accounts', 'StudentAnswer')
+    StudentPerformance = apps.get_model('accounts', 'StudentPerformance')
+    totals = (
+        StudentAnswer.objects.filter(marks__isnull=False)
+        .values('student_id', 'question__subject')
+        .annotate(marks_sum=models.Sum('marks'), marks_count=models.Count('id'))
+        .order_by()
+    )
+    rows, overall = [], {}
+    for total in totals:
+        rows.append(StudentPerformance(
+            student_id=total['student_id'], subject=total['question__subject'],
+            marks_sum=total['marks_sum'], marks_count=total['marks_count'],
+            average_marks=total['marks_sum'] / total['marks_count'],
+        ))
+        marks_sum, marks_count = overall.get(total['student_id'], (0, 0))
+        overall[total['student_id']] = (marks_sum + total['marks_sum'], marks_count + total['marks_count'])
+    rows.extend(
+        StudentPerformance(student_id=student_id, subject='', marks_sum=marks_sum, marks_count=marks_count,
+                           average_marks=marks_sum / marks_count)
+        for student_id, (marks_sum, marks_count) in overall.items()
+    )
+    StudentPerformance.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_homeworkquestion_model_answer_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(blank=True, max_length=100)),
+                ('marks_sum', models.IntegerField(default=0)),
+                ('marks_count', models.IntegerField(default=0)),
+                ('average_marks', models.FloatField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['subject', '-average_marks'], name='performance_ranking_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject'), name='unique_student_subject_performance')],
+            },
+        ),
+        migrations.RunPython(backfill_student_performance, migrations.RunPython.noop),
+    ]
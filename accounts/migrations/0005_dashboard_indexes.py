@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_studentperformance'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'user_class'], name='user_role_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'is_confirmed'], name='user_role_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'payment_confirmed'], name='user_role_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworkquestion',
+            index=models.Index(fields=['question_class'], name='homework_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworkquestion',
+            index=models.Index(fields=['date'], name='homework_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworkquestion',
+            index=models.Index(fields=['uploaded_by', 'date', 'question_class', 'subject'], name='homework_teacher_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['question', 'student'], name='answer_question_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(condition=models.Q(('marks__isnull', True)), fields=['student', 'question'], name='answer_student_ungraded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(condition=models.Q(('marks__isnull', False)), fields=['student', 'date'], name='answer_student_graded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['attempt_status', 'id'], name='answer_grading_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('user_class', models.CharField(max_length=10, verbose_name='Class')),
+                ('subject', models.CharField(max_length=100)),
+                ('marks_sum', models.IntegerField(default=0)),
+                ('marks_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['updated_at'], name='answer_updated_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyperformancerollup',
+            name='teacher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyperformancerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'user_class', 'subject', 'teacher'), name='unique_daily_rollup'),
+        ),
+    ]
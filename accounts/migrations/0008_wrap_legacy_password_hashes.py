@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+
+LEGACY_PREFIX = 'legacy_sha256$$'
+
+
+def wrap_legacy_hashes(apps, schema_editor):
+    # Bare sha256 hex digests become legacy_sha256 encoded passwords that
+    # Django can verify (and upgrade on the next login).
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    CustomUser.objects.filter(password__regex=r'^[0-9a-f]{64}$').update(
+        password=Concat(Value(LEGACY_PREFIX), 'password')
+    )
+
+
+def unwrap_legacy_hashes(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    CustomUser.objects.filter(password__startswith=LEGACY_PREFIX).update(
+        password=Substr('password', len(LEGACY_PREFIX) + 1)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_teacher_salary_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(wrap_legacy_hashes, unwrap_legacy_hashes),
+    ]
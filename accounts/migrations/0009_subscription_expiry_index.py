@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_wrap_legacy_password_hashes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['payment_confirmed', 'subscribed_till'], name='user_subscription_expiry_idx'),
+        ),
+    ]
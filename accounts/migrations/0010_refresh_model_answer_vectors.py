@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Intentionally a no-op. Vectors are not rebuilt here: that would tie this
+# migration's output to whatever grading code and settings are current when
+# it runs. Stored vectors older than VECTOR_VERSION 2 are rebuilt on first use.
+#
+# Operators: the grading tokenizer changed (accounts/tokenizer.py), so grades
+# of answers in Hindi or mixed script can move even with GRADING_ANALYZERS = {}.
+# After migrating, run `manage.py regrade_answers --dry-run` to see how many
+# marks change, then `manage.py regrade_answers` to apply them and store the
+# new vectors.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_subscription_expiry_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_refresh_model_answer_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworkquestion',
+            name='grading_backend',
+            field=models.CharField(blank=True, choices=[('tfidf', 'TF-IDF cosine'), ('hashed_ngram', 'Hashed word n-grams'), ('minhash', 'Character shingles (MinHash)')], max_length=20),
+        ),
+    ]
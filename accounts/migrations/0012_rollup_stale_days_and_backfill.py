@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:46
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    # Same totals as rollups.refresh(full=True), frozen here against the
+    # historical models, so the principal reports cover past days right after deploy.
+    StudentAnswer = apps.get_model('accounts', 'StudentAnswer')
+    DailyPerformanceRollup = apps.get_model('accounts', 'DailyPerformanceRollup')
+    RollupCheckpoint = apps.get_model('accounts', 'RollupCheckpoint')
+
+    started = timezone.now()
+    totals = (
+        StudentAnswer.objects.filter(marks__isnull=False, updated_at__lt=started)
+        .values('date', 'student__user_class', 'question__subject', 'question__uploaded_by_id')
+        .annotate(marks_sum=Sum('marks'), marks_count=Count('id'))
+        .order_by()
+    )
+    DailyPerformanceRollup.objects.all().delete()
+    DailyPerformanceRollup.objects.bulk_create(
+        (
+            DailyPerformanceRollup(
+                day=total['date'], user_class=total['student__user_class'] or '',
+                subject=total['question__subject'], teacher_id=total['question__uploaded_by_id'],
+                marks_sum=total['marks_sum'], marks_count=total['marks_count'],
+            )
+            for total in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+    RollupCheckpoint.objects.update_or_create(name='daily_performance', defaults={'processed_until': started})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_homeworkquestion_grading_backend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupStaleDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+            ],
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
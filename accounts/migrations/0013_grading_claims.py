@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_rollup_stale_days_and_backfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentanswer',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
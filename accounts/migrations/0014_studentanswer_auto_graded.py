@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:50
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_auto_graded(apps, schema_editor):
+    # Existing rows carry no provenance; the auto-grader's remarks are the only
+    # trace. From here on the grading paths set the flag themselves.
+    StudentAnswer = apps.get_model('accounts', 'StudentAnswer')
+    StudentAnswer.objects.filter(
+        Q(remarks__startswith='Auto-') | Q(remarks='Good! Try for better performance next time.')
+    ).update(auto_graded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_grading_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentanswer',
+            name='auto_graded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_auto_graded, migrations.RunPython.noop),
+    ]
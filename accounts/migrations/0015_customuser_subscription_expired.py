@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:06
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_expired(apps, schema_editor):
+    # Students the sweeper already deactivated: once active (subscribed_till
+    # set), unconfirmed now and past their end date.
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    CustomUser.objects.filter(
+        role='Student', payment_confirmed=False, subscribed_till__lt=timezone.now().date(),
+    ).update(subscription_expired=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_studentanswer_auto_graded'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='subscription_expired',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_expired, migrations.RunPython.noop),
+    ]
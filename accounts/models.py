@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from .managers import CustomUserManager # <-- Add this import
+from .managers import CustomUserManager, HomeworkQuestionQuerySet, StudentAnswerQuerySet # <-- Add this import
+from .grading import vectorize_text
+from .grading_backends import CHOICES as GRADING_BACKEND_CHOICES
 
 class CustomUser(AbstractUser):
     # Remove username since we will use email as the username
@@ -33,6 +35,9 @@ class CustomUser(AbstractUser):
     subscription_plan = models.CharField(max_length=100, blank=True, null=True)
     subscription_date = models.DateField(blank=True, null=True)
     subscribed_till = models.DateField(blank=True, null=True)
+    # Set by subscriptions.expire_subscriptions, cleared when the student pays again;
+    # keeps expired students out of the admin's pending-confirmation queue
+    subscription_expired = models.BooleanField(default=False)
     parent_phonepe = models.CharField(max_length=15, blank=True, null=True)
 
     security_question = models.CharField(max_length=255)
@@ -47,6 +52,19 @@ class CustomUser(AbstractUser):
     
     objects = CustomUserManager() # <-- Add this line
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Class leaderboards and rosters
+            models.Index(fields=['role', 'user_class'], name='user_role_class_idx'),
+            # Admin confirmation queues
+            models.Index(fields=['role', 'is_confirmed'], name='user_role_confirmed_idx'),
+            models.Index(fields=['role', 'payment_confirmed'], name='user_role_payment_idx'),
+            # Teacher salary ranking
+            models.Index(fields=['role', 'salary_points'], name='user_role_salary_idx'),
+            # Subscription expiry sweep: active subscriptions that ended before a date
+            models.Index(fields=['payment_confirmed', 'subscribed_till'], name='user_subscription_expiry_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -59,11 +77,37 @@ class HomeworkQuestion(models.Model):
     question = models.TextField()
     model_answer = models.TextField()
     due_date = models.DateField()
+    # Grading backend of this question; blank uses the subject's (see accounts/grading_backends.py)
+    grading_backend = models.CharField(max_length=20, blank=True, choices=GRADING_BACKEND_CHOICES)
+    # Pre-computed grading vector of model_answer (see accounts/grading.py)
+    model_answer_vector = models.JSONField(blank=True, null=True, editable=False)
+
+    objects = HomeworkQuestionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Student dashboard: homework of a class
+            models.Index(fields=['question_class'], name='homework_class_idx'),
+            # Principal activity report: homework created on a day
+            models.Index(fields=['date'], name='homework_date_idx'),
+            # Teacher dashboard: today's homework, and the class/subject detail view
+            models.Index(fields=['uploaded_by', 'date', 'question_class', 'subject'], name='homework_teacher_day_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.model_answer_vector = vectorize_text(self.model_answer, self.subject, self.grading_backend)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.question[:50]
 
 class StudentAnswer(models.Model):
+    # attempt_status values used by the grading queue (accounts/grading_queue.py).
+    # Negative so they never clash with attempt numbers imported from the sheets.
+    ATTEMPT_GRADED = 0
+    ATTEMPT_PENDING_GRADING = -1
+    ATTEMPT_GRADING = -2
+
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     question = models.ForeignKey(HomeworkQuestion, on_delete=models.CASCADE)
     date = models.DateField()
@@ -71,8 +115,101 @@ class StudentAnswer(models.Model):
     marks = models.IntegerField(null=True, blank=True)
     remarks = models.TextField(blank=True, null=True)
     
-    attempt_status = models.IntegerField(default=0)
+    attempt_status = models.IntegerField(default=ATTEMPT_GRADED)
+    # Marks written by the auto-grader rather than by a teacher
+    auto_graded = models.BooleanField(default=False)
+    # Set when a grading worker claims the answer (ATTEMPT_GRADING)
+    claimed_by = models.CharField(max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(blank=True, null=True)
     help_request = models.TextField(blank=True, null=True)
+    # Set on every write (bulk paths set it explicitly); drives the incremental rollups
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StudentAnswerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'student'], name='answer_question_student_idx'),
+            # Pending homework / previous attempt lookups (marks IS NULL)
+            models.Index(fields=['student', 'question'], condition=models.Q(marks__isnull=True),
+                         name='answer_student_ungraded_idx'),
+            # Graded answers of a student, ordered by date (revision zone, growth chart)
+            models.Index(fields=['student', 'date'], condition=models.Q(marks__isnull=False),
+                         name='answer_student_graded_idx'),
+            # Grading queue: oldest answers with a given attempt_status
+            models.Index(fields=['attempt_status', 'id'], name='answer_grading_queue_idx'),
+            # Incremental rollups: answers changed since the last run
+            models.Index(fields=['updated_at'], name='answer_updated_at_idx'),
+        ]
+
+    @property
+    def is_grading_pending(self):
+        return self.attempt_status in (self.ATTEMPT_PENDING_GRADING, self.ATTEMPT_GRADING)
 
     def __str__(self):
         return f"Answer by {self.student.user_name} for question ID {self.question.id}"
+
+
+class StudentPerformance(models.Model):
+    """
+    Running marks totals per student, per subject and overall (subject '').
+    Maintained incrementally by accounts/leaderboard.py whenever marks are
+    written; `manage.py rebuild_leaderboard` recomputes it from scratch.
+    """
+    OVERALL = ''
+
+    student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='performance')
+    subject = models.CharField(max_length=100, blank=True)
+    marks_sum = models.IntegerField(default=0)
+    marks_count = models.IntegerField(default=0)
+    average_marks = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_student_subject_performance'),
+        ]
+        indexes = [
+            models.Index(fields=['subject', '-average_marks'], name='performance_ranking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user_name} - {self.subject or 'Overall'}: {self.average_marks:.2f}"
+
+
+class DailyPerformanceRollup(models.Model):
+    """
+    Marks totals of graded answers per day, class, subject and teacher.
+    One fact table at this grain serves the principal's per-class,
+    per-subject and per-teacher reports; filled by `manage.py rollup_performance`.
+    """
+    day = models.DateField()
+    user_class = models.CharField(max_length=10, verbose_name="Class")
+    subject = models.CharField(max_length=100)
+    teacher = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    marks_sum = models.IntegerField(default=0)
+    marks_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'user_class', 'subject', 'teacher'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.user_class} {self.subject}: {self.marks_sum}/{self.marks_count}"
+
+
+class RollupStaleDay(models.Model):
+    """A day whose rollup rows lost a graded answer; refreshed on the next run."""
+    day = models.DateField()
+
+    def __str__(self):
+        return f"{self.day}"
+
+
+class RollupCheckpoint(models.Model):
+    """Watermark of the last incremental rollup run."""
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.processed_until}"
@@ -0,0 +1,24 @@
+"""Keyset (cursor) pagination on the primary key, for queues that grow without bound."""
+
+
+def keyset_page(queryset, after=None, size=50):
+    """
+    Return ``(rows, next_cursor)``: up to ``size`` rows of ``queryset`` with an
+    id greater than ``after``, in id order. ``next_cursor`` is the id to pass
+    as ``after`` for the following page, or None on the last page. Unlike
+    OFFSET, the cost of a page does not grow with how far in it is.
+    """
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset.order_by('id')[:size + 1])
+    if len(rows) > size:
+        return rows[:size], rows[size - 1].id
+    return rows, None
+
+
+def cursor_param(request, name):
+    """The integer cursor ``name`` from the query string, or None."""
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
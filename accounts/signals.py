@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import backends, dashboard_cache, leaderboard
+from .models import CustomUser, HomeworkQuestion, RollupStaleDay, StudentAnswer
+
+
+@receiver([post_save, post_delete], sender=HomeworkQuestion)
+def homework_changed(sender, instance, **kwargs):
+    dashboard_cache.homework_changed([instance.uploaded_by_id], [instance.question_class])
+
+
+@receiver(pre_save, sender=HomeworkQuestion)
+def remember_subject(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._saved_subject = (
+            HomeworkQuestion.objects.filter(id=instance.id).values_list('subject', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=HomeworkQuestion)
+def subject_changed(sender, instance, created, **kwargs):
+    old_subject = getattr(instance, '_saved_subject', None)
+    if not created and old_subject is not None and old_subject != instance.subject:
+        leaderboard.subject_changed(instance.id, old_subject, instance.subject)
+    instance._saved_subject = instance.subject
+
+
+def _question_of(answer):
+    # Callers usually have the question loaded already; a cascade delete does not.
+    if StudentAnswer.question.is_cached(answer):
+        return answer.question.question_class, answer.question.subject
+    return HomeworkQuestion.objects.filter(id=answer.question_id).values_list('question_class', 'subject').first()
+
+
+@receiver([post_save, post_delete], sender=StudentAnswer)
+def answer_changed(sender, instance, signal, **kwargs):
+    # Students answer their own class's homework, so the question's class is
+    # the student's class.
+    question = _question_of(instance)
+    dashboard_cache.answers_changed([instance.student_id], [question[0]] if question else [])
+
+    if signal is post_delete and instance.marks is not None:
+        # Neither leaves an updated_at behind for the incremental rollups
+        RollupStaleDay.objects.create(day=instance.date)
+        if question:
+            leaderboard.record_mark_changes([(instance.student_id, question[1], instance.marks, None)])
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # login() saves last_login on every sign-in, which is not in the cached
+    # session user; a hasher upgrade saves password, which changes no dashboard.
+    update_fields = set(update_fields or ())
+    if not update_fields or not update_fields <= {'last_login'}:
+        backends.forget(instance.id)
+    if not update_fields or not update_fields <= {'last_login', 'password'}:
+        dashboard_cache.bump('users')
@@ -0,0 +1,129 @@
+"""
+Student subscription activation.
+
+A plan mentioning "6 months" runs for 182 days, "1 year" for 365 days and
+anything else (including no plan) for 30 days, in any letter case.
+``activate_students`` applies that rule to any number of pending students in
+a single UPDATE; ``students_matching`` selects them by id or by the payment
+transaction id they submitted. ``renew_student`` confirms one student's
+payment whatever their state, adding to an active subscription.
+
+``expire_subscriptions`` is the other half: it turns payment_confirmed off
+once subscribed_till has passed, so login only ever checks the flag. It also
+marks the student ``subscription_expired``, which keeps them out of the
+admin's pending queue (and out of bulk or transaction-id activation) until
+they submit a new payment.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, DateField, Q, Value, When
+
+from . import backends, dashboard_cache
+from .models import CustomUser
+
+DEFAULT_DURATION = 30
+PLAN_DURATIONS = (('6 months', 182), ('1 year', 365))
+
+
+def plan_duration(plan):
+    """Days of subscription bought with ``plan``."""
+    for marker, days in PLAN_DURATIONS:
+        if plan and marker in plan.lower():
+            return days
+    return DEFAULT_DURATION
+
+
+def subscribed_till_expression(start):
+    """SQL equivalent of ``start + timedelta(days=plan_duration(subscription_plan))``."""
+    return Case(
+        *(When(subscription_plan__icontains=marker, then=Value(start + timedelta(days=days)))
+          for marker, days in PLAN_DURATIONS),
+        default=Value(start + timedelta(days=DEFAULT_DURATION)),
+        output_field=DateField(),
+    )
+
+
+def pending_students(queryset=None):
+    """Students waiting for their first or renewed payment to be confirmed."""
+    queryset = CustomUser.objects.all() if queryset is None else queryset
+    return queryset.filter(role='Student', payment_confirmed=False, subscription_expired=False)
+
+
+def students_matching(ids=(), transaction_ids=()):
+    """Students whose id is in ``ids`` or whose submitted transaction id is in ``transaction_ids``."""
+    transaction_ids = {value.strip() for value in transaction_ids if value and value.strip()}
+    return CustomUser.objects.filter(Q(id__in=ids) | Q(transaction_id__in=transaction_ids), role='Student')
+
+
+def activate_students(queryset):
+    """
+    Confirm the payment of the pending students in ``queryset`` and start
+    their subscriptions today, in one transaction with a single UPDATE.
+    Returns ``(matched, activated)``: how many students ``queryset`` matched
+    and how many of them were pending and are now active.
+    """
+    today = date.today()
+    with transaction.atomic():
+        students = set(queryset.filter(role='Student').select_for_update().values_list('id', flat=True))
+        pending = list(pending_students().filter(id__in=students).values_list('id', flat=True))
+        activated = CustomUser.objects.filter(id__in=pending).update(
+            payment_confirmed=True, subscription_date=today, subscribed_till=subscribed_till_expression(today),
+        ) if pending else 0
+    # .update() sends no post_save signals
+    if activated:
+        backends.forget(*pending)
+        dashboard_cache.bump('users')
+    return len(students), activated
+
+
+def renew_student(student_id):
+    """
+    Confirm a payment of one student. A pending or expired student starts a
+    subscription today; an active one gets the plan's days added to the end
+    of the current subscription, so a renewal paid early loses nothing.
+    Returns ``(student, renewed)``, or ``(None, False)`` for an unknown id.
+    """
+    today = date.today()
+    with transaction.atomic():
+        student = CustomUser.objects.select_for_update().filter(id=student_id, role='Student').first()
+        if student is None:
+            return None, False
+        renewed = bool(student.payment_confirmed and student.subscribed_till and student.subscribed_till >= today)
+        start = student.subscribed_till if renewed else today
+        student.payment_confirmed = True
+        student.subscription_expired = False
+        student.subscription_date = today
+        student.subscribed_till = start + timedelta(days=plan_duration(student.subscription_plan))
+        student.save(update_fields=[
+            'payment_confirmed', 'subscription_expired', 'subscription_date', 'subscribed_till',
+        ])
+    return student, renewed
+
+
+def expired_students(today=None):
+    """Active students whose subscription ended before ``today`` (uses user_subscription_expiry_idx)."""
+    return CustomUser.objects.filter(
+        payment_confirmed=True, subscribed_till__lt=today or date.today(), role='Student',
+    )
+
+
+def expire_subscriptions(today=None, batch_size=1000):
+    """
+    Deactivate every expired subscription, ``batch_size`` rows per UPDATE so
+    no statement locks a large part of the user table. Returns ``(expired, batches)``.
+    """
+    expired = batches = 0
+    while True:
+        ids = list(expired_students(today).order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Re-check the condition so a student renewed meanwhile is left alone
+        expired += expired_students(today).filter(id__in=ids).update(
+            payment_confirmed=False, subscription_expired=True,
+        )
+        batches += 1
+        backends.forget(*ids)
+    if expired:
+        dashboard_cache.bump('users')
+    return expired, batches
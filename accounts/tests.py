@@ -1,3 +1,1066 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pandas as pd
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection
+from asgiref.sync import async_to_sync
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import backends, checks, dashboard_cache, grading, grading_backends, grading_pool, instrumentation, leaderboard, rollups, throttling, tokenizer
+from .grading import (
+    get_grade_from_similarity, get_text_similarity, grade_answer, score_against_vector, score_batch, vectorize_text,
+)
+from .grading_queue import claim_batch, grade_batch, requeue_stuck, run_worker
+from .hashers import ConfigurablePBKDF2PasswordHasher, wrap_legacy_hash
+from .models import (
+    CustomUser, DailyPerformanceRollup, HomeworkQuestion, RollupCheckpoint, StudentAnswer, StudentPerformance,
+)
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+except ImportError:
+    TfidfVectorizer = None
+
+GRADING_SAMPLES = [
+    ("Photosynthesis uses sunlight to make food", "Plants make food from sunlight by photosynthesis"),
+    ("The mitochondria is the powerhouse of the cell", "The mitochondria is the powerhouse of the cell"),
+    ("water water water boils", "Water boils at 100 degrees at sea level"),
+    ("India became independent in 1947", "India got independence on 15 August 1947"),
+    ("a b c", "The answer is unrelated"),
+    ("Newton gave three laws of motion", "Newton's three laws of motion describe force and motion"),
+]
+
+PROCESS_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def reference_similarity(text1, text2):
+    try:
+        vectors = TfidfVectorizer().fit_transform([text1, text2])
+        return cosine_similarity(vectors)[0, 1] * 100
+    except ValueError:
+        return 0.0
+
+
+class GradingEngineTests(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+
+    @skipUnless(TfidfVectorizer, "scikit-learn is not installed")
+    def test_matches_per_submission_vectorizer(self):
+        for answer, model_answer in GRADING_SAMPLES:
+            expected = reference_similarity(answer, model_answer)
+            self.assertAlmostEqual(get_text_similarity(answer, model_answer), expected, places=6)
+            self.assertEqual(
+                get_grade_from_similarity(get_text_similarity(answer, model_answer)),
+                get_grade_from_similarity(expected),
+            )
+
+    def test_vector_is_stored_and_refreshed_on_save(self):
+        question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+            subject='Science', question='What is photosynthesis?', model_answer='Plants make food from sunlight',
+        )
+        question.refresh_from_db()
+        self.assertEqual(question.model_answer_vector['terms']['sunlight'], 1)
+
+        question.model_answer = 'Chlorophyll absorbs light'
+        question.save()
+        question.refresh_from_db()
+        self.assertNotIn('sunlight', question.model_answer_vector['terms'])
+        self.assertEqual(grade_answer(question, 'Chlorophyll absorbs light')[1], 5)
+
+    def test_score_batch_matches_single_scoring(self):
+        model_answer = GRADING_SAMPLES[0][1]
+        answers = [answer for answer, _ in GRADING_SAMPLES] + ['']
+        scores = score_batch(vectorize_text(model_answer), answers)
+        for answer, score in zip(answers, scores):
+            self.assertAlmostEqual(score, get_text_similarity(answer, model_answer), places=6)
+
+
+class TokenizerTests(TestCase):
+    def test_devanagari_words_stay_whole_and_spellings_normalise(self):
+        self.assertEqual(
+            tokenizer.tokenize('पानी का रंग नीला होता है। Photosynthesis ३ बार'),
+            ['पानी', 'का', 'रंग', 'नीला', 'होता', 'है', 'photosynthesis', 'बार'],
+        )
+        # Precomposed vs nukta sequence, zero-width joiner, Devanagari digits
+        self.assertEqual(tokenizer.tokenize('\u095b\u0930\u0942\u0930\u0940 १२'),
+                         tokenizer.tokenize('\u091c\u093c\u0930\u0942\u200d\u0930\u0940 12'))
+
+    def test_plain_english_tokens_are_unchanged(self):
+        for answer, model_answer in GRADING_SAMPLES:
+            for text in (answer, model_answer):
+                self.assertEqual(tokenizer.tokenize(text), re.findall(r"(?u)\b\w\w+\b", text.lower()))
+
+    @override_settings(GRADING_ANALYZERS={'Hindi': {'stop_words': ['hi'], 'stem': ['hi', 'en']}})
+    def test_subject_analyzer_is_stored_in_the_vector_and_used_for_answers(self):
+        vector = vectorize_text('पौधों को पानी चाहिए', 'Hindi')
+        self.assertEqual(vector['analyzer'], {'stop_words': ['hi'], 'stem': ['en', 'hi']})
+        self.assertEqual(set(vector['terms']), {'पौध', 'पान', 'चाह'})
+        self.assertAlmostEqual(score_against_vector(vector, 'पौधे पानी चाहते'), 100.0)
+        self.assertEqual(vectorize_text('पौधों को पानी', 'Science')['analyzer'], {})
+
+        with override_settings(GRADING_ANALYZERS={'Hindi': {'stem': ['fr']}}):
+            with self.assertRaises(ImproperlyConfigured):
+                vectorize_text('text', 'Hindi')
+
+    def test_stale_vectors_are_rebuilt_once(self):
+        grading._vector_cache.clear()
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=teacher,
+            subject='Science', question='Q', model_answer='Plants make food from sunlight',
+        )
+        HomeworkQuestion.objects.filter(id=question.id).update(model_answer_vector={'version': 1})
+        question.refresh_from_db()
+
+        with mock.patch('accounts.grading.vectorize_text', wraps=vectorize_text) as vectorize:
+            for _ in range(3):
+                self.assertEqual(grade_answer(question, 'Plants make food from sunlight')[1], 5)
+        self.assertEqual(vectorize.call_count, 1)
+
+
+class GradingBackendTests(TestCase):
+    def setUp(self):
+        grading._vector_cache.clear()
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+
+    def create_question(self, subject='Science', **kwargs):
+        return HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+            subject=subject, question='Q', model_answer=GRADING_SAMPLES[0][1], **kwargs,
+        )
+
+    def test_every_backend_scores_on_the_same_scale(self):
+        model_answer = GRADING_SAMPLES[0][1]
+        answers = [model_answer, GRADING_SAMPLES[0][0], 'Newton gave three laws of motion', '']
+        for name in grading_backends.BACKENDS:
+            with self.subTest(backend=name):
+                vector = vectorize_text(model_answer, backend=name)
+                self.assertEqual(vector['backend'], name)
+                scores = [score_against_vector(vector, answer) for answer in answers]
+                self.assertAlmostEqual(scores[0], 100.0)
+                self.assertGreater(scores[1], scores[2])
+                self.assertLess(scores[2], 40)
+                self.assertEqual(scores[3], 0.0)
+                for batched, single in zip(score_batch(vector, answers), scores):
+                    self.assertAlmostEqual(batched, single, places=6)
+
+    @override_settings(GRADING_BACKENDS={'GK': 'minhash'})
+    def test_backend_is_chosen_per_question_then_per_subject(self):
+        self.assertEqual(self.create_question().model_answer_vector['backend'], 'tfidf')
+        self.assertEqual(self.create_question('GK').model_answer_vector['backend'], 'minhash')
+        question = self.create_question('GK', grading_backend='hashed_ngram')
+        self.assertEqual(question.model_answer_vector['backend'], 'hashed_ngram')
+        self.assertEqual(grade_answer(question, question.model_answer)[1], 5)
+
+        # A stored vector built by another backend is stale
+        question = HomeworkQuestion.objects.get(subject='GK', grading_backend='')
+        self.assertIs(grading.question_vector(question), question.model_answer_vector)
+        with override_settings(GRADING_BACKENDS={}):
+            self.assertEqual(grading.question_vector(question)['backend'], 'tfidf')
+
+        with override_settings(GRADING_DEFAULT_BACKEND='bm25'):
+            with self.assertRaises(ImproperlyConfigured):
+                vectorize_text('text', 'Science')
+
+    def test_harness_reports_every_backend(self):
+        question = self.create_question()
+        student = CustomUser.objects.create(email='student@example.com', user_name='Student', role='Student')
+        for i, (answer, _) in enumerate(GRADING_SAMPLES):
+            StudentAnswer.objects.create(student=student, question=question, date=date.today(), answer=answer,
+                                         marks=i % 5 + 1, remarks='Good! Try for better performance next time.')
+        StudentAnswer.objects.create(student=student, question=question, date=date.today(), answer='x',
+                                     marks=5, remarks='Auto-Graded: Excellent! (99.00%)', auto_graded=True)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'backends.json')
+            call_command('bench_grading_backends', json_path=path, stdout=StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual(report['answers'], len(GRADING_SAMPLES))
+        self.assertEqual(set(report['backends']), set(grading_backends.BACKENDS))
+        for result in report['backends'].values():
+            self.assertLessEqual(result['exact_agreement'], result['within_one_agreement'])
+            self.assertGreater(result['vector_bytes'], 0)
+
+
+class RegradeCommandTests(TestCase):
+    def setUp(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.student = CustomUser.objects.create(email='student@example.com', user_name='Student', role='Student')
+        self.question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=teacher,
+            subject='Science', question='What is photosynthesis?', model_answer='Something unrelated',
+        )
+        self.answer = StudentAnswer.objects.create(
+            student=self.student, question=self.question, date=date.today(),
+            answer='Plants make food from sunlight', marks=None, remarks='Auto-Remark: 0.00%',
+        )
+        self.question.model_answer = 'Plants make food from sunlight'
+        self.question.save()
+
+    def test_dry_run_does_not_write(self):
+        out = StringIO()
+        call_command('regrade_answers', '--dry-run', stdout=out)
+        self.assertIn('would change 1', out.getvalue())
+        self.answer.refresh_from_db()
+        self.assertIsNone(self.answer.marks)
+
+    def test_regrade_writes_marks(self):
+        call_command('regrade_answers', stdout=StringIO())
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.marks, 5)
+
+    def test_regrade_stores_rebuilt_vectors(self):
+        HomeworkQuestion.objects.update(model_answer_vector={'version': 1, 'terms': {}, 'sq_norm': 0})
+        out = StringIO()
+        call_command('regrade_answers', stdout=out)
+        self.assertIn('Stored 1 rebuilt model answer vectors', out.getvalue())
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.model_answer_vector, vectorize_text(self.question.model_answer, 'Science'))
+
+
+@override_settings(GRADING_MODE='queue')
+class GradingQueueTests(TestCase):
+    def setUp(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.student = CustomUser.objects.create(
+            email='student@example.com', user_name='Student', role='Student', user_class='9th', payment_confirmed=True,
+        )
+        self.question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=teacher,
+            subject='Science', question='What is photosynthesis?', model_answer='Plants make food from sunlight',
+        )
+        self.client.force_login(self.student)
+
+    def test_submission_is_queued_then_graded_by_worker(self):
+        url = reverse('answer', args=[self.question.id])
+        self.client.post(url, {'student_answer': 'Plants make food'})
+        self.client.post(url, {'student_answer': 'Plants make food from sunlight'})
+        answer = StudentAnswer.objects.get()
+        self.assertEqual(answer.attempt_status, StudentAnswer.ATTEMPT_PENDING_GRADING)
+        self.assertIsNone(answer.marks)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'waiting for auto-grading')
+
+        run_worker(once=True, log=lambda line: None)
+        answer.refresh_from_db()
+        self.assertEqual(answer.attempt_status, StudentAnswer.ATTEMPT_GRADED)
+        self.assertEqual(answer.marks, 5)
+        self.assertTrue(answer.auto_graded)
+
+    def test_rows_lost_by_a_worker_are_neither_written_nor_credited(self):
+        url = reverse('answer', args=[self.question.id])
+        self.client.post(url, {'student_answer': 'Plants make food from sunlight'})
+        token, ids = claim_batch(10)
+        self.assertEqual(claim_batch(10)[1], [])  # nothing left for a second worker
+
+        # The student resubmits while the first worker is grading
+        self.client.post(url, {'student_answer': 'Plants make food from sunlight'})
+        self.assertEqual(grade_batch(token, ids), 0)
+        self.assertFalse(StudentPerformance.objects.filter(student=self.student, marks_count__gt=0).exists())
+
+        run_worker(once=True, log=lambda line: None)
+        self.assertEqual(StudentPerformance.objects.get(student=self.student, subject='Science').marks_count, 1)
+
+    def test_only_stale_claims_are_requeued(self):
+        self.client.post(reverse('answer', args=[self.question.id]), {'student_answer': 'Plants'})
+        claim_batch(10)
+        self.assertEqual(requeue_stuck(), 0)
+        StudentAnswer.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stuck(), 1)
+        self.assertEqual(StudentAnswer.objects.get().attempt_status, StudentAnswer.ATTEMPT_PENDING_GRADING)
+
+
+class StudentDashboardQueryTests(TestCase):
+    # session + user + the dashboard panels; must not grow with homework volume
+    QUERY_BUDGET = 11
+
+    def setUp(self):
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.student = CustomUser.objects.create(
+            email='student@example.com', user_name='Student', role='Student', user_class='9th', payment_confirmed=True,
+        )
+        self.client.force_login(self.student)
+        cache.clear()
+
+    def add_homework(self, count):
+        for i in range(count):
+            question = HomeworkQuestion.objects.create(
+                question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+                subject='Science', question=f'Question {i}', model_answer='Plants make food from sunlight',
+            )
+            StudentAnswer.objects.create(
+                student=self.student, question=question, date=date.today(), answer='Plants',
+                marks=None if i % 2 else 4, remarks='Try again',
+            )
+
+    def dashboard_queries(self):
+        cache.clear()  # cold: no cached session, user or dashboard context
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self.add_homework(2)
+        small = self.dashboard_queries()
+        self.add_homework(30)
+        self.assertEqual(self.dashboard_queries(), small)
+        self.assertLessEqual(small, self.QUERY_BUDGET)
+
+    def test_warm_request_skips_session_and_user_queries(self):
+        self.add_homework(2)
+        self.dashboard_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('dashboard'))
+        self.assertEqual(len(queries), 0)
+
+    def test_large_text_columns_stay_in_the_database(self):
+        self.add_homework(2)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        sql = ' '.join(query['sql'] for query in queries)
+        for column in ('"model_answer"', '"model_answer_vector"', '"help_request"', '"instructions"'):
+            self.assertNotIn(column, sql)
+        self.assertEqual(len(response.context['revision_answers'][0]['question_preview']), len('Question 0'))
+
+    def test_saving_the_user_refreshes_the_snapshot(self):
+        self.client.get(reverse('dashboard'))
+        CustomUser.objects.filter(id=self.student.id).update(user_name='Renamed')
+        self.student.refresh_from_db()
+        self.student.save()
+        self.assertContains(self.client.get(reverse('dashboard')), 'Renamed')
+
+    def test_password_change_in_another_process_ends_old_sessions(self):
+        self.client.get(reverse('dashboard'))
+        with mock.patch.object(backends, 'cache', caches.create_connection('default')):
+            self.student.set_password('new password')
+            self.student.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith('/login/'))
+
+    def test_process_local_cache_never_serves_snapshots(self):
+        with override_settings(CACHES=PROCESS_CACHE):
+            self.client.get(reverse('dashboard'))
+            CustomUser.objects.filter(id=self.student.id).update(payment_confirmed=False, user_name='Renamed')
+            self.assertContains(self.client.get(reverse('dashboard')), 'Renamed')
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.students = [
+            CustomUser.objects.create(email=f's{i}@example.com', user_name=f'S{i}', role='Student', user_class='9th')
+            for i in range(3)
+        ]
+        self.question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=teacher,
+            subject='Science', question='Q', model_answer='A',
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        changes = []
+        for student, marks in zip(self.students, [5, 3, 4]):
+            StudentAnswer.objects.create(student=student, question=self.question, date=date.today(), answer='A', marks=marks)
+            changes.append((student.id, 'Science', None, marks))
+        leaderboard.record_mark_changes(changes)
+        leaderboard.record_mark_changes([(self.students[0].id, 'Science', 5, 3)])
+        StudentAnswer.objects.filter(student=self.students[0]).update(marks=3)
+
+        incremental = sorted(StudentPerformance.objects.values_list('student_id', 'subject', 'marks_sum', 'marks_count', 'average_marks'))
+        leaderboard.rebuild()
+        rebuilt = sorted(StudentPerformance.objects.values_list('student_id', 'subject', 'marks_sum', 'marks_count', 'average_marks'))
+        self.assertEqual(incremental, rebuilt)
+
+        self.assertEqual(leaderboard.class_top_students('9th')[0]['student__user_name'], 'S2')
+        self.assertEqual(leaderboard.student_rank(self.students[1])['rank'], 2)
+        self.assertEqual(len(leaderboard.classwise_top_students()['9th']), 3)
+
+    def test_deletes_admin_edits_and_subject_moves_match_rebuild(self):
+        def performance():
+            return sorted(StudentPerformance.objects.filter(marks_count__gt=0).values_list(
+                'student_id', 'subject', 'marks_sum', 'marks_count', 'average_marks'))
+
+        other = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.question.uploaded_by,
+            subject='Maths', question='Q2', model_answer='A',
+        )
+        answers = []
+        for student, question, marks in [(self.students[0], self.question, 5), (self.students[1], self.question, 3),
+                                         (self.students[0], other, 2), (self.students[2], other, 4)]:
+            answers.append(StudentAnswer.objects.create(student=student, question=question, date=date.today(),
+                                                        answer='A', marks=marks))
+            leaderboard.record_mark_changes([(student.id, question.subject, None, marks)])
+
+        answers[1].delete()
+        answer = StudentAnswer.objects.get(id=answers[0].id)
+        answer.marks = 1
+        admin.site._registry[StudentAnswer].save_model(None, answer, None, True)
+        self.question.subject = 'Biology'
+        self.question.save()
+        self.students[2].delete()
+        incremental = performance()
+
+        leaderboard.rebuild()
+        self.assertEqual(incremental, performance())
+        self.assertEqual(incremental, sorted([
+            (self.students[0].id, '', 3, 2, 1.5), (self.students[0].id, 'Biology', 1, 1, 1.0),
+            (self.students[0].id, 'Maths', 2, 1, 2.0),
+        ]))
+
+        other.delete()
+        self.assertEqual(performance(), [(self.students[0].id, '', 1, 1, 1.0), (self.students[0].id, 'Biology', 1, 1, 1.0)])
+
+
+    def test_teacher_ranking_window_and_fallback_agree(self):
+        teachers = [
+            CustomUser.objects.create(email=f't{i}@example.com', user_name=f'T{i}', role='Teacher', salary_points=points)
+            for i, points in enumerate([50, 90, 70, 70, 10, 30])
+        ]
+        ranking = leaderboard.teacher_ranking(teachers[3], top=2, around=1)
+        self.assertEqual(ranking['rank'], 2)  # ties with T2 share a rank
+        self.assertEqual([row['user_name'] for row in ranking['top']], ['T1', 'T2'])
+        self.assertEqual([row['user_name'] for row in ranking['neighbours']], ['T2', 'T3', 'T0'])
+
+        with mock.patch.object(connection.features, 'supports_over_clause', False):
+            self.assertEqual(leaderboard.teacher_ranking(teachers[3], top=2, around=1), ranking)
+        self.assertIsNone(leaderboard.teacher_ranking(self.students[0])['rank'])
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[throttling.CACHE_ALIAS].clear()
+        legacy = hashlib.sha256(b'secret123').hexdigest()
+        self.teacher = CustomUser.objects.create(
+            email='teacher@example.com', user_name='Teacher', role='Teacher', is_confirmed=True,
+            password=wrap_legacy_hash(legacy),
+        )
+
+    def login(self, password):
+        return self.client.post(reverse('login'), {'gmail': 'Teacher@example.com ', 'password': password})
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        self.assertRedirects(self.login('secret123'), reverse('dashboard'), fetch_redirect_response=False)
+        self.teacher.refresh_from_db()
+        self.assertTrue(self.teacher.password.startswith('pbkdf2_sha256$1000$'))
+        self.client.logout()
+        self.assertRedirects(self.login('secret123'), reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_wrong_password_is_rejected(self):
+        self.assertContains(self.login('wrong'), 'Incorrect Gmail ID or Password.')
+        self.teacher.refresh_from_db()
+        self.assertTrue(self.teacher.password.startswith('legacy_sha256$$'))
+
+    def test_failed_login_hashes_once(self):
+        self.teacher.set_password('secret123')
+        self.teacher.save()
+        for email in ('teacher@example.com', 'nobody@example.com'):
+            with mock.patch.object(ConfigurablePBKDF2PasswordHasher, 'encode', autospec=True,
+                                   side_effect=ConfigurablePBKDF2PasswordHasher.encode) as encode:
+                response = self.client.post(reverse('login'), {'gmail': email, 'password': 'wrong'})
+            self.assertContains(response, 'Incorrect Gmail ID or Password.')
+            self.assertEqual(encode.call_count, 1)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        caches[throttling.CACHE_ALIAS].clear()
+
+    @override_settings(LOGIN_THROTTLE_BUCKETS={'ip': (60, 1.0), 'email': (3, 0.01)}, PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_email_bucket_rejects_before_any_query(self):
+        before = throttling.stats()
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('login'), {'gmail': 'x@example.com', 'password': 'p'}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('forgot_password'), {'gmail': 'X@example.com'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 100)
+        self.assertEqual(throttling.stats()['throttled_email'] - before['throttled_email'], 1)
+        # Other accounts from the same address, and the same account from elsewhere, are unaffected
+        self.assertEqual(self.client.post(reverse('login'), {'gmail': 'y@example.com', 'password': 'p'}).status_code, 200)
+        self.assertEqual(self.client.post(reverse('login'), {'gmail': 'x@example.com', 'password': 'p'},
+                                          REMOTE_ADDR='203.0.113.9').status_code, 200)
+
+    def test_ip_bucket_is_opt_in(self):
+        for i in range(10):
+            self.assertEqual(self.client.post(reverse('forgot_password'), {'gmail': f'{i}@example.com'}).status_code, 200)
+
+    @override_settings(LOGIN_THROTTLE_BUCKETS={'ip': (2, 0.01), 'email': (5, 0.01)}, THROTTLE_NUM_PROXIES=1)
+    def test_ip_bucket_uses_the_address_the_proxy_saw(self):
+        def post(i, forwarded_for):
+            return self.client.post(reverse('forgot_password'), {'gmail': f'{i}@example.com'},
+                                    HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='10.0.0.1').status_code
+
+        # The client-supplied part of the header is ignored
+        self.assertEqual([post(i, f'198.51.100.{i}, 203.0.113.5') for i in range(3)], [200, 200, 429])
+        self.assertEqual(post(3, '203.0.113.6'), 200)
+
+    @override_settings(LOGIN_THROTTLE_BUCKETS={'email': (2, 0.01)})
+    def test_rejection_runs_no_query_with_the_default_caches(self):
+        for _ in range(2):
+            self.client.post(reverse('forgot_password'), {'gmail': 'x@example.com'})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post(reverse('forgot_password'), {'gmail': 'x@example.com'}).status_code, 429)
+
+    def test_throttle_cache_is_checked(self):
+        self.assertEqual(checks.throttle_cache(None), [])
+        with override_settings(CACHES={**settings.CACHES, 'throttle': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache',
+        }}):
+            self.assertEqual([error.id for error in checks.throttle_cache(None)], ['accounts.W002'])
+        with override_settings(CACHES=PROCESS_CACHE):
+            self.assertEqual([error.id for error in checks.throttle_cache(None)], ['accounts.E001'])
+
+    @override_settings(LOGIN_THROTTLE_BUCKETS={'ip': (2, 1.0), 'email': (5, 0.01)})
+    def test_bucket_refills(self):
+        ip = [('ip', '10.0.0.1')]
+        self.assertEqual(throttling.take_tokens(ip, now=100), (None, 0))
+        self.assertEqual(throttling.take_tokens(ip, now=100), (None, 0))
+        self.assertEqual(throttling.take_tokens(ip, now=100), ('ip', 1))
+        self.assertEqual(throttling.take_tokens(ip, now=101), (None, 0))
+
+
+class AdminQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create(email='admin@example.com', user_name='Admin', role='Admin', is_confirmed=True)
+        self.students = [
+            CustomUser.objects.create(email=f's{i}@example.com', user_name=f'S{i}', role='Student', subscription_plan=plan)
+            for i, plan in enumerate(['1 month', '6 months', '1 year', None, '1 month'])
+        ]
+        self.client.force_login(self.admin)
+
+    @mock.patch('accounts.views.ADMIN_QUEUE_PAGE_SIZE', 2)
+    def test_queue_pages_follow_the_cursor(self):
+        seen, after = [], None
+        while True:
+            response = self.client.get(reverse('dashboard'), {'students_after': after} if after else {})
+            self.assertEqual(response.context['unconfirmed_students_count'], 5)
+            seen += [student.id for student in response.context['unconfirmed_students']]
+            after = response.context['students_next']
+            if after is None:
+                break
+        self.assertEqual(seen, [student.id for student in self.students])
+
+    def test_bulk_confirm_is_one_update(self):
+        ids = [student.id for student in self.students[:4]]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('confirm_students'), {'student_ids': ids})
+        self.assertEqual(
+            sum(query['sql'].startswith('UPDATE "accounts_customuser"') for query in queries), 1
+        )
+
+        durations = {
+            student.user_name: (student.subscribed_till - date.today()).days
+            for student in CustomUser.objects.filter(id__in=ids, payment_confirmed=True, subscription_date=date.today())
+        }
+        self.assertEqual(durations, {'S0': 30, 'S1': 182, 'S2': 365, 'S3': 30})
+        self.assertFalse(CustomUser.objects.get(id=self.students[4].id).payment_confirmed)
+
+    def test_confirming_an_active_student_renews_the_subscription(self):
+        student = self.students[1]
+        CustomUser.objects.filter(id=student.id).update(
+            payment_confirmed=True, subscribed_till=date.today() + timedelta(days=10),
+        )
+        response = self.client.get(reverse('confirm_student', args=[student.id]), follow=True)
+        self.assertContains(response, 'subscription has been renewed')
+        student.refresh_from_db()
+        self.assertEqual(student.subscribed_till, date.today() + timedelta(days=10 + 182))
+
+    def test_plan_names_are_matched_in_any_case(self):
+        CustomUser.objects.filter(id=self.students[1].id).update(subscription_plan='6 Months')
+        CustomUser.objects.filter(id=self.students[2].id).update(subscription_plan='1 YEAR')
+        self.client.post(reverse('confirm_students'), {'student_ids': [self.students[1].id]})
+        self.client.get(reverse('confirm_student', args=[self.students[2].id]))
+        durations = [
+            (student.subscribed_till - date.today()).days
+            for student in CustomUser.objects.filter(id__in=[self.students[1].id, self.students[2].id]).order_by('id')
+        ]
+        self.assertEqual(durations, [182, 365])
+
+    def test_command_activates_by_transaction_id(self):
+        CustomUser.objects.filter(id=self.students[1].id).update(transaction_id='TXN-2')
+        CustomUser.objects.filter(id=self.students[2].id).update(transaction_id='TXN-3', payment_confirmed=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'statement.csv')
+            with open(path, 'w') as fh:
+                fh.write('Transaction ID,Amount\nTXN-2,500\nTXN-3,900\nTXN-404,100\n')
+            out = StringIO()
+            call_command('activate_students', transactions_file=path, ids=[self.students[0].id], stdout=out)
+        self.assertIn('3 students matched, 2 activated, 1 already active or expired', out.getvalue())
+        self.assertEqual(
+            set(CustomUser.objects.filter(payment_confirmed=True, role='Student').values_list('user_name', flat=True)),
+            {'S0', 'S1', 'S2'},
+        )
+
+
+class SubscriptionExpiryTests(TestCase):
+    def test_sweeper_deactivates_only_expired_students(self):
+        today = date.today()
+        for name, till in [('expired', today - timedelta(days=1)), ('last-day', today), ('no-date', None)]:
+            CustomUser.objects.create(email=f'{name}@example.com', user_name=name, role='Student',
+                                      payment_confirmed=True, subscribed_till=till)
+        CustomUser.objects.create(email='old@example.com', user_name='old', role='Student',
+                                  payment_confirmed=True, subscribed_till=today - timedelta(days=30))
+
+        out = StringIO()
+        call_command('expire_subscriptions', batch_size=1, stdout=out)
+        self.assertIn('Deactivated 2 expired subscriptions in 2 batches', out.getvalue())
+        self.assertEqual(
+            set(CustomUser.objects.filter(payment_confirmed=True).values_list('user_name', flat=True)),
+            {'last-day', 'no-date'},
+        )
+
+    def test_expired_students_stay_out_of_the_pending_queue(self):
+        admin = CustomUser.objects.create(email='admin@example.com', user_name='Admin', role='Admin', is_confirmed=True)
+        student = CustomUser.objects.create(
+            email='expired@example.com', user_name='expired', role='Student', transaction_id='TXN-OLD',
+            payment_confirmed=True, subscribed_till=date.today() - timedelta(days=1),
+        )
+        call_command('expire_subscriptions', stdout=StringIO())
+        cache.clear()
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['unconfirmed_students_count'], 0)
+        # Neither a stale checkbox nor the old transaction id reactivates the student
+        self.client.post(reverse('confirm_students'), {'student_ids': [student.id], 'transaction_ids': 'TXN-OLD'})
+        student.refresh_from_db()
+        self.assertFalse(student.payment_confirmed)
+
+        # Paying again puts them back in the queue
+        self.client.post(reverse('payment', args=[student.id]), {'transaction_id': 'TXN-NEW'})
+        self.assertEqual(self.client.get(reverse('dashboard')).context['unconfirmed_students_count'], 1)
+        self.client.post(reverse('confirm_students'), {'transaction_ids': 'TXN-NEW'})
+        student.refresh_from_db()
+        self.assertTrue(student.payment_confirmed)
+        self.assertGreater(student.subscribed_till, date.today())
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.student = CustomUser.objects.create(
+            email='student@example.com', user_name='Student', role='Student', user_class='9th', payment_confirmed=True,
+        )
+        self.question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+            subject='Science', question='Q', model_answer='Plants make food from sunlight',
+        )
+
+    def test_views_are_timed_per_url_name(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('dashboard'))
+        self.client.post(reverse('answer', args=[self.question.id]), {'student_answer': 'Plants make food from sunlight'})
+
+        report = instrumentation.snapshot()
+        self.assertGreater(report['dashboard']['avg_queries'], 0)
+        self.assertGreater(report['dashboard']['avg_template_ms'], 0)
+        self.assertGreater(report['answer']['avg_grading_ms'], 0)
+        self.assertEqual(sum(report['answer']['latency_histogram_ms'].values()), 1)
+
+    def test_server_timing_is_sent_to_staff_only(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('login')))
+        self.client.force_login(self.student)
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard')))
+        self.student.is_staff = True
+        self.student.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertRegex(response['Server-Timing'], r'^sql;dur=[\d.]+, grading;dur=0.0, template;dur=[\d.]+, total;dur=')
+
+    def test_middleware_runs_no_uncounted_queries(self):
+        self.student.is_staff = True
+        self.student.save()
+        self.client.force_login(self.student)
+        cache.clear()
+        # The login page never looks at request.user, so neither may the middleware
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('login'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(len(queries), instrumentation.snapshot()['login']['max_queries'])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        admin = CustomUser.objects.create(email='admin@example.com', user_name='Admin', role='Admin')
+        self.client.force_login(admin)
+        self.assertIn('views', self.client.get(reverse('metrics')).json())
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_school_runs_every_scenario_cleanly(self):
+        call_command('generate_school_data', classes=2, teachers=2, students_per_class=3, questions_per_teacher=4,
+                     stdout=StringIO())
+        self.assertEqual(CustomUser.objects.filter(role='Student').count(), 6)
+        answers = StudentAnswer.objects.count()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            call_command('bench_workflow', requests=2, warmup=1, json_path=path, stdout=StringIO())
+            with open(path) as fh:
+                report = json.load(fh)
+        self.assertEqual({name: r['errors'] for name, r in report['scenarios'].items() if r['errors']}, {})
+        self.assertEqual(len(report['scenarios']), 7)
+        self.assertEqual(StudentAnswer.objects.count(), answers)  # writes were rolled back
+
+        call_command('bench_page_memory', questions=2, students=2, text_chars=50, stdout=StringIO())
+        self.assertEqual(StudentAnswer.objects.count(), answers)
+
+
+@override_settings(ROOT_URLCONF='homework_project.urls_asgi')
+class AsyncViewTests(TransactionTestCase):
+    # Panels run on their own threads and connections, so the data must be committed
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+        # Staff, so responses carry the Server-Timing header compared below
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher',
+                                                 is_staff=True)
+        self.student = CustomUser.objects.create(
+            email='student@example.com', user_name='Student', role='Student', user_class='9th', payment_confirmed=True,
+            is_staff=True,
+        )
+        self.questions = [
+            HomeworkQuestion.objects.create(
+                question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+                subject=subject, question='Q', model_answer='Plants make food from sunlight',
+            )
+            for subject in ('Science', 'Math')
+        ]
+        StudentAnswer.objects.create(student=self.student, question=self.questions[0], date=date.today(),
+                                     answer='Plants make food', marks=4)
+        leaderboard.rebuild()
+
+    def dashboard(self, user, client):
+        cache.clear()
+        client.force_login(user)
+        if client is self.async_client:
+            response = async_to_sync(client.get)(reverse('dashboard'))
+        else:
+            response = client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_async_dashboards_match_sync_ones(self):
+        keys = {
+            self.student: ['total_assigned', 'total_pending', 'average_score', 'revision_answers', 'chart_data',
+                           'my_rank_info', 'top_3_students'],
+            self.teacher: ['teacher_stats', 'teachers_ranked', 'todays_homework', 'total_students', 'overall_top_3'],
+        }
+        for user, names in keys.items():
+            with self.subTest(role=user.role):
+                sync_response = self.dashboard(user, self.client)
+                async_response = self.dashboard(user, self.async_client)
+                for name in names:
+                    self.assertEqual(async_response.context[name], sync_response.context[name], name)
+                # Queries run on the panel threads are counted like the sync view's
+                self.assertEqual(async_response['Server-Timing'].split('desc=')[1],
+                                 sync_response['Server-Timing'].split('desc=')[1])
+
+        pending = self.dashboard(self.student, self.async_client).context['pending_homework']
+        self.assertEqual([hw.id for hw in pending], [self.questions[1].id])
+
+    def test_async_answer_is_graded_off_the_event_loop_and_saved(self):
+        self.async_client.force_login(self.student)
+        question = self.questions[1]
+        response = async_to_sync(self.async_client.post)(
+            reverse('answer', args=[question.id]), {'student_answer': 'Plants make food from sunlight'}
+        )
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        answer = StudentAnswer.objects.get(student=self.student, question=question)
+        self.assertEqual(answer.marks, 5)
+        self.assertEqual(StudentPerformance.objects.get(student=self.student, subject='Math').marks_count, 1)
+        self.assertGreater(instrumentation.snapshot()['answer']['avg_grading_ms'], 0)
+
+
+class RollupTests(TestCase):
+    def test_rollups_plus_live_delta_match_raw_averages(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        yesterday = date.today() - timedelta(days=1)
+        for i, (day, subject, marks) in enumerate([
+            (yesterday, 'Science', 5), (yesterday, 'Maths', 3), (date.today(), 'Science', 2),
+        ]):
+            student = CustomUser.objects.create(email=f's{i}@example.com', user_name=f'S{i}', role='Student', user_class='9th')
+            question = HomeworkQuestion.objects.create(
+                question_class='9th', date=day, due_date=day, uploaded_by=teacher,
+                subject=subject, question=f'Q{i}', model_answer='A',
+            )
+            StudentAnswer.objects.create(student=student, question=question, date=day, answer='A', marks=marks)
+
+        self.assertEqual(rollups.refresh(), [yesterday, date.today()])
+        rows = sorted(DailyPerformanceRollup.objects.values_list('day', 'subject', 'marks_sum', 'marks_count'))
+        rollups.refresh()  # re-reads the overlap window; must not double count
+        self.assertEqual(sorted(DailyPerformanceRollup.objects.values_list('day', 'subject', 'marks_sum', 'marks_count')), rows)
+
+        report = rollups.school_performance()
+        self.assertEqual({item['label']: item['average_marks'] for item in report['subject']}, {'Science': 3.5, 'Maths': 3})
+        self.assertEqual(report['teacher'], [{'label': 'Teacher', 'average_marks': 10 / 3, 'answers': 3}])
+        self.assertEqual(rollups.school_performance(end=yesterday)['class'][0]['average_marks'], 4)
+
+    def test_late_grades_and_deletions_show_before_the_next_refresh(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        student = CustomUser.objects.create(email='s@example.com', user_name='S', role='Student', user_class='9th')
+        last_week = date.today() - timedelta(days=7)
+        question = HomeworkQuestion.objects.create(
+            question_class='9th', date=last_week, due_date=last_week, uploaded_by=teacher,
+            subject='Science', question='Q', model_answer='A',
+        )
+        answers = [
+            StudentAnswer.objects.create(student=student, question=question, date=last_week, answer='A', marks=marks)
+            for marks in (5, 3)
+        ]
+        rollups.refresh()
+        # As if the refresh ran a while after those answers were written
+        RollupCheckpoint.objects.update(processed_until=timezone.now() + rollups.WATERMARK_OVERLAP)
+        self.assertEqual(rollups.changed_days(), set())
+        self.assertEqual(rollups.school_performance()['subject'][0]['answers'], 2)
+
+        answers[1].marks = 1  # a teacher re-marks last week's answer
+        answers[1].save()
+        answers[0].delete()
+        report = rollups.school_performance()['subject']
+        self.assertEqual((report[0]['average_marks'], report[0]['answers']), (1, 1))
+
+        self.assertEqual(rollups.refresh(), [last_week])
+        self.assertEqual(rollups.school_performance()['subject'], report)
+        self.assertEqual(DailyPerformanceRollup.objects.get().marks_sum, 1)
+
+
+@override_settings(GRADING_POOL_SIZE=1, GRADING_BATCH_WINDOW_MS=200)
+class GradingPoolTests(TestCase):
+    def tearDown(self):
+        grading_pool.shutdown()
+
+    def test_submissions_within_the_window_are_scored_as_one_batch(self):
+        photosynthesis = vectorize_text(GRADING_SAMPLES[0][1])
+        newton = vectorize_text(GRADING_SAMPLES[5][1])
+        pairs = [
+            (GRADING_SAMPLES[0][0], photosynthesis), ('Plants use sunlight', photosynthesis),
+            (GRADING_SAMPLES[5][0], newton), ('', newton),
+        ]
+        before = grading_pool.stats()
+
+        futures = [grading_pool.submit(answer, vector) for answer, vector in pairs]
+        scores = [future.result(timeout=60) for future in futures]
+
+        for score, (answer, vector) in zip(scores, pairs):
+            self.assertAlmostEqual(score, score_against_vector(vector, answer), places=6)
+        stats = grading_pool.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['batches'] - before['batches'], 1)
+        self.assertEqual(stats['pairs'] - before['pairs'], 4)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertIn('batch_p95_ms', stats)
+
+    def test_answer_view_grades_through_the_pool(self):
+        teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        student = CustomUser.objects.create(
+            email='student@example.com', user_name='Student', role='Student', user_class='9th', payment_confirmed=True,
+        )
+        question = HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=teacher,
+            subject='Science', question='Q', model_answer='Plants make food from sunlight',
+        )
+        batches = grading_pool.stats()['batches']
+        self.client.force_login(student)
+        self.client.post(reverse('answer', args=[question.id]), {'student_answer': 'Plants make food from sunlight'})
+        self.assertEqual(StudentAnswer.objects.get(student=student, question=question).marks, 5)
+        self.assertEqual(grading_pool.stats()['batches'], batches + 1)
+
+    def test_pool_starts_on_the_first_request_only(self):
+        self.assertEqual(grading_pool.stats()['size'], 0)  # loading Django started nothing
+        apps.get_app_config('accounts').ready()
+        self.addCleanup(request_started.disconnect, dispatch_uid='grading_pool.start_on_request')
+        self.assertEqual(grading_pool.stats()['size'], 0)
+        self.client.get(reverse('login'))
+        self.assertEqual(grading_pool.stats()['size'], 1)
+
+    def test_broken_pool_is_replaced_once_and_shut_down(self):
+        grading_pool.start()
+        broken = grading_pool._state['executor']
+        vector = vectorize_text(GRADING_SAMPLES[0][1])
+        failed = Future()
+        failed.set_exception(BrokenProcessPool())
+        futures = []
+        with mock.patch.object(broken, 'shutdown', wraps=broken.shutdown) as shutdown, \
+                self.assertLogs('accounts.grading_pool', 'ERROR') as logs:
+            for _ in range(2):  # two batches were in flight on the broken pool
+                futures.append(Future())
+                grading_pool._stats['in_flight'] += 1
+                grading_pool._resolve([(GRADING_SAMPLES[0][0], vector, futures[-1])],
+                                      [(GRADING_SAMPLES[0][0], vector)], failed, 0, broken)
+        shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertEqual([record.getMessage() for record in logs.records],
+                         ['Grading pool failed; replaced it, grading its batches in-process'])
+        self.assertIsNot(grading_pool._state['executor'], broken)
+        for future in futures:
+            self.assertAlmostEqual(future.result(), score_against_vector(vector, GRADING_SAMPLES[0][0]))
+
+
+class QueryPlanTests(TestCase):
+    def test_dashboard_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('All dashboard queries use an index.', out.getvalue())
+
+
+class ImportHomeworkTests(TestCase):
+    HOMEWORK_CSV = (
+        "Uploaded By,Date,Due_Date,Class,Subject,Question,Model_Answer\n"
+        "Teacher,05-08-2025,,9th,Science,What is photosynthesis?,Plants make food from sunlight\n"
+        "Ghost,05-08-2025,,9th,Math,Orphan question?,Nobody\n"
+    )
+    ANSWERS_CSV = (
+        "Student Gmail,Date,Question,Answer,Marks,Remarks,Attempt_Status\n"
+        "student@example.com,05-08-2025,What is photosynthesis?,Plants make food,4,Good,\n"
+    )
+
+    def setUp(self):
+        CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        CustomUser.objects.create(email='student@example.com', user_name='Student', role='Student', user_class='9th')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.files = []
+        for name, content in (('homework.csv', self.HOMEWORK_CSV), ('answers.csv', self.ANSWERS_CSV)):
+            path = os.path.join(self.tmpdir.name, name)
+            with open(path, 'w') as fh:
+                fh.write(content)
+            self.files.append(path)
+
+    def test_import_from_csv_is_idempotent(self):
+        for _ in range(2):
+            call_command('import_homework', '--homework-file', self.files[0], '--answers-file', self.files[1],
+                         stdout=StringIO())
+        question = HomeworkQuestion.objects.get()
+        self.assertEqual(question.due_date, date(2025, 8, 6))
+        self.assertTrue(question.model_answer_vector['terms'])
+        self.assertEqual(StudentAnswer.objects.get().marks, 4)
+        self.assertEqual(StudentPerformance.objects.get(subject='').marks_sum, 4)
+
+    def test_excel_date_cells_are_read_as_dates(self):
+        # What read_excel(dtype=object) returns for a sheet with real date cells.
+        sheet = pd.DataFrame({
+            'Student Gmail': ['student@example.com', 'student@example.com'],
+            'Date': [pd.Timestamp(2025, 8, 5), 'not a date'],
+            'Question': ['What is photosynthesis?', 'What is photosynthesis?'],
+            'Answer': ['Plants make food', 'Sunlight'],
+            'Marks': [4, float('nan')],
+            'Remarks': ['Good', None],
+            'Attempt_Status': [None, None],
+        })
+        out = StringIO()
+        with mock.patch('accounts.importing.pd.read_excel', return_value=sheet):
+            call_command('import_homework', '--homework-file', self.files[0],
+                         '--answers-file', os.path.join(self.tmpdir.name, 'answers.xlsx'), stdout=out)
+        self.assertEqual(StudentAnswer.objects.get().marks, 4)
+        self.assertIn('Skipping answer, invalid date: not a date', out.getvalue())
+        self.assertNotIn('question not found', out.getvalue())
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class ImportUsersTests(TestCase):
+    def test_import_in_chunks_keeps_legacy_passwords_working(self):
+        cache.clear()
+        caches[throttling.CACHE_ALIAS].clear()
+        CustomUser.objects.create(email='existing@example.com', user_name='Existing', role='Student')
+        legacy = hashlib.sha256(b'secret123').hexdigest()
+        rows = [f"Teacher,{legacy},Teacher@Example.com ,Teacher,,Yes,Pet?,Cat"] + [
+            f"Student {i},{legacy},student{i}@example.com,Student,9th,Yes,Pet?,Cat" for i in range(4)
+        ] + [
+            "Student 0 again,x,student0@example.com,Student,9th,Yes,Pet?,Cat",
+            "Existing,x,existing@example.com,Student,9th,Yes,Pet?,Cat",
+        ]
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'users.csv')
+        with open(path, 'w') as fh:
+            fh.write("User Name,Password,Gmail ID,Role,Class,Confirmed,Security Question,Security Answer\n")
+            fh.write("\n".join(rows) + "\n")
+
+        out = StringIO()
+        call_command('import_users', '--file', path, '--chunk-size', '2', stdout=out)
+        self.assertEqual(out.getvalue().count('Processed'), 4)
+        self.assertIn('5 created, 2 skipped', out.getvalue())
+        self.assertEqual(
+            sorted(CustomUser.objects.filter(role='Student', user_class='9th').values_list('email', flat=True)),
+            [f'student{i}@example.com' for i in range(4)],
+        )
+        teacher = CustomUser.objects.get(email='teacher@example.com')
+        self.assertTrue(teacher.password.startswith('legacy_sha256$$'))
+
+        response = self.client.post(reverse('login'), {'gmail': 'teacher@example.com', 'password': 'secret123'})
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        teacher.refresh_from_db()
+        self.assertTrue(teacher.password.startswith('pbkdf2_sha256$'))
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = CustomUser.objects.create(email='teacher@example.com', user_name='Teacher', role='Teacher')
+        self.student_9 = CustomUser.objects.create(email='s9@example.com', user_name='S9', role='Student', user_class='9th')
+        self.student_10 = CustomUser.objects.create(email='s10@example.com', user_name='S10', role='Student', user_class='10th')
+
+    def dashboard(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse('dashboard'))
+
+    def test_new_question_invalidates_only_its_class(self):
+        for student in (self.student_9, self.student_10):
+            self.dashboard(student)
+        before = dashboard_cache.stats()
+        HomeworkQuestion.objects.create(
+            question_class='9th', date=date.today(), due_date=date.today(), uploaded_by=self.teacher,
+            subject='Science', question='New question', model_answer='Answer',
+        )
+        self.assertContains(self.dashboard(self.student_9), 'New question')
+        self.dashboard(self.student_10)
+        after = dashboard_cache.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_bumps_from_another_process_invalidate(self):
+        self.dashboard(self.student_9)
+        # grading_worker and the management commands run with their own cache client
+        worker_cache = caches.create_connection('default')
+        self.assertIsNot(worker_cache, caches['default'])
+        with mock.patch.object(dashboard_cache, 'cache', worker_cache):
+            dashboard_cache.answers_changed([self.student_9.id], ['9th'])
+        before = dashboard_cache.stats()
+        self.dashboard(self.student_9)
+        self.assertEqual(dashboard_cache.stats()['misses'] - before['misses'], 1)
+
+    def test_process_local_cache_is_flagged(self):
+        self.assertEqual(checks.process_local_cache(None), [])
+        with override_settings(CACHES=PROCESS_CACHE):
+            self.assertEqual([warning.id for warning in checks.process_local_cache(None)], ['accounts.W001'])
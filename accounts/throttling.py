@@ -0,0 +1,100 @@
+"""
+Token-bucket throttling of the login and password-reset forms.
+
+Every POST takes one token from the bucket of the submitted email and the
+client IP together and, when settings.LOGIN_THROTTLE_BUCKETS has an
+``'ip'`` entry, first one from the bucket of the client IP alone; buckets
+refill continuously at the configured rates. Keying the email bucket by
+address as well keeps an attacker elsewhere from locking a student out of
+their own account. An empty bucket gets a 429 before the view touches the
+database or a password hasher. Bucket state lives in the ``'throttle'``
+cache, which must be shared by all web processes for the limits to hold
+(with a per-process cache every process gets its own buckets) and must not
+be the database cache, or every check costs queries. Reading and writing a
+bucket is not atomic; a few extra attempts slipping through under a race is
+acceptable for this purpose.
+
+Both buckets need THROTTLE_NUM_PROXIES set to the number of proxies that
+append to X-Forwarded-For (1 behind the Procfile platform's router):
+otherwise the client IP is the router's, and every visitor shares it. The
+IP bucket is off by default because a school behind NAT shares one address.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+CACHE_ALIAS = 'throttle'
+
+_stats = {'allowed': 0, 'throttled_ip': 0, 'throttled_email': 0}
+
+
+def client_ip(request):
+    """The client address, skipping settings.THROTTLE_NUM_PROXIES trusted reverse proxies."""
+    proxies = settings.THROTTLE_NUM_PROXIES
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_tokens(identities, now=None):
+    """
+    Take a token from the bucket of every ``(scope, value)`` in ``identities``.
+    Returns ``(None, 0)`` when all had one, otherwise ``(scope, retry_after_seconds)``
+    of the first empty bucket; no bucket is charged in that case.
+    """
+    now = time.time() if now is None else now
+    keys = {f'throttle:{scope}:{value}': scope for scope, value in identities}
+    cache = caches[CACHE_ALIAS]
+    stored = cache.get_many(keys)
+
+    updates = {}
+    for key, scope in keys.items():
+        capacity, per_second = settings.LOGIN_THROTTLE_BUCKETS[scope]
+        tokens, stamp = stored.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * per_second)
+        if tokens < 1:
+            return scope, math.ceil((1 - tokens) / per_second)
+        updates[key] = (tokens - 1, now)
+
+    # An untouched bucket refills completely within capacity / rate seconds
+    timeout = max(math.ceil(capacity / per_second) for capacity, per_second
+                  in settings.LOGIN_THROTTLE_BUCKETS.values())
+    cache.set_many(updates, timeout)
+    return None, 0
+
+
+def throttle_login(view):
+    """Throttle POSTs to ``view`` by the ``gmail`` form field and client IP, and if configured by client IP alone."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method == 'POST':
+            identities = []
+            ip = client_ip(request)
+            if 'ip' in settings.LOGIN_THROTTLE_BUCKETS:
+                identities.append(('ip', ip))
+            email = request.POST.get('gmail', '').lower().strip()
+            if email:
+                identities.append(('email', f'{email}|{ip}'))
+            scope, retry_after = take_tokens(identities) if identities else (None, 0)
+            if scope is not None:
+                _stats[f'throttled_{scope}'] += 1
+                response = HttpResponse(
+                    f'Too many attempts. Please try again in {retry_after} seconds.', status=429,
+                    content_type='text/plain; charset=utf-8',
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+            _stats['allowed'] += 1
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def stats():
+    """In-process counters of allowed and throttled POSTs."""
+    return dict(_stats, throttled=_stats['throttled_ip'] + _stats['throttled_email'])
@@ -0,0 +1,133 @@
+"""
+Tokenizer for grading Hindi, English and mixed-script answers.
+
+The old sklearn-style pattern (``\\b\\w\\w+\\b``) breaks Devanagari words
+apart. Python's ``\\w`` does not match the vowel signs, virama or nukta, so
+"पानी का रंग" became a couple of meaningless fragments. This pipeline:
+
+1. Normalises the text: NFKC, so composed and decomposed spellings of the
+   same letter match. Case folding. Zero-width (non-)joiners and soft
+   hyphens removed. Devanagari digits mapped to ASCII ones.
+2. Splits it into runs of letters, digits and Devanagari combining marks,
+   keeping tokens of two or more characters like before. For plain ASCII
+   text the tokens are exactly the old ones.
+3. Optionally drops stop words and applies a light suffix-stripping
+   stemmer, per language. Subjects choose these in
+   settings.GRADING_ANALYZERS.
+
+The chosen options (the *analyzer*) are stored inside each model answer
+vector, so an answer is always tokenised the same way as its model answer,
+even in a grading pool process without Django settings.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Devanagari combining marks (signs, nukta, vowel signs, virama, stress marks)
+_DEVANAGARI_MARKS = '\u0900-\u0903\u093a-\u094f\u0951-\u0957\u0962\u0963'
+TOKEN_PATTERN = re.compile(rf'[\w{_DEVANAGARI_MARKS}]{{2,}}')
+
+_NORMALISE = {
+    0x200c: None, 0x200d: None, 0x00ad: None,  # ZWNJ, ZWJ, soft hyphen
+    **{0x0966 + digit: str(digit) for digit in range(10)},  # Devanagari digits
+}
+
+STOP_WORDS = {
+    'en': frozenset('''
+        a about above after again all also am an and any are as at be because been before being below between
+        both but by can did do does doing down during each few for from further had has have having he her here
+        hers him his how if in into is it its itself just me more most my no nor not now of off on once only or
+        other our ours out over own same she should so some such than that the their theirs them then there
+        these they this those through to too under until up very was we were what when where which while who
+        whom why will with would you your yours
+    '''.split()),
+    'hi': frozenset('''
+        और का की के को में से पर है हैं था थी थे हो होता होती होते हुआ हुई हुए यह वह ये वे इस उस इन उन
+        एक लिए भी तो ही ने तक या कि जो जब तब कर करके किया गया गई गए रहा रही रहे अपना अपनी अपने कुछ
+        सब साथ बहुत नहीं जैसे जैसा द्वारा
+    '''.split()),
+}
+
+# Hindi suffixes (Ramanathan & Rao's light stemmer), longest first
+_HINDI_SUFFIXES = sorted('''
+    ो े ू ु ी ि ा
+    कर ाओ िए ाई ाए ने नी ना ते ीं ती ता ाँ ां ों ें
+    ाकर ाइए ाईं ाया ेगी ेगा ोगी ोगे ाने ाना ाते ाती ाता तीं ाओं ाएं ुओं ुएं ुआं
+    ाएगी ाएगा ाओगी ाओगे एंगी ेंगी एंगे ेंगे ूंगी ूंगा ातीं नाओं नाएं ताओं ताएं ियाँ ियों ियां
+    ाएंगी ाएंगे ाऊंगी ाऊंगा ाइयाँ ाइयों ाइयां
+'''.split(), key=len, reverse=True)
+
+
+def _stem_hindi(token):
+    # Keep at least two letters (vowel signs and virama do not count)
+    for suffix in _HINDI_SUFFIXES:
+        if token.endswith(suffix) and _letters(token[:-len(suffix)]) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+
+def _letters(text):
+    return sum(1 for char in text if not unicodedata.category(char).startswith('M'))
+
+
+def _stem_english(token):
+    # Plurals (Harman's S-stemmer) and -ing/-ed, keeping stems of 3+ letters
+    if token.endswith('ies') and len(token) > 4 and not token.endswith(('eies', 'aies')):
+        return token[:-3] + 'y'
+    if token.endswith('es') and not token.endswith(('aes', 'ees', 'oes')) and len(token) > 4:
+        return token[:-1]
+    if token.endswith('s') and not token.endswith(('us', 'ss', 'is')) and len(token) > 3:
+        return token[:-1]
+    for suffix in ('ing', 'ed'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+STEMMERS = {'en': _stem_english, 'hi': _stem_hindi}
+
+
+def _language(token):
+    return 'hi' if '\u0900' <= token[0] <= '\u097f' else 'en'
+
+
+def normalize(text):
+    if text.isascii():
+        return text.lower()  # NFKC, casefold and the table change nothing else in ASCII
+    return unicodedata.normalize('NFKC', text).casefold().translate(_NORMALISE)
+
+
+def tokenize(text, stop_words=(), stem=()):
+    """Tokens of ``text``, without the stop words and with the stemmers of the given languages."""
+    if not text:
+        return []
+    tokens = TOKEN_PATTERN.findall(normalize(text))
+    if stop_words:
+        stopped = frozenset().union(*(STOP_WORDS[language] for language in stop_words))
+        tokens = [token for token in tokens if token not in stopped]
+    if stem:
+        stemmers = {language: STEMMERS[language] for language in stem}
+        tokens = [
+            stemmers[language](token) if (language := _language(token)) in stemmers else token
+            for token in tokens
+        ]
+    return tokens
+
+
+def analyzer_for(subject):
+    """The tokenizer options configured for ``subject``, as stored in model answer vectors."""
+    options = settings.GRADING_ANALYZERS.get(subject, {})
+    analyzer = {}
+    for option, known in (('stop_words', STOP_WORDS), ('stem', STEMMERS)):
+        languages = sorted(options.get(option, ()))
+        unknown = set(languages) - set(known)
+        if unknown:
+            raise ImproperlyConfigured(
+                f'GRADING_ANALYZERS[{subject!r}][{option!r}]: unknown languages {sorted(unknown)}; '
+                f'choose from {sorted(known)}.'
+            )
+        if languages:
+            analyzer[option] = languages
+    return analyzer
@@ -0,0 +1,14 @@
+from django.urls import path
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# Same URLs as accounts/urls.py, with the async dashboard and answer views swapped in
+ASYNC_VIEWS = {
+    'dashboard': async_views.dashboard_view,
+    'answer': async_views.answer_view,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name) if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
@@ -1,201 +1,174 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
 from django.contrib import messages
 from .models import CustomUser, HomeworkQuestion, StudentAnswer
-import hashlib
 import json
-from django.contrib.auth import login, logout
+from django.conf import settings
+from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.utils import timezone
 from datetime import date, timedelta
-from django.db.models import Avg, Count
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from django.db.models import Avg, Count, Prefetch
+from .grading import grading_result
+from .grading_queue import submit_for_grading
+from . import dashboard_cache, grading_pool, instrumentation, leaderboard, rollups, subscriptions, throttling
+from .instrumentation import render
+from .pagination import cursor_param, keyset_page
 
 
-# --- Password Hashing Functions ---
-def make_hashes(password):
-    return hashlib.sha256(str.encode(password)).hexdigest()
-
-def check_hashes(password, hashed_text):
-    return make_hashes(password) == hashed_text if hashed_text else False
-
-# --- Auto-Grading Utility Functions ---
-def get_text_similarity(text1, text2):
-    try:
-        if not text1 or not text2:
-            return 0.0
-        vectorizer = TfidfVectorizer().fit_transform([text1, text2])
-        return cosine_similarity(vectorizer)[0, 1] * 100
-    except:
-        return 0.0
-
-def get_grade_from_similarity(percentage):
-    if percentage >= 95: return 5  # Outstanding
-    elif percentage >= 80: return 4  # Very Good
-    elif percentage >= 60: return 3  # Good
-    elif percentage >= 40: return 2  # Average
-    else: return 1  # Needs Improvement
-
 # --- Login View ---
+@throttling.throttle_login
 def login_view(request):
     if request.method == 'POST':
         gmail = request.POST.get('gmail').lower().strip()
         password = request.POST.get('password')
-        try:
-            user = CustomUser.objects.get(email=gmail)
-            if check_hashes(password, user.password):
-                is_active = False
-                if user.role == 'Student' and user.payment_confirmed:
-                    is_active = True
-                elif user.role != 'Student' and user.is_confirmed:
-                    is_active = True
-                if is_active:
-                    login(request, user)
-                    return redirect('dashboard')
-                else:
-                    messages.error(request, 'Your account is not active. Please wait for confirmation.')
+        # Verifies with the configured hashers and upgrades legacy hashes on success
+        user = authenticate(request, email=gmail, password=password)
+        if user is not None:
+            is_active = False
+            if user.role == 'Student' and user.payment_confirmed:
+                is_active = True
+            elif user.role != 'Student' and user.is_confirmed:
+                is_active = True
+            if is_active:
+                login(request, user)
+                return redirect('dashboard')
             else:
-                messages.error(request, 'Incorrect Gmail ID or Password.')
-        except CustomUser.DoesNotExist:
+                messages.error(request, 'Your account is not active. Please wait for confirmation.')
+        else:
             messages.error(request, 'Incorrect Gmail ID or Password.')
     return render(request, 'accounts/login.html')
 
-# --- Dashboard View (Complete for all roles) ---
-@login_required(login_url='/login/')
-def dashboard_view(request):
-    user = request.user
-    role = user.role.lower()
-    template_name = f'accounts/{role}_dashboard.html'
-    context = {'user_name': user.user_name}
-
-    if role == 'admin':
-        # --- Admin Data ---
-        context['unconfirmed_students'] = CustomUser.objects.filter(role='Student', payment_confirmed=False)
-        context['unconfirmed_teachers'] = CustomUser.objects.filter(role='Teacher', is_confirmed=False)
-    
-
-    elif role == 'student':
-        # --- Student Data ---
-        all_homework = HomeworkQuestion.objects.filter(question_class=user.user_class)
-        all_student_answers = StudentAnswer.objects.filter(student=user)
-        
-        # Performance Overview Data
-        graded_answers = all_student_answers.filter(marks__isnull=False)
+# --- Dashboard context builders (one per role, cached by dashboard_cache) ---
+# Each dashboard is a list of independent panels, functions returning part of
+# the context. The sync views run them one after another; the async views
+# (accounts/async_views.py) run them concurrently.
+def build_context(panels, context=None):
+    context = {} if context is None else context
+    for panel in panels:
+        context.update(panel())
+    return context
+
+def student_dashboard_panels(user):
+    # --- Student Data ---
+    # Every panel below is a single query, so the page costs the same
+    # number of queries however many homework questions the class has.
+    all_homework = HomeworkQuestion.objects.listing().filter(question_class=user.user_class)
+    all_student_answers = StudentAnswer.objects.listing().filter(student=user)
+    graded_answers = all_student_answers.filter(marks__isnull=False)
+
+    # Performance Overview Data
+    def overview():
         total_assigned = all_homework.count()
-        total_completed = graded_answers.count()
-        context['total_assigned'] = total_assigned
-        context['total_completed'] = total_completed
-        context['total_pending'] = total_assigned - total_completed
-        context['average_score'] = graded_answers.aggregate(Avg('marks'))['marks__avg'] or 0.0
-
-        # Pending Homework Logic (Corrected)
+        graded_stats = graded_answers.aggregate(total_completed=Count('id'), average_score=Avg('marks'))
+        total_completed = graded_stats['total_completed']
+        return {
+            'total_assigned': total_assigned,
+            'total_completed': total_completed,
+            'total_pending': total_assigned - total_completed,
+            'average_score': graded_stats['average_score'] or 0.0,
+        }
+
+    # Pending Homework Logic: the oldest ungraded attempt of each question is prefetched in one query
+    def pending_homework():
         answered_q_ids = graded_answers.values_list('question_id', flat=True)
-        pending_homework_qs = all_homework.exclude(id__in=answered_q_ids)
-        
+        pending_homework_qs = all_homework.exclude(id__in=answered_q_ids).prefetch_related(
+            Prefetch(
+                'studentanswer_set',
+                queryset=all_student_answers.filter(marks__isnull=True).order_by('id'),
+                to_attr='ungraded_answers',
+            )
+        )
+
         pending_homework_with_details = []
         for hw in pending_homework_qs:
-            answer_with_remark = all_student_answers.filter(question=hw, marks__isnull=True).first()
-            if answer_with_remark:
+            if hw.ungraded_answers:
+                answer_with_remark = hw.ungraded_answers[0]
                 hw.previous_answer = answer_with_remark.answer
                 hw.remarks = answer_with_remark.remarks
+                hw.grading_pending = answer_with_remark.is_grading_pending
             pending_homework_with_details.append(hw)
-        context['pending_homework'] = pending_homework_with_details
-        
-        # Revision Zone (Good, Very Good & Outstanding)
-        context['revision_answers'] = graded_answers.filter(marks__gte=3).order_by('-date')
-        
-        # Chart Data
-        context['chart_data'] = graded_answers.values('question__subject').annotate(average_marks=Avg('marks')).order_by('question__subject')
-        context['growth_chart_data'] = list(graded_answers.order_by('date').values('date', 'marks'))
-        
-        # Leaderboard Data
-        class_students = CustomUser.objects.filter(user_class=user.user_class, role='Student')
-        leaderboard_data = (
-            StudentAnswer.objects.filter(student__in=class_students, marks__isnull=False)
-            .values('student__user_name')
-            .annotate(average_marks=Avg('marks'))
-            .order_by('-average_marks')
-        )
-        ranked_leaderboard = [{'rank': i + 1, **entry} for i, entry in enumerate(leaderboard_data)]
-        context['top_3_students'] = ranked_leaderboard[:3]
-        context['my_rank_info'] = next((item for item in ranked_leaderboard if item['student__user_name'] == user.user_name), None)
+        return {'pending_homework': pending_homework_with_details}
 
-    elif role == 'teacher':
-        # --- Teacher Data Calculation ---
-        
-        view_class = request.GET.get('view_class')
-        view_subject = request.GET.get('view_subject')
+    # Revision Zone (Good, Very Good & Outstanding)
+    def revision_zone():
+        return {'revision_answers': list(graded_answers.filter(marks__gte=3).order_by('-date').previews())}
 
-        if view_class and view_subject:
-            # --- Detail View: Sirf chune gaye sawaal dikhayein ---
-            context['is_detail_view'] = True
-            selected_questions = HomeworkQuestion.objects.filter(
-                uploaded_by=user,
-                date=date.today(),
-                question_class=view_class,
-                subject=view_subject
-            )
-            context['selected_questions'] = selected_questions
-            context['detail_info'] = {'class': view_class, 'subject': view_subject}
-        else:
-            # --- Normal View: Sabhi reports aur summary dikhayein ---
-            context['is_detail_view'] = False
-            
-            # 1. Top Metrics
-            all_teachers = CustomUser.objects.filter(role='Teacher').order_by('-salary_points')
-            my_rank = "N/A"
-            for i, teacher in enumerate(all_teachers):
-                if teacher.id == user.id:
-                    my_rank = i + 1
-                    break
-            
-            context['teacher_stats'] = {
-                'salary_points': user.salary_points,
-                'total_questions': HomeworkQuestion.objects.filter(uploaded_by=user).count(),
-                'rank': my_rank
-            }
-            context['all_teachers_ranked'] = all_teachers
+    # Chart Data
+    def subject_chart():
+        return {'chart_data': list(graded_answers.values('question__subject').annotate(average_marks=Avg('marks')).order_by('question__subject'))}
 
-            # 2. Today's Homework Summary
-            todays_homework = HomeworkQuestion.objects.filter(uploaded_by=user, date=date.today())
-            context['todays_homework'] = todays_homework
-            
-            # 3. Report Metrics
-            all_graded_answers = StudentAnswer.objects.filter(marks__isnull=False)
-            all_students = CustomUser.objects.filter(role='Student')
-            
-            context['total_students'] = all_students.count()
-            context['total_answers_submitted'] = StudentAnswer.objects.count()
-            
-            # Overall Top 3 Students
-            overall_performance = all_graded_answers.values('student__user_name', 'student__user_class').annotate(average_marks=Avg('marks')).order_by('-average_marks')
-            context['overall_top_3'] = list(overall_performance[:3])
+    def growth_chart():
+        return {'growth_chart_data': list(graded_answers.order_by('date').values('date', 'marks'))}
 
-            # Class-wise Top 3 Students
-            classwise_performance = all_graded_answers.values('student__user_name', 'student__user_class').annotate(average_marks=Avg('marks')).order_by('student__user_class', '-average_marks')
-            
-            top_by_class = {}
-            for record in classwise_performance:
-                class_name = record['student__user_class']
-                if class_name not in top_by_class:
-                    top_by_class[class_name] = []
-                if len(top_by_class[class_name]) < 3:
-                    top_by_class[class_name].append(record)
-            context['classwise_top_3'] = top_by_class
-            
-    elif role == 'principal':
-        # --- Principal Data Calculation ---
-    
-        # 1. Top Metrics
+    # Leaderboard Data (read from the materialised StudentPerformance rows)
+    def class_leaderboard():
+        return {'top_3_students': leaderboard.class_top_students(user.user_class)}
+
+    def my_rank():
+        return {'my_rank_info': leaderboard.student_rank(user)}
+
+    return [overview, pending_homework, revision_zone, subject_chart, growth_chart, class_leaderboard, my_rank]
+
+def student_dashboard_context(user):
+    return build_context(student_dashboard_panels(user))
+
+def teacher_dashboard_panels(user):
+    # --- Normal View: Sabhi reports aur summary dikhayein ---
+    # 1. Top Metrics
+    def teacher_stats():
+        ranking = leaderboard.teacher_ranking(user)
+        # Salary chart: the top teachers plus the ones around this teacher, not the whole network
+        chart_teachers = {row['position']: row for row in ranking['top'] + ranking['neighbours']}
+        return {
+            'teacher_stats': {
+                'salary_points': user.salary_points,
+                'total_questions': HomeworkQuestion.objects.filter(uploaded_by=user).count(),
+                'rank': ranking['rank'] or "N/A"
+            },
+            'teachers_ranked': [chart_teachers[position] for position in sorted(chart_teachers)],
+        }
+
+    # 2. Today's Homework Summary
+    def todays_homework():
+        todays_homework = HomeworkQuestion.objects.summaries().filter(uploaded_by=user, date=date.today())
+        return {'todays_homework': list(todays_homework)}
+
+    # 3. Report Metrics
+    def report_metrics():
+        all_students = CustomUser.objects.filter(role='Student')
+        return {
+            'total_students': all_students.count(),
+            'total_answers_submitted': StudentAnswer.objects.count(),
+        }
+
+    # Overall and Class-wise Top 3 Students
+    def overall_top():
+        return {'overall_top_3': leaderboard.overall_top_students()}
+
+    def classwise_top():
+        return {'classwise_top_3': leaderboard.classwise_top_students()}
+
+    return [teacher_stats, todays_homework, report_metrics, overall_top, classwise_top]
+
+def teacher_dashboard_context(user):
+    return build_context(teacher_dashboard_panels(user), {'is_detail_view': False})
+
+def principal_dashboard_panels(start=None, end=None):
+    # --- Principal Data Calculation ---
+    # 1. Top Metrics
+    def top_metrics():
         all_users = CustomUser.objects.all()
         all_teachers = all_users.filter(role='Teacher')
         all_students = all_users.filter(role='Student')
-    
-        context['total_students'] = all_students.count()
-        context['total_teachers'] = all_teachers.count()
-        context['total_questions_created'] = HomeworkQuestion.objects.count()
-
-        # 2. Today's Teacher Activity Report
+        return {
+            'total_students': all_students.count(),
+            'total_teachers': all_teachers.count(),
+            'total_questions_created': HomeworkQuestion.objects.count(),
+        }
+
+    # 2. Today's Teacher Activity Report
+    def teacher_activity():
         today = date.today()
         todays_homework = HomeworkQuestion.objects.filter(date=today)
         questions_created_today = (
@@ -203,33 +176,91 @@ def dashboard_view(request):
             .annotate(count=Count('id'))
             .order_by('-count')
         )
-        context['questions_created_today'] = questions_created_today
-
-        # --- NEW: Live School Analytics ---
-        all_graded_answers = StudentAnswer.objects.filter(marks__isnull=False)
+        return {'questions_created_today': list(questions_created_today)}
+
+    # 3. School Analytics, from the daily rollups (see accounts/rollups.py)
+    def school_analytics():
+        performance = rollups.school_performance(start, end)
+        return {
+            'subject_performance': performance['subject'],
+            'class_performance': performance['class'],
+            'teacher_performance': performance['teacher'],
+        }
+
+    return [top_metrics, teacher_activity, school_analytics]
+
+def principal_dashboard_context(start=None, end=None):
+    return build_context(principal_dashboard_panels(start, end), {'range_start': start, 'range_end': end})
+
+ADMIN_QUEUE_PAGE_SIZE = 50
+
+def admin_dashboard_context(request):
+    # Both queues are paged by id, and counted with their (role, flag) indexes
+    pending_students = subscriptions.pending_students(CustomUser.objects.listing())
+    pending_teachers = CustomUser.objects.listing().filter(role='Teacher', is_confirmed=False)
+    students_after = cursor_param(request, 'students_after')
+    teachers_after = cursor_param(request, 'teachers_after')
+    context = {'students_after': students_after, 'teachers_after': teachers_after}
+    context['unconfirmed_students'], context['students_next'] = keyset_page(
+        pending_students, students_after, ADMIN_QUEUE_PAGE_SIZE
+    )
+    context['unconfirmed_teachers'], context['teachers_next'] = keyset_page(
+        pending_teachers, teachers_after, ADMIN_QUEUE_PAGE_SIZE
+    )
+    context['unconfirmed_students_count'] = pending_students.count()
+    context['unconfirmed_teachers_count'] = pending_teachers.count()
+    return context
+
+def teacher_detail_context(user, view_class, view_subject):
+    selected_questions = HomeworkQuestion.objects.listing().filter(
+        uploaded_by=user,
+        date=date.today(),
+        question_class=view_class,
+        subject=view_subject
+    )
+    return {
+        'is_detail_view': True,
+        'selected_questions': selected_questions,
+        'detail_info': {'class': view_class, 'subject': view_subject},
+    }
 
-        # Subject-wise Performance
-        subject_performance = (
-            all_graded_answers.values('question__subject')
-            .annotate(average_marks=Avg('marks'))
-            .order_by('-average_marks')
-        )
-        context['subject_performance'] = subject_performance
-    
-        # Class-wise Comparison
-        class_performance = (
-            all_graded_answers.values('student__user_class')
-            .annotate(average_marks=Avg('marks'))
-            .order_by('-average_marks')
-        )
-        context['class_performance'] = class_performance
-        # --- END NEW ---
+def _date_param(request, name):
+    try:
+        return date.fromisoformat(request.GET.get(name, ''))
+    except ValueError:
+        return None
 
+# --- Dashboard View (Complete for all roles) ---
+@login_required(login_url='/login/')
+def dashboard_view(request):
+    user = request.user
+    role = user.role.lower()
+    template_name = f'accounts/{role}_dashboard.html'
+    context = {'user_name': user.user_name}
 
-    elif role == 'admin':
+    if role == 'admin':
         # --- Admin Data ---
-        context['unconfirmed_students'] = CustomUser.objects.filter(role='Student', payment_confirmed=False)
-        context['unconfirmed_teachers'] = CustomUser.objects.filter(role='Teacher', is_confirmed=False)
+        context.update(admin_dashboard_context(request))
+
+    elif role == 'student':
+        # --- Student Data ---
+        context.update(dashboard_cache.student_context(user, student_dashboard_context))
+
+    elif role == 'teacher':
+        # --- Teacher Data Calculation ---
+        
+        view_class = request.GET.get('view_class')
+        view_subject = request.GET.get('view_subject')
+
+        if view_class and view_subject:
+            # --- Detail View: Sirf chune gaye sawaal dikhayein ---
+            context.update(teacher_detail_context(user, view_class, view_subject))
+        else:
+            context.update(dashboard_cache.teacher_context(user, teacher_dashboard_context))
+            
+    elif role == 'principal':
+        start, end = _date_param(request, 'from'), _date_param(request, 'to')
+        context.update(dashboard_cache.principal_context(principal_dashboard_context, start, end))
 
     return render(request, template_name, context)
 
@@ -258,28 +289,29 @@ def answer_view(request, question_id):
             messages.error(request, "Answer cannot be empty.")
             return redirect('dashboard')
 
-        # Auto-grade the answer by comparing with the model answer
-        similarity = get_text_similarity(answer_text, question.model_answer)
-        grade_score = get_grade_from_similarity(similarity)
+        if settings.GRADING_MODE == 'queue':
+            submit_for_grading(request.user, question, answer_text, previous_answer_obj)
+            messages.success(request, "Your answer has been submitted and will be graded shortly.")
+            return redirect('dashboard')
+
+        # Auto-grade the answer against the question's pre-computed model answer vector
+        # (in the grading process pool when GRADING_POOL_SIZE is set)
+        similarity, grade_score = grading_pool.grade(question, answer_text)
 
         # If this was a resubmission, delete the old attempt to replace it
         if previous_answer_obj:
             previous_answer_obj.delete()
 
         # Save the new attempt based on the grade
-        if grade_score >= 3: # Good, Very Good, or Outstanding
-            remark = "Good! Try for better performance next time." if grade_score == 3 else f"Auto-Graded: Excellent! ({similarity:.2f}%)"
-            StudentAnswer.objects.create(
-                student=request.user, question=question, date=timezone.now().date(),
-                answer=answer_text, marks=grade_score, remarks=remark
-            )
+        marks, remark = grading_result(similarity, grade_score)
+        StudentAnswer.objects.create(
+            student=request.user, question=question, date=timezone.now().date(),
+            answer=answer_text, marks=marks, remarks=remark, auto_graded=True,
+        )
+        leaderboard.record_mark_changes([(request.user.id, question.subject, None, marks)])
+        if marks is not None:
             messages.success(request, f"Good work! Your answer was {similarity:.2f}% correct and has been saved.")
-        else: # Needs Improvement or Average (auto-return)
-            remark = f"Auto-Remark: Your answer was {similarity:.2f}% correct. Please review and improve it."
-            StudentAnswer.objects.create(
-                student=request.user, question=question, date=timezone.now().date(),
-                answer=answer_text, marks=None, remarks=remark
-            )
+        else:
             messages.warning(
                 request,
                 f"Your answer was {similarity:.2f}% correct. Please review the auto-remark and resubmit.",
@@ -368,12 +400,12 @@ def registration_view(request):
             user = CustomUser(
                 user_name=user_name,
                 email=email,
-                password=make_hashes(password),
                 mobile_number=mobile_number,
                 security_question=security_question,
                 security_answer=security_answer,
                 role=role
             )
+            user.set_password(password)
             
             # Add student-specific or teacher-specific details
             if role == 'Student':
@@ -407,6 +439,7 @@ def payment_view(request, user_id):
         transaction_id = request.POST.get('transaction_id')
         if transaction_id:
             user_to_confirm.transaction_id = transaction_id
+            user_to_confirm.subscription_expired = False  # a renewal goes back into the admin's queue
             user_to_confirm.save()
             messages.success(request, "Your payment confirmation has been sent to the admin. Your account will be activated within 24 hours.")
             return redirect('login')
@@ -419,6 +452,7 @@ def payment_view(request, user_id):
     }
     return render(request, 'accounts/payment.html', context)
 
+@throttling.throttle_login
 def forgot_password_view(request):
     if request.method == 'POST':
         # This part handles the form submission
@@ -436,7 +470,7 @@ def forgot_password_view(request):
                 messages.error(request, "New passwords do not match.")
             else:
                 # Success: Hash and save the new password
-                user.password = make_hashes(new_password)
+                user.set_password(new_password)
                 user.save()
                 messages.success(request, "Your password has been reset successfully. Please log in.")
                 return redirect('login')
@@ -452,27 +486,32 @@ def confirm_student_view(request, user_id):
     if request.user.role != 'Admin':
         return redirect('dashboard')
     
-    try:
-        student = CustomUser.objects.get(id=user_id, role='Student')
-        
-        # --- FIX: Add a safety check for the subscription plan ---
-        duration = 30 # Default to 30 days if plan is missing
-        if student.subscription_plan: # Check if the plan is not empty
-            if "6 months" in student.subscription_plan:
-                duration = 182
-            elif "1 year" in student.subscription_plan:
-                duration = 365
-        # ----------------------------------------------------
-            
-        student.payment_confirmed = True
-        student.subscription_date = date.today()
-        student.subscribed_till = date.today() + timedelta(days=duration)
-        student.save()
-        messages.success(request, f"{student.user_name}'s account has been activated.")
-    
-    except CustomUser.DoesNotExist:
+    student, renewed = subscriptions.renew_student(user_id)
+    if student is None:
         messages.error(request, "Student not found.")
-    
+    elif renewed:
+        messages.success(
+            request, f"{student.user_name}'s subscription has been renewed until {student.subscribed_till}."
+        )
+    else:
+        messages.success(request, f"{student.user_name}'s account has been activated.")
+
+    return redirect('dashboard')
+
+@login_required(login_url='/login/')
+def confirm_students_view(request):
+    # Bulk confirm: the students ticked on the admin queue page and/or the
+    # pasted payment transaction ids, in one UPDATE
+    if request.user.role != 'Admin' or request.method != 'POST':
+        return redirect('dashboard')
+
+    ids = [value for value in request.POST.getlist('student_ids') if value.isdigit()]
+    transaction_ids = request.POST.get('transaction_ids', '').replace(',', '\n').splitlines()
+    matched, activated = subscriptions.activate_students(subscriptions.students_matching(ids, transaction_ids))
+    if activated:
+        messages.success(request, f"{activated} student accounts have been activated ({matched} matched).")
+    else:
+        messages.error(request, f"No pending students were activated ({matched} matched).")
     return redirect('dashboard')
 
 # --- NEW VIEW TO CONFIRM TEACHERS ---
@@ -491,6 +530,18 @@ def confirm_teacher_view(request, user_id):
 
     return redirect('dashboard')
 
+# --- Metrics (staff only) ---
+@login_required(login_url='/login/')
+def metrics_view(request):
+    if not (request.user.is_staff or request.user.role == 'Admin'):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse({
+        'views': instrumentation.snapshot(),
+        'dashboard_cache': dashboard_cache.stats(),
+        'login_throttle': throttling.stats(),
+        'grading_pool': grading_pool.stats(),
+    })
+
 # --- Logout View ---
 def logout_view(request):
     logout(request)
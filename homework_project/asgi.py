@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'homework_project.settings')
+# Serve the async dashboard and answer views (accounts/async_views.py)
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'homework_project.urls_asgi')
 
 application = get_asgi_application()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import dj_database_url
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'accounts.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,7 +55,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'homework_project.urls'
+# homework_project/asgi.py points this at homework_project.urls_asgi
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'homework_project.urls')
 
 TEMPLATES = [
     {
@@ -76,9 +79,14 @@ WSGI_APPLICATION = 'homework_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# Database configuration for Railway
+# Database configuration for Railway (falls back to a local SQLite file when
+# DATABASE_URL is not set, e.g. for running the test suite offline)
 DATABASES = {
-    'default': dj_database_url.config(conn_max_age=600, ssl_require=True)
+    'default': dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=600,
+        ssl_require='DATABASE_URL' in os.environ,
+    )
 }
 
 
@@ -100,6 +108,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. The first hasher hashes new passwords; the others only
+# verify old ones and are upgraded on the next login (see accounts/hashers.py).
+PASSWORD_HASHERS = [
+    'accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'accounts.hashers.LegacySHA256PasswordHasher',
+]
+
+# PBKDF2 work factor. Raising or lowering it rehashes each password on its
+# owner's next login; `manage.py bench_password_hashing` shows the cost.
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', '600000'))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -123,5 +146,110 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# request.user comes from a cached slim snapshot (accounts/backends.py).
+# ModelBackend stays listed so sessions created before the switch stay valid;
+# it never checks passwords, CachedUserBackend ends every failed login.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Only used with a cache shared by every process (see CACHES below); 0 disables it
+SESSION_USER_CACHE_TIMEOUT = 600
+
+# Sessions are read through the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/accounts/dashboard/'
+
+# Caching. Dashboard contexts (accounts/dashboard_cache.py), session user
+# snapshots (accounts/backends.py) and login throttle buckets
+# (accounts/throttling.py) are read on every request and invalidated by writes
+# made in any process - web workers, grading_worker and the management
+# commands - so the cache must be shared by all of them without costing a
+# database query: files under CACHE_DIR by default, which every process on
+# the same machine shares, or Redis when REDIS_URL is set (needs the redis
+# package). Set REDIS_URL when the Procfile processes run on separate
+# machines. A process-local cache such as LocMemCache is only safe with a
+# single process, e.g. runserver. The throttle buckets have an alias of their
+# own, so clearing the default cache does not reset them.
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'homework-cache'))
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'throttle',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'default'),
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'throttle'),
+        },
+    }
+
+# Seconds a cached dashboard context may live (it is also invalidated on writes)
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Login / password-reset throttling (accounts/throttling.py):
+# scope -> (burst size, tokens refilled per second). The 'email' bucket is
+# kept per email and client address, so nobody can lock an account out from
+# elsewhere. A per-IP bucket, e.g. 'ip': (300, 5.0), is opt-in: a whole
+# school can sit behind one address. Both need THROTTLE_NUM_PROXIES to see
+# the real client address.
+LOGIN_THROTTLE_BUCKETS = {
+    'email': (5, 1 / 60),
+}
+# Reverse proxies in front of the app that append to X-Forwarded-For: 1 behind
+# the router of the Procfile platform, 0 when clients connect directly
+THROTTLE_NUM_PROXIES = int(os.environ.get('THROTTLE_NUM_PROXIES', '0'))
+
+# Per-view request metrics (accounts/instrumentation.py): also send staff
+# (the metrics view's audience) each response's own timings in a
+# Server-Timing header
+REQUEST_METRICS_SERVER_TIMING = os.environ.get('REQUEST_METRICS_SERVER_TIMING', '1') == '1'
+
+# Grading: load NumPy/SciPy when the app starts instead of on first batch grade
+GRADING_WARM_UP = os.environ.get('GRADING_WARM_UP', '0') == '1'
+
+# Grading mode: 'sync' grades inside answer_view, 'queue' stores the answer as
+# pending and leaves it to `manage.py grading_worker` (the Procfile worker
+# process; scale it up only in queue mode)
+GRADING_MODE = os.environ.get('GRADING_MODE', 'sync')
+
+# Async views (ASGI only, accounts/async_views.py): threads running dashboard
+# panels concurrently, each holding a database connection
+DASHBOARD_PANEL_THREADS = int(os.environ.get('DASHBOARD_PANEL_THREADS', '4'))
+
+# Grading process pool (accounts/grading_pool.py): worker processes per web
+# process, started and warmed up on its first request; 0 grades in-process.
+# Submissions arriving within the batch window are scored as one task.
+GRADING_POOL_SIZE = int(os.environ.get('GRADING_POOL_SIZE', '0'))
+GRADING_BATCH_WINDOW_MS = float(os.environ.get('GRADING_BATCH_WINDOW_MS', '5'))
+GRADING_BATCH_MAX = int(os.environ.get('GRADING_BATCH_MAX', '64'))
+
+# Grading tokenizer (accounts/tokenizer.py): per-subject stop-word lists and
+# light stemmers, by language ('en', 'hi'), e.g.
+#   {'Hindi': {'stop_words': ['hi'], 'stem': ['hi']},
+#    'English': {'stop_words': ['en'], 'stem': ['en']}}
+# Unlisted subjects are only normalised and split. Changing an entry makes
+# that subject's stored vectors stale; they are rebuilt on the fly.
+GRADING_ANALYZERS = {}
+# Rebuilt (stale) model answer vectors kept per process
+GRADING_VECTOR_CACHE_SIZE = 2048
+
+# Grading backends (accounts/grading_backends.py): 'tfidf', 'hashed_ngram' or
+# 'minhash', per subject, e.g. {'GK': 'minhash'}; a question's own
+# grading_backend wins. Compare them with `manage.py bench_grading_backends`.
+GRADING_DEFAULT_BACKEND = 'tfidf'
+GRADING_BACKENDS = {}
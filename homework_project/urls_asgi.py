@@ -0,0 +1,15 @@
+"""
+URL configuration of the ASGI deployment (homework_project/asgi.py).
+
+Identical to homework_project/urls.py except that the accounts app serves
+its async dashboard and answer views (accounts/urls_asgi.py).
+"""
+from django.contrib import admin
+from django.urls import path, include
+from django.views.generic import RedirectView
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('accounts/', include('accounts.urls_asgi')),
+    path('', RedirectView.as_view(url='/accounts/login/', permanent=True)),
+]